@@ -1,9 +1,26 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from app.models.request_models import ResearchRequest
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
+from app.config.settings import settings
+from app.models.request_models import ResearchRequest, BulkStatusRequest
+from app.models.response_models import TaskPage
 from app.models.task_store import task_store
-from app.services.research_service import start_research_pipeline
+from app.models.history_store import history_store
+from app.models.task_journal import task_journal
+from app.services.research_service import (
+    start_research_pipeline,
+    start_refresh_pipeline,
+    resume_research_pipeline,
+)
+from app.utils.tracing import tracer
+from app.utils.workload import record_request
 
+import asyncio
+import json
+import logging
 import uuid
+from typing import Optional
+
+logger = logging.getLogger("research_api")
 
 router = APIRouter(
     tags=["Research"],
@@ -18,25 +35,106 @@ async def start_research(
     req: ResearchRequest,
     background_tasks: BackgroundTasks
 ):
+    # Record production traffic for load replay (python -m app.cli.replay)
+    if settings.WORKLOAD_RECORD_PATH:
+        try:
+            record_request(settings.WORKLOAD_RECORD_PATH, req.model_dump(exclude_none=True))
+        except OSError as e:
+            logger.warning(f"Could not record request: {e}")
+
     # Generate a unique task_id
     task_id = str(uuid.uuid4())
 
     # Store the task as pending
     task_store.create_task(task_id, query=req.query)
 
+    # Near-duplicate of a recent result? Answer instantly or flag it.
+    match = await _find_reusable(req)
+    if match and settings.HISTORY_REUSE_MODE == "reuse":
+        await asyncio.to_thread(task_store.set_result, task_id, match["result"])
+        return {
+            "task_id": task_id,
+            "status": "completed",
+            "message": "Answered from a recent result for a similar query.",
+            "reused_from": match["task_id"],
+            "similarity": match["similarity"],
+        }
+
     # Run the pipeline asynchronously via background task
     background_tasks.add_task(
         start_research_pipeline,
         task_id=task_id,
         query=req.query,
-        max_results=req.max_results
+        max_results=req.max_results,
+        deadline_ms=req.deadline_ms,
+        mode=req.mode,
     )
 
-    return {
+    response = {
         "task_id": task_id,
         "status": "started",
         "message": "Research task has been created."
     }
+    if match:
+        response["reuse_candidate"] = {
+            "task_id": match["task_id"],
+            "topic": match["topic"],
+            "similarity": match["similarity"],
+        }
+    return response
+
+
+# -------------------------------------------------------------
+# GET /research → List tasks (paginated, by status / creation time)
+# -------------------------------------------------------------
+@router.get("/", summary="List research tasks", response_model=TaskPage)
+async def list_research(
+    status: Optional[str] = Query(None, description="pending | running | completed | failed"),
+    since: Optional[float] = Query(None, ge=0, description="Only tasks created at or after this time (epoch seconds)."),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page."),
+    limit: int = Query(50, ge=1, le=500),
+):
+    try:
+        tasks, next_cursor = task_store.list_tasks(status=status, since=since, after=cursor, limit=limit)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Unknown cursor.")
+
+    return TaskPage(tasks=tasks, next_cursor=next_cursor)
+
+
+# -------------------------------------------------------------
+# POST /research/status → Many task statuses in one call (NDJSON)
+# -------------------------------------------------------------
+@router.post("/status", summary="Get the status of many research tasks")
+async def bulk_research_status(req: BulkStatusRequest):
+    """
+    Streams one JSON line per requested id, in request order; unknown
+    ids come back as {"task_id": ..., "status": "not_found"}.
+    """
+
+    def lines():
+        # Sync generator: Starlette runs it in a worker thread, so reading
+        # spilled results back from the blob store never blocks the loop
+        for task_id, status in task_store.get_many(req.task_ids):
+            if status is None:
+                yield json.dumps({"task_id": task_id, "status": "not_found"}) + "\n"
+                continue
+            exclude = None if req.include_result else {"result"}
+            yield status.model_dump_json(exclude=exclude) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+# -------------------------------------------------------------
+# GET /research/history/search → Full-text search over past research
+# -------------------------------------------------------------
+@router.get("/history/search", summary="Search completed research")
+async def search_history(
+    q: str = Query(..., min_length=2, description="Words to search for."),
+    limit: int = Query(20, ge=1, le=100),
+):
+    results = await asyncio.to_thread(history_store.search, q, limit)
+    return {"query": q, "results": results}
 
 
 # -------------------------------------------------------------
@@ -44,9 +142,114 @@ async def start_research(
 # -------------------------------------------------------------
 @router.get("/{task_id}", summary="Get status/results of a research task")
 async def get_research_status(task_id: str):
-    status = task_store.get_status(task_id)
+    status = await asyncio.to_thread(task_store.get_status, task_id)
 
     if not status:
         raise HTTPException(status_code=404, detail="Task ID not found.")
 
     return status
+
+
+# -------------------------------------------------------------
+# GET /research/{task_id}/trace → Span waterfall of one task
+# -------------------------------------------------------------
+@router.get("/{task_id}/trace", summary="Trace waterfall of a research task")
+async def get_research_trace(task_id: str):
+    """
+    Every node, tool call, LLM slot and HTTP request of the task (with
+    DNS / connect / TTFB / body phases), retries and fallbacks as span
+    events. Only the most recent TRACE_BUFFER_TASKS tasks are kept.
+    """
+    trace = tracer.waterfall(task_id)
+
+    if not trace:
+        raise HTTPException(status_code=404, detail="No trace for this task ID.")
+
+    return trace
+
+
+# -------------------------------------------------------------
+# POST /research/{task_id}/resume → Continue a failed/interrupted task
+# -------------------------------------------------------------
+@router.post("/{task_id}/resume", summary="Resume a failed or interrupted research task")
+async def resume_research(task_id: str, background_tasks: BackgroundTasks):
+    entry = await asyncio.to_thread(task_journal.get, task_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Task ID not found.")
+
+    if entry["status"] == "completed":
+        raise HTTPException(status_code=409, detail="Task has already completed.")
+
+    status = await asyncio.to_thread(task_store.get_status, task_id)
+    if status and status.status in ("pending", "running"):
+        raise HTTPException(status_code=409, detail="Task is already running.")
+
+    # After a restart the in-memory store no longer knows the task
+    task_store.create_task(task_id, query=entry["query"])
+    background_tasks.add_task(resume_research_pipeline, task_id=task_id, entry=entry)
+
+    return {
+        "task_id": task_id,
+        "status": "resumed",
+        "message": "Research task resumes from its last completed stage.",
+    }
+
+
+# -------------------------------------------------------------
+# POST /research/{task_id}/refresh → Incremental re-run of a result
+# -------------------------------------------------------------
+@router.post("/{task_id}/refresh", summary="Refresh a completed research task")
+async def refresh_research(task_id: str, background_tasks: BackgroundTasks):
+    """
+    Starts a new task that searches again, extracts only new or changed
+    sources and re-summarizes only if the sources materially changed
+    (otherwise the earlier summary is kept). The result's "refresh"
+    field lists what changed.
+    """
+    status = await asyncio.to_thread(task_store.get_status, task_id)
+    if status and status.status != "completed":
+        raise HTTPException(status_code=409, detail="Task has not completed yet.")
+
+    previous = status.result if status else None
+    if previous is None and settings.HISTORY_ENABLED:
+        # After a restart: completed results survive in the history store
+        previous = await asyncio.to_thread(history_store.get, task_id)
+    if previous is None:
+        raise HTTPException(status_code=404, detail="No result found for this task ID.")
+
+    entry = await asyncio.to_thread(task_journal.get, task_id)
+    max_results = entry["max_results"] if entry else max(len(previous.sources), settings.DEFAULT_MAX_RESULTS)
+
+    new_task_id = str(uuid.uuid4())
+    task_store.create_task(new_task_id, query=previous.topic)
+    background_tasks.add_task(
+        start_refresh_pipeline,
+        task_id=new_task_id,
+        source_task_id=task_id,
+        max_results=max_results,
+        previous=previous,
+    )
+
+    return {
+        "task_id": new_task_id,
+        "status": "started",
+        "refreshed_from": task_id,
+        "message": "Refresh started; only new or changed sources are fetched.",
+    }
+
+
+async def _find_reusable(req: ResearchRequest):
+    """Looks up a fresh, similar enough result in the history store."""
+    if not (settings.HISTORY_ENABLED and req.allow_reuse) or settings.HISTORY_REUSE_MODE == "off":
+        return None
+
+    try:
+        return await asyncio.to_thread(
+            history_store.find_similar,
+            req.query,
+            settings.HISTORY_FRESHNESS_S,
+            settings.HISTORY_REUSE_THRESHOLD,
+        )
+    except Exception as e:
+        logger.warning(f"History lookup failed: {e}")
+        return None
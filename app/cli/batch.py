@@ -0,0 +1,227 @@
+"""
+Offline batch runner.
+
+Runs the research graph over a JSONL file of queries without the HTTP
+API: a bounded pool of async workers calls execute_graph directly with
+the shared tools, streams one NDJSON result line per query, and appends
+finished ids to a checkpoint file so an interrupted run resumes where it
+stopped. With --shards N the input is split across N processes, each
+writing its own output and checkpoint (<file>.shard<i>).
+
+Input lines use the workload format (app/utils/workload.py), plus an
+optional "id" (defaults to "line-<n>"):
+
+    {"id": "ai-jobs", "query": "impact of AI on jobs", "max_results": 5}
+
+Usage:
+    python -m app.cli.batch queries.jsonl --output results.ndjson
+    python -m app.cli.batch queries.jsonl --output results.ndjson --concurrency 16 --shards 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Set
+
+from app.config.settings import settings
+from app.utils.workload import load_workload
+
+logger = logging.getLogger("batch")
+
+
+# ============================================================
+#   Input / checkpoint
+# ============================================================
+
+def load_items(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Reads the batch input, giving every query a stable id."""
+    items = []
+    for entry in load_workload(path, limit=limit):
+        body = dict(entry["body"])
+        item_id = str(body.pop("id", None) or f"line-{entry['line']}")
+        items.append({"id": item_id, "body": body})
+    return items
+
+
+def shard_of(item_id: str, shards: int) -> int:
+    """Stable across runs and processes (unlike hash())."""
+    return zlib.crc32(item_id.encode("utf-8")) % shards
+
+
+def read_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def _shard_path(path: str, shard: int, shards: int) -> str:
+    return path if shards == 1 else f"{path}.shard{shard}"
+
+
+# ============================================================
+#   Worker pool
+# ============================================================
+
+async def _run_item(item: Dict[str, Any], tools: Dict[str, Any]) -> Dict[str, Any]:
+    from app.models.request_models import ResearchRequest
+    from app.models.response_models import ResearchResult
+    from app.services.graph.executor import execute_graph
+    from app.services.graph.router import query_router
+
+    started = time.perf_counter()
+    record: Dict[str, Any] = {"id": item["id"], "query": item["body"].get("query")}
+
+    try:
+        req = ResearchRequest(**item["body"])
+        path = (await query_router.route(req.query)).path
+        record["path"] = path
+
+        payload = await execute_graph(
+            task_id=f"batch-{item['id']}",
+            query=req.query,
+            max_results=req.max_results,
+            path=path,
+            tools=tools,
+            deadline_ms=req.deadline_ms,
+            # behind interactive and complex API traffic in the LLM gateway
+            priority="batch",
+            mode=req.mode,
+        )
+        query_router.record_latency(path, time.perf_counter() - started)
+
+        result = ResearchResult(
+            topic=req.query,
+            summary=payload["summary"],
+            key_points=payload["key_points"],
+            sources=payload["sources"],
+            partial=payload.get("partial", False),
+            summarizer=payload.get("summarizer", "llm"),
+        )
+        record.update(status="completed", result=result.model_dump(), usage=payload.get("usage"))
+
+    except Exception as e:
+        logger.warning(f"[{item['id']}] failed: {e}")
+        record.update(status="failed", error=str(e))
+
+    record["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+
+async def run_batch(
+    items: List[Dict[str, Any]],
+    output_path: str,
+    checkpoint_path: str,
+    concurrency: int,
+) -> Dict[str, int]:
+    """
+    Runs every item not yet in the checkpoint. Results are written as
+    they finish (not in input order); only completed ids are
+    checkpointed, so failed queries are retried on the next run.
+    """
+    from app.services.readiness import warm_up
+    from app.services.tool_registry import get_tools, close_tools
+
+    done = read_checkpoint(checkpoint_path)
+    todo = [item for item in items if item["id"] not in done]
+    counts = {"total": len(items), "skipped": len(items) - len(todo), "completed": 0, "failed": 0}
+    if not todo:
+        return counts
+
+    await warm_up()
+    tools = get_tools()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in todo:
+        queue.put_nowait(item)
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+        async def worker():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                record = await _run_item(item, tools)
+                counts[record["status"]] += 1
+
+                # Result first, then checkpoint: a crash in between re-runs
+                # the item (at-least-once) instead of losing it
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if record["status"] == "completed":
+                    checkpoint.write(item["id"] + "\n")
+                    checkpoint.flush()
+
+                finished = counts["completed"] + counts["failed"]
+                if finished % 10 == 0 or finished == len(todo):
+                    logger.info(f"{finished}/{len(todo)} done ({counts['failed']} failed)")
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        finally:
+            await close_tools()
+
+    return counts
+
+
+# ============================================================
+#   Sharding (one process per shard)
+# ============================================================
+
+def _run_shard(args, shard: int) -> Dict[str, int]:
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [shard {shard}] %(message)s")
+
+    items = [
+        item for item in load_items(args.input, limit=args.limit)
+        if shard_of(item["id"], args.shards) == shard
+    ]
+    return asyncio.run(run_batch(
+        items,
+        output_path=_shard_path(args.output, shard, args.shards),
+        checkpoint_path=_shard_path(args.checkpoint, shard, args.shards),
+        concurrency=args.concurrency,
+    ))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the research pipeline over a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one query per line.")
+    parser.add_argument("--output", required=True, help="NDJSON results file (appended to).")
+    parser.add_argument("--checkpoint", default=None, help="Completed ids (default: <output>.done).")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY)
+    parser.add_argument("--shards", type=int, default=1, help="Worker processes.")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N queries.")
+    args = parser.parse_args(argv)
+    args.checkpoint = args.checkpoint or f"{args.output}.done"
+    args.shards = max(1, args.shards)
+
+    started = time.perf_counter()
+    if args.shards == 1:
+        results = [_run_shard(args, 0)]
+    else:
+        # spawn: each shard gets a fresh interpreter and its own event loop
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(processes=args.shards) as pool:
+            results = pool.starmap(_run_shard, [(args, i) for i in range(args.shards)])
+
+    totals = {key: sum(r[key] for r in results) for key in results[0]}
+    print(
+        f"{totals['completed']} completed, {totals['failed']} failed, "
+        f"{totals['skipped']} already done (of {totals['total']}) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Import-time budget check (cold start guard).
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+reports the slowest imports and fails if the total exceeds the budget
+or if a heavy optional provider is imported eagerly.
+
+Usage:
+    python -m app.cli.import_budget
+    python -m app.cli.import_budget --module app.main --budget-ms 600 --top 20
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from app.config.settings import settings
+
+
+# Heavy providers that must only load lazily (warm-up / first task)
+DEFAULT_FORBIDDEN = (
+    "langgraph",
+    "readability",
+    "lxml",
+    "google.generativeai",
+    "aiohttp",
+    "tenacity",
+    "numpy",
+    "redis",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[str, float, float]]]:
+    """
+    Returns (total ms, [(module, self ms, cumulative ms), ...]).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    entries: List[Tuple[str, float, float]] = []
+    total_ms = 0.0
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, name = match.groups()
+        entries.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+        if name == module:
+            total_ms = int(cumulative_us) / 1000
+
+    return total_ms, entries
+
+
+def check(module: str, budget_ms: float, forbidden: Tuple[str, ...], top: int) -> int:
+    total_ms, entries = measure(module)
+    loaded: Dict[str, float] = {name: cum for name, _, cum in entries}
+
+    print(f"import {module}: {total_ms:.1f} ms (budget {budget_ms:.0f} ms)\n")
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, self_ms, cum_ms in sorted(entries, key=lambda e: e[2], reverse=True)[:top]:
+        print(f"{cum_ms:>14.1f}  {self_ms:>8.1f}  {name}")
+
+    eager = sorted(
+        name for name in loaded
+        if any(name == f or name.startswith(f + ".") for f in forbidden)
+    )
+    eager_roots = sorted({n for n in eager if not any(n.startswith(e + ".") for e in eager)})
+
+    failed = False
+    if total_ms > budget_ms:
+        print(f"\nFAIL: {total_ms:.1f} ms exceeds the {budget_ms:.0f} ms budget")
+        failed = True
+    if eager_roots:
+        print(f"\nFAIL: heavy modules imported eagerly: {', '.join(eager_roots)}")
+        failed = True
+    if not failed:
+        print("\nOK")
+
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the app.")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=settings.IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="Show the N slowest imports.")
+    parser.add_argument(
+        "--forbid",
+        default=",".join(DEFAULT_FORBIDDEN),
+        help="Comma-separated modules that must not be imported eagerly ('' to disable).",
+    )
+    args = parser.parse_args(argv)
+
+    forbidden = tuple(m.strip() for m in args.forbid.split(",") if m.strip())
+    return check(args.module, args.budget_ms, forbidden, args.top)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+"""
+Load-replay harness.
+
+Fires a recorded or synthetic workload (see app/utils/workload.py) at
+the research API — in process or over HTTP — at real-time or scaled
+rates, polls every task to completion and reports latency percentiles,
+error rates and a saturation curve (one row per replay speed).
+
+Usage:
+    # Synthetic workload: 200 requests, Poisson arrivals at 2 req/s
+    python -m app.cli.replay synth workload.jsonl --count 200 --rps 2
+
+    # Replay in process at 1x, then 2x and 4x speed
+    python -m app.cli.replay run workload.jsonl --speeds 1,2,4
+
+    # Replay against a running server
+    python -m app.cli.replay run workload.jsonl --target http://localhost:8000
+
+Every speed starts cold: history reuse is turned off for replayed
+requests and, in process, the search / page / summary caches are
+emptied before each speed (--allow-reuse / --warm-caches keep them).
+An HTTP target keeps its caches; restart it between runs.
+
+In process, every store (shared cache, history, journal, checkpoints,
+blobs) lives in its own data directory (--data-dir, a fresh temporary
+one by default), so a replay never touches the real data/ stores.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from app.utils.workload import load_workload
+
+
+API_PREFIX = "/api/v1/research"
+
+_FINAL_STATUSES = ("completed", "failed")
+
+
+# ============================================================
+#   Targets: how a request is submitted and its status polled
+# ============================================================
+
+class InProcessTarget:
+    """
+    Calls the FastAPI endpoint functions directly (no HTTP), running
+    their background tasks on this event loop, with every store in
+    `data_dir`.
+    """
+
+    def __init__(self, data_dir: str):
+        # Settings are read once, on first import: isolate before that
+        if "app.config.settings" in sys.modules:
+            raise RuntimeError("The in-process target must be set up before the app is imported.")
+
+        os.makedirs(data_dir, exist_ok=True)
+        os.environ.update({
+            "SHARED_CACHE_BACKEND": "sqlite",
+            "SHARED_CACHE_PATH": os.path.join(data_dir, "shared_cache.db"),
+            "HISTORY_DB_PATH": os.path.join(data_dir, "research_history.db"),
+            "BLOB_STORE_PATH": os.path.join(data_dir, "blobs"),
+            "CHECKPOINT_DB_PATH": os.path.join(data_dir, "checkpoints.db"),
+            "TASK_JOURNAL_PATH": os.path.join(data_dir, "task_journal.db"),
+            # Replayed requests are not a workload to record again
+            "WORKLOAD_RECORD_PATH": "",
+        })
+        self.data_dir = data_dir
+
+    async def start(self):
+        from app.services.readiness import warm_up
+        await warm_up()
+        self._background: set = set()
+
+    async def submit(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        from fastapi import BackgroundTasks
+        from app.api.research import start_research
+        from app.models.request_models import ResearchRequest
+
+        background = BackgroundTasks()
+        response = await start_research(ResearchRequest(**body), background)
+
+        task = asyncio.create_task(background())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return response
+
+    async def status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        from app.models.task_store import task_store
+        status = await asyncio.to_thread(task_store.get_status, task_id)
+        return status.model_dump() if status else None
+
+    async def clear_caches(self):
+        from app.utils.shared_cache import clear_caches
+        await clear_caches()
+
+    async def close(self):
+        from app.services.tool_registry import close_tools
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        await close_tools()
+
+
+class HttpTarget:
+    """Talks to a running server over HTTP."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self._warned = False
+
+    async def start(self):
+        import aiohttp
+        self._session = aiohttp.ClientSession()
+
+    async def submit(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._session.post(f"{self.base_url}{API_PREFIX}/", json=body) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        async with self._session.get(f"{self.base_url}{API_PREFIX}/{task_id}") as resp:
+            if resp.status == 404:
+                return None
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def clear_caches(self):
+        """A running server's caches cannot be cleared from here."""
+        if not self._warned:
+            self._warned = True
+            print(
+                "Note: the caches of an HTTP target are kept between speeds; "
+                "restart it between runs for cold numbers.",
+                flush=True,
+            )
+
+    async def close(self):
+        await self._session.close()
+
+
+# ============================================================
+#   Replay
+# ============================================================
+
+async def _run_one(target, entry, speed: float, started: float, args, stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Waits for the entry's (scaled) arrival time, submits and polls it."""
+    delay = started + entry["at"] / speed - time.perf_counter()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+    record = {"line": entry["line"], "query": entry["body"]["query"], "outcome": "error"}
+    arrived = time.perf_counter()
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+
+    body = entry["body"] if args.allow_reuse else {**entry["body"], "allow_reuse": False}
+
+    try:
+        response = await target.submit(body)
+        record["submit_ms"] = (time.perf_counter() - arrived) * 1000
+        task_id = response["task_id"]
+
+        while True:
+            status = await target.status(task_id)
+            if status and status["status"] in _FINAL_STATUSES:
+                record["outcome"] = status["status"]
+                result = status.get("result") or {}
+                record["partial"] = bool(result.get("partial"))
+                break
+            if time.perf_counter() - arrived > args.timeout:
+                record["outcome"] = "timeout"
+                break
+            await asyncio.sleep(args.poll_interval)
+
+    except Exception as e:
+        record["error"] = repr(e)
+
+    finally:
+        stats["in_flight"] -= 1
+
+    record["arrival_s"] = arrived - started
+    record["latency_ms"] = (time.perf_counter() - arrived) * 1000
+    return record
+
+
+async def replay(target, entries: List[Dict[str, Any]], speed: float, args) -> Dict[str, Any]:
+    stats = {"in_flight": 0, "max_in_flight": 0}
+    started = time.perf_counter()
+
+    records = await asyncio.gather(
+        *(_run_one(target, e, speed, started, args, stats) for e in entries)
+    )
+    wall_s = time.perf_counter() - started
+    return summarize_run(records, speed, wall_s, stats["max_in_flight"], entries)
+
+
+def _percentile(ordered: List[float], pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 1)
+
+
+def summarize_run(records, speed: float, wall_s: float, max_in_flight: int, entries) -> Dict[str, Any]:
+    total = len(records)
+    completed = [r for r in records if r["outcome"] == "completed"]
+    latencies = sorted(r["latency_ms"] for r in completed)
+
+    span_s = (entries[-1]["at"] / speed) if entries else 0.0
+    counts: Dict[str, int] = {}
+    for r in records:
+        counts[r["outcome"]] = counts.get(r["outcome"], 0) + 1
+
+    return {
+        "speed": speed,
+        "requests": total,
+        "outcomes": counts,
+        "error_rate": round(1 - len(completed) / total, 4) if total else 0.0,
+        "partial_rate": round(sum(1 for r in completed if r.get("partial")) / len(completed), 4) if completed else 0.0,
+        "offered_rps": round(total / span_s, 3) if span_s > 0 else None,
+        "throughput_rps": round(len(completed) / wall_s, 3) if wall_s > 0 else None,
+        "max_in_flight": max_in_flight,
+        "latency_ms": {
+            "p50": _percentile(latencies, 50),
+            "p90": _percentile(latencies, 90),
+            "p95": _percentile(latencies, 95),
+            "p99": _percentile(latencies, 99),
+            "max": round(latencies[-1], 1) if latencies else None,
+        },
+        "wall_s": round(wall_s, 2),
+    }
+
+
+def _print_curve(rows: List[Dict[str, Any]]):
+    print(f"\n{'speed':>6} {'offered/s':>10} {'done/s':>8} {'err%':>6} {'inflight':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in rows:
+        lat = row["latency_ms"]
+        print(
+            f"{row['speed']:>6} {str(row['offered_rps']):>10} {str(row['throughput_rps']):>8} "
+            f"{row['error_rate'] * 100:>6.1f} {row['max_in_flight']:>9} "
+            f"{str(lat['p50']):>9} {str(lat['p95']):>9} {str(lat['p99']):>9}"
+        )
+
+
+async def run(args) -> int:
+    entries = load_workload(args.workload, limit=args.limit)
+    if not entries:
+        print(f"No research requests found in {args.workload}")
+        return 1
+
+    speeds = [float(s) for s in args.speeds.split(",")]
+    if args.target == "inprocess":
+        target = InProcessTarget(args.data_dir or tempfile.mkdtemp(prefix="replay-"))
+        print(f"In-process stores under {target.data_dir}", flush=True)
+    else:
+        target = HttpTarget(args.target)
+    await target.start()
+
+    rows = []
+    try:
+        for speed in speeds:
+            if not args.warm_caches:
+                # Otherwise later speeds are answered from what earlier ones cached
+                await target.clear_caches()
+            print(f"Replaying {len(entries)} requests at {speed}x ...", flush=True)
+            rows.append(await replay(target, entries, speed, args))
+    finally:
+        await target.close()
+
+    _print_curve(rows)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"workload": args.workload, "target": args.target, "runs": rows}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    return 0
+
+
+# ============================================================
+#   Synthetic workload generator
+# ============================================================
+
+_SYNTHETIC_QUERIES = (
+    "what is {t}",
+    "define {t}",
+    "{t} latest news",
+    "impact of {t} on global markets",
+    "future of {t} over the next decade",
+    "comparison of {t} and its main alternatives",
+    "how does {t} work in practice for small teams and startups",
+)
+_SYNTHETIC_TOPICS = (
+    "rust", "quantum computing", "solar power", "large language models",
+    "remote work", "electric vehicles", "kubernetes", "inflation",
+)
+
+
+def synthesize(args) -> int:
+    """Poisson arrivals over a mix of simple and complex queries."""
+    rng = random.Random(args.seed)
+    at = 0.0
+    with open(args.output, "w", encoding="utf-8") as f:
+        for _ in range(args.count):
+            query = rng.choice(_SYNTHETIC_QUERIES).format(t=rng.choice(_SYNTHETIC_TOPICS))
+            line = {"at": round(at, 3), "query": query, "max_results": rng.choice((3, 5, 5, 8))}
+            f.write(json.dumps(line) + "\n")
+            at += rng.expovariate(args.rps)
+
+    print(f"Wrote {args.count} requests over ~{at:.0f}s to {args.output}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a research workload against the API.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="Replay a workload and report latency/saturation.")
+    run_p.add_argument("workload", help="JSONL workload file.")
+    run_p.add_argument("--target", default="inprocess", help="'inprocess' or a base URL.")
+    run_p.add_argument("--speeds", default="1", help="Comma-separated replay speeds, e.g. 1,2,4.")
+    run_p.add_argument("--limit", type=int, default=None, help="Replay only the first N requests.")
+    run_p.add_argument("--poll-interval", type=float, default=0.5)
+    run_p.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout (s).")
+    run_p.add_argument("--output", default=None, help="Write the JSON report here.")
+    run_p.add_argument("--allow-reuse", action="store_true",
+                       help="Let replayed requests reuse earlier results (history).")
+    run_p.add_argument("--warm-caches", action="store_true",
+                       help="Keep search / page / summary caches between speeds.")
+    run_p.add_argument("--data-dir", default=None,
+                       help="In-process stores live here (default: a fresh temporary directory).")
+
+    synth_p = sub.add_parser("synth", help="Generate a synthetic workload.")
+    synth_p.add_argument("output")
+    synth_p.add_argument("--count", type=int, default=100)
+    synth_p.add_argument("--rps", type=float, default=1.0, help="Mean arrival rate.")
+    synth_p.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == "synth":
+        return synthesize(args)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
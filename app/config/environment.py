@@ -1,19 +1,29 @@
 import os
+from functools import cache
 from pathlib import Path
-from dotenv import load_dotenv
 
 
 # ============================================================
-#  Load .env file (if it exists)
+#  Load .env file (if it exists) — once, on first access
 # ============================================================
 
 BASE_DIR = Path(__file__).resolve().parents[2]  # project root
 ENV_PATH = BASE_DIR / ".env"
 
-if ENV_PATH.exists():
-    load_dotenv(ENV_PATH)
-else:
+
+@cache
+def load_environment() -> bool:
+    """
+    Loads the .env file into os.environ the first time any variable is
+    read (not at import time). Returns True if a file was found.
+    """
+    if ENV_PATH.exists():
+        from dotenv import load_dotenv
+        load_dotenv(ENV_PATH)
+        return True
+
     print("[environment.py] No .env file found — using system environment variables.")
+    return False
 
 
 # ============================================================
@@ -25,6 +35,7 @@ def env(key: str, default=None):
     Fetch an environment variable.
     If not found, return the given default.
     """
+    load_environment()
     return os.getenv(key, default)
 
 
@@ -33,6 +44,7 @@ def require_env(key: str) -> str:
     Fetch an environment variable.
     Raises a clear error if it does not exist.
     """
+    load_environment()
     value = os.getenv(key)
     if value is None:
         raise RuntimeError(f"Required environment variable '{key}' is missing.")
@@ -11,9 +11,154 @@ class Settings(BaseSettings):
     # Ollama server URL
     OLLAMA_URL: str = "http://localhost:11434"
 
+    # Ollama model lifecycle: model name, how long Ollama keeps it loaded
+    # after a request ("30m", "-1m" = forever), startup warm-up and the
+    # interval of the warmth probe that re-loads an evicted model
+    OLLAMA_MODEL: str = "llama3"
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    OLLAMA_WARMUP: bool = True
+    OLLAMA_WARMUP_TIMEOUT_S: float = 120.0
+    OLLAMA_PROBE_INTERVAL_S: float = 60.0
+
     # Max search results default
     DEFAULT_MAX_RESULTS: int = 5
 
+    # Hedged requests (tail-latency cutting)
+    HEDGE_ENABLED: bool = True
+    HEDGE_PERCENTILE: float = 95.0
+    HEDGE_GEMINI_DEFAULT_DELAY_S: float = 8.0
+    HEDGE_FETCH_DEFAULT_DELAY_S: float = 5.0
+    HEDGE_SPARE_RESULTS: int = 2
+
+    # Per-task deadlines: time kept back for summarization, and the
+    # minimum time a step needs before it is attempted at all
+    DEADLINE_SUMMARY_RESERVE_S: float = 4.0
+    DEADLINE_MIN_STEP_S: float = 0.25
+
+    # Search fan-out: query every configured provider concurrently
+    SEARCH_FANOUT: bool = True
+    SEARCH_PROVIDER_DEADLINE_S: float = 8.0
+
+    # LLM gateway: slots per provider, slots only interactive (simple
+    # path) calls may use, priority aging, and micro-batching of small
+    # prompts (Gemini: several texts packed into one request)
+    LLM_CONCURRENCY: dict[str, int] = {"gemini": 4, "ollama": 2}
+    LLM_DEFAULT_CONCURRENCY: int = 4
+    LLM_RESERVED_INTERACTIVE: int = 1
+    LLM_PRIORITY_AGING_S: float = 10.0
+    LLM_BATCH_ENABLED: bool = True
+    LLM_BATCH_MAX_SIZE: int = 4
+    LLM_BATCH_WINDOW_MS: float = 20.0
+    LLM_BATCH_MAX_CHARS: int = 6000
+
+    # Degraded mode: summarize extractively (no LLM) when the LLM calls
+    # fail or the primary provider has more than LLM_SATURATION_QUEUE_RATIO
+    # x its concurrency queued
+    SUMMARY_DEGRADED_FALLBACK: bool = True
+    LLM_SATURATION_QUEUE_RATIO: float = 4.0
+
+    # Complex path: split broad questions into sub-queries searched
+    # concurrently. DECOMPOSE_MODE: "rules" | "llm" (Gemini, falls back
+    # to the rules) | "off". Each sub-query may contribute max_results
+    # pages; DECOMPOSE_FETCH_BUDGET caps the total (hedge spares aside)
+    DECOMPOSE_MODE: str = "rules"
+    DECOMPOSE_MAX_SUBQUERIES: int = 3
+    DECOMPOSE_LLM_TIMEOUT_S: float = 3.0
+    DECOMPOSE_FETCH_BUDGET: int = 10
+
+    # Caches for search results, extracted pages and LLM summaries: a
+    # small in-process LRU (MAX_ENTRIES) in front of a tier shared by all
+    # workers. SHARED_CACHE_BACKEND: "sqlite" (WAL file at
+    # SHARED_CACHE_PATH) | "redis" (REDIS_URL) | "off" (in-process only).
+    # A miss being computed elsewhere is waited for up to
+    # SHARED_CACHE_LEASE_S; a failing shared tier is skipped for
+    # SHARED_CACHE_RETRY_S
+    SEARCH_CACHE_TTL_S: float = 900.0
+    SEARCH_CACHE_MAX_ENTRIES: int = 512
+    PAGE_CACHE_TTL_S: float = 3600.0
+    PAGE_CACHE_MAX_ENTRIES: int = 256
+    SUMMARY_CACHE_TTL_S: float = 3600.0
+    SUMMARY_CACHE_MAX_ENTRIES: int = 256
+    SHARED_CACHE_BACKEND: str = "sqlite"
+    SHARED_CACHE_PATH: str = "data/shared_cache.db"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    SHARED_CACHE_LEASE_S: float = 15.0
+    SHARED_CACHE_POLL_S: float = 0.05
+    SHARED_CACHE_RETRY_S: float = 30.0
+
+    # Query router: load thresholds, complex-path latency budget and
+    # an optional JSONL file recording every routing decision
+    ROUTER_QUEUE_SOFT_LIMIT: int = 8
+    ROUTER_QUEUE_HARD_LIMIT: int = 32
+    ROUTER_COMPLEX_BUDGET_S: float = 15.0
+    ROUTER_COMPLEX_DEFAULT_S: float = 20.0
+    ROUTER_SIMPLE_DEFAULT_S: float = 5.0
+    ROUTER_WARM_PAGE_RATIO: float = 0.6
+    ROUTER_DECISION_LOG: str | None = None
+
+    # Research history (SQLite + FTS5) and near-duplicate query reuse.
+    # HISTORY_REUSE_MODE: "reuse" answers instantly from a close enough
+    # recent result, "candidate" only reports it, "off" disables lookup
+    HISTORY_ENABLED: bool = True
+    HISTORY_DB_PATH: str = "data/research_history.db"
+    HISTORY_REUSE_MODE: str = "reuse"
+    HISTORY_REUSE_THRESHOLD: float = 0.75
+    HISTORY_FRESHNESS_S: float = 86400.0
+
+    # Content-addressed blob store for large artifacts (extracted pages,
+    # spilled task results). Graph state only carries handles. Blobs
+    # unused for BLOB_TTL_S are pruned at startup and then every
+    # HOUSEKEEPING_INTERVAL_S; the task store keeps the newest
+    # TASK_RESULTS_IN_MEMORY results in memory, older ones are read back
+    # from blobs on demand, and forgets finished tasks after TASK_RETENTION_S
+    BLOB_STORE_PATH: str = "data/blobs"
+    BLOB_TTL_S: float = 7 * 86400.0
+    TASK_RESULTS_IN_MEMORY: int = 256
+    TASK_RETENTION_S: float = 86400.0
+    HOUSEKEEPING_INTERVAL_S: float = 3600.0
+
+    # Graph checkpoints (state after every node) and the task journal,
+    # so failed or interrupted tasks resume without redoing finished
+    # stages. RESUME_ON_STARTUP picks up tasks that were running
+    CHECKPOINT_ENABLED: bool = True
+    CHECKPOINT_DB_PATH: str = "data/checkpoints.db"
+    TASK_JOURNAL_PATH: str = "data/task_journal.db"
+    RESUME_ON_STARTUP: bool = True
+
+    # Cold start: budget for `import app.main` (python -m app.cli.import_budget)
+    IMPORT_TIME_BUDGET_MS: float = 800.0
+
+    # Append every POST /research body (with arrival time) to this JSONL
+    # file, in the replay workload format. Empty = disabled
+    WORKLOAD_RECORD_PATH: str | None = None
+
+    # Offline batch runner (python -m app.cli.batch): concurrent tasks per process
+    BATCH_CONCURRENCY: int = 8
+
+    # Outbound policy (per host): circuit breaker, AIMD concurrency
+    # limit and retry budget (retries allowed per request made). Policy
+    # is kept for the OUTBOUND_MAX_HOSTS most recently used hosts
+    OUTBOUND_BREAKER_FAILURES: int = 5
+    OUTBOUND_BREAKER_OPEN_S: float = 30.0
+    OUTBOUND_INITIAL_CONCURRENCY: int = 8
+    OUTBOUND_MAX_CONCURRENCY: int = 32
+    OUTBOUND_LATENCY_TOLERANCE: float = 2.0
+    OUTBOUND_RETRY_BUDGET_RATIO: float = 0.2
+    OUTBOUND_RETRY_BUDGET_INITIAL: float = 5.0
+    OUTBOUND_MAX_HOSTS: int = 1024
+
+    # POST /research/{task_id}/refresh: re-summarize only when at least
+    # this share of the sources was added, removed or changed
+    REFRESH_MATERIAL_CHANGE: float = 0.2
+
+    # Per-task tracing: spans of the last TRACE_BUFFER_TASKS tasks are kept
+    # in memory (GET /research/{task_id}/trace). TRACE_EXPORT_PATH appends
+    # finished traces as OTLP/JSON lines. Empty = no export
+    TRACING_ENABLED: bool = True
+    TRACE_BUFFER_TASKS: int = 500
+    TRACE_MAX_SPANS: int = 2000
+    TRACE_EXPORT_PATH: str | None = None
+
     class Config:
         env_file = ".env"
         extra = "allow"
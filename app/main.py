@@ -1,21 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
-from app.api.research import router as research_router
-from app.tools.web_search_tool import WebSearchTool
-from app.tools.content_extractor_tool import ContentExtractorTool
 from app.api.router import api_router
+from app.config.settings import settings
+from app.services.readiness import housekeeping, readiness, warm_up
+from app.services.ollama_lifecycle import ollama_lifecycle
+from app.services.llm_gateway import llm_gateway
+from app.services.research_service import resume_interrupted_tasks
+from app.services.graph.checkpoint import close_checkpointer
+from app.services.tool_registry import close_tools
+from app.utils.usage import usage_stats
 logger = logging.getLogger("main")
 logging.basicConfig(level=logging.INFO)
 
-# Global shared resources
-global_tools = {
-    "web_search": None,
-    "extractor": None,
-}
-
 
 # ============================================================
 # Lifespan Context Manager (Modern FastAPI Startup/Shutdown)
@@ -28,12 +29,23 @@ async def lifespan(app: FastAPI):
     """
 
     # ----------------------------------------
-    # STARTUP: Initialize shared resources
+    # STARTUP: Warm up shared resources in the background
+    # (heavy imports, compiled graphs, tools) — see GET /ready
     # ----------------------------------------
-    logger.info("🚀 Starting FastAPI app - initializing shared resources")
+    logger.info("🚀 Starting FastAPI app - warming up shared resources")
+
+    warmup_task = asyncio.create_task(warm_up())
+
+    # Preload the Ollama fallback model and keep it warm (probe loop)
+    ollama_task = asyncio.create_task(ollama_lifecycle.run()) if settings.OLLAMA_WARMUP else None
 
-    global_tools["web_search"] = WebSearchTool()
-    global_tools["extractor"] = ContentExtractorTool()
+    # Periodic pruning of blobs / shared cache and old finished tasks
+    housekeeping_task = asyncio.create_task(housekeeping())
+
+    # Tasks cut off by the last shutdown/crash continue from their
+    # last checkpoint (see POST /research/{task_id}/resume)
+    if settings.RESUME_ON_STARTUP:
+        await resume_interrupted_tasks()
 
     yield  # <-- App runs here (receives requests)
 
@@ -42,11 +54,14 @@ async def lifespan(app: FastAPI):
     # ----------------------------------------
     logger.info("🔻 Shutting down FastAPI - cleaning up resources")
 
+    background = [t for t in (warmup_task, ollama_task, housekeeping_task) if t is not None]
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+
     try:
-        if global_tools["web_search"]:
-            await global_tools["web_search"].close()
-        if global_tools["extractor"]:
-            await global_tools["extractor"].close()
+        await close_tools()
+        await close_checkpointer()
     except Exception as e:
         logger.error(f"Error during shutdown cleanup: {e}")
 
@@ -77,7 +92,29 @@ def create_app() -> FastAPI:
     # Root endpoint
     @app.get("/", tags=["Health"])
     async def health_check():
-        return {"status": "ok", "message": "Research Assistant API running"}
+        return {
+            "status": "ok",
+            "message": "Research Assistant API running",
+            "ready": readiness.ready,
+            # Fallback LLM warmth: a cold model costs seconds on first use
+            "ollama": ollama_lifecycle.snapshot(),
+        }
+
+    # Readiness: 503 until the startup warm-up has completed
+    @app.get("/ready", tags=["Health"])
+    async def readiness_check():
+        snapshot = readiness.snapshot()
+        return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+    # LLM gateway: slots, queues, queue wait vs model time per provider
+    @app.get("/stats/llm", tags=["Health"])
+    async def llm_stats():
+        return llm_gateway.snapshot()
+
+    # Resource usage of finished tasks, totals and per-task averages per path
+    @app.get("/stats/usage", tags=["Health"])
+    async def usage_stats_by_path():
+        return usage_stats.snapshot()
 
     return app
 
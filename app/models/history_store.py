@@ -0,0 +1,200 @@
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import settings
+from .response_models import ResearchResult
+
+
+# Words that carry no meaning for query similarity
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in into is it of on or the "
+    "to vs what when where which who why with about does do".split()
+)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """
+    Lowercases, drops stopwords and applies a light plural stemming,
+    so "effects of AI on jobs" and "AI effect on job" look alike.
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def shingles(text: str, size: int = 2) -> set[str]:
+    """
+    Token shingles (word n-grams) of the normalized query. Single
+    tokens are included so short queries still overlap.
+    """
+    tokens = normalize_tokens(text)
+    grams = set(tokens)
+    grams.update(" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    return grams
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class HistoryStore:
+    """
+    Persistent SQLite store of completed research results with an FTS5
+    index over topic, summary and key points.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = Lock()
+
+    # -------------------------------------------------------
+    # Lazy connection + schema
+    # -------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS research_history (
+                    task_id     TEXT PRIMARY KEY,
+                    topic       TEXT NOT NULL,
+                    shingles    TEXT NOT NULL,
+                    result_json TEXT NOT NULL,
+                    created_at  REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_history_created
+                    ON research_history (created_at);
+                CREATE VIRTUAL TABLE IF NOT EXISTS research_fts USING fts5(
+                    task_id UNINDEXED, topic, summary, key_points
+                );
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    # -------------------------------------------------------
+    # Store a completed result
+    # -------------------------------------------------------
+    def save(self, task_id: str, result: ResearchResult):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO research_history VALUES (?, ?, ?, ?, ?)",
+                    (
+                        task_id,
+                        result.topic,
+                        json.dumps(sorted(shingles(result.topic))),
+                        result.model_dump_json(),
+                        time.time(),
+                    ),
+                )
+                conn.execute("DELETE FROM research_fts WHERE task_id = ?", (task_id,))
+                conn.execute(
+                    "INSERT INTO research_fts VALUES (?, ?, ?, ?)",
+                    (task_id, result.topic, result.summary, "\n".join(result.key_points)),
+                )
+
+    # -------------------------------------------------------
+    # Fetch one stored result
+    # -------------------------------------------------------
+    def get(self, task_id: str) -> Optional[ResearchResult]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT result_json FROM research_history WHERE task_id = ?",
+                (task_id,),
+            ).fetchone()
+        return ResearchResult.model_validate_json(row[0]) if row else None
+
+    # -------------------------------------------------------
+    # Closest recent result for a query (shingle similarity)
+    # -------------------------------------------------------
+    def find_similar(self, query: str, max_age_s: float, min_similarity: float) -> Optional[Dict[str, Any]]:
+        """
+        Returns {task_id, topic, similarity, created_at, result} for the
+        most similar result younger than `max_age_s`, or None.
+        """
+        query_shingles = shingles(query)
+        match = _fts_match(normalize_tokens(query), any_token=True)
+        if not match:
+            return None
+
+        with self._lock:
+            rows = self._connect().execute(
+                """
+                SELECT h.task_id, h.topic, h.shingles, h.result_json, h.created_at
+                FROM research_fts f
+                JOIN research_history h ON h.task_id = f.task_id
+                WHERE research_fts MATCH ? AND h.created_at >= ?
+                ORDER BY bm25(research_fts)
+                LIMIT 25
+                """,
+                (f"topic : ({match})", time.time() - max_age_s),
+            ).fetchall()
+
+        best = None
+        for task_id, topic, stored, result_json, created_at in rows:
+            score = jaccard(query_shingles, set(json.loads(stored)))
+            if score >= min_similarity and (best is None or score > best["similarity"]):
+                best = {
+                    "task_id": task_id,
+                    "topic": topic,
+                    "similarity": round(score, 3),
+                    "created_at": created_at,
+                    "result": ResearchResult.model_validate_json(result_json),
+                }
+        return best
+
+    # -------------------------------------------------------
+    # Full-text search over past research
+    # -------------------------------------------------------
+    def search(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        match = _fts_match(_TOKEN.findall(text.lower()), any_token=False)
+        if not match:
+            return []
+
+        with self._lock:
+            rows = self._connect().execute(
+                """
+                SELECT f.task_id, h.topic,
+                       snippet(research_fts, 2, '[', ']', '…', 16),
+                       h.created_at
+                FROM research_fts f
+                JOIN research_history h ON h.task_id = f.task_id
+                WHERE research_fts MATCH ?
+                ORDER BY bm25(research_fts)
+                LIMIT ?
+                """,
+                (match, limit),
+            ).fetchall()
+
+        return [
+            {"task_id": task_id, "topic": topic, "snippet": snippet, "created_at": created_at}
+            for task_id, topic, snippet, created_at in rows
+        ]
+
+
+def _fts_match(tokens: List[str], any_token: bool) -> str:
+    """Builds a safe FTS5 MATCH expression from plain tokens."""
+    quoted = [f'"{t}"*' if len(t) > 3 else f'"{t}"' for t in dict.fromkeys(tokens)]
+    return (" OR " if any_token else " ").join(quoted)
+
+
+# Global instance (import anywhere)
+history_store = HistoryStore(settings.HISTORY_DB_PATH)
@@ -1,3 +1,4 @@
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -13,6 +14,24 @@ class ResearchRequest(BaseModel):
         le=10,
         description="Maximum number of web search results to process."
     )
+    deadline_ms: Optional[int] = Field(
+        None,
+        ge=500,
+        le=600_000,
+        description="Optional overall time budget. The task completes with "
+                    "partial results instead of running past it."
+    )
+
+    mode: Literal["standard", "fast"] = Field(
+        "standard",
+        description="'fast' summarizes locally (extractive, no LLM) for "
+                    "sub-second answers."
+    )
+
+    allow_reuse: bool = Field(
+        True,
+        description="Allow answering from a recent result for a near-identical query."
+    )
 
     @field_validator("query")
     def validate_query(cls, v: str):
@@ -20,3 +39,15 @@ class ResearchRequest(BaseModel):
         if len(cleaned) < 3:
             raise ValueError("Query must be at least 3 characters long.")
         return cleaned
+
+
+class BulkStatusRequest(BaseModel):
+    """
+    Body of POST /research/status: many task ids in one call.
+    """
+
+    task_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    include_result: bool = Field(
+        True,
+        description="Include each completed task's full result."
+    )
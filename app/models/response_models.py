@@ -2,6 +2,22 @@ from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field
 
 
+class RefreshInfo(BaseModel):
+    """
+    What changed since the refreshed task (POST /research/{task_id}/refresh).
+    """
+    refreshed_from: str = Field(..., description="Task ID of the earlier result.")
+    added: list[str] = Field(default_factory=list, description="New source URLs.")
+    removed: list[str] = Field(default_factory=list, description="Sources no longer found.")
+    changed: list[str] = Field(default_factory=list, description="Sources whose content changed.")
+    unchanged: int = 0
+    change_ratio: float = Field(0.0, description="Share of all (old + new) sources that differ.")
+    resummarized: bool = Field(
+        ...,
+        description="False when the previous summary was kept (no material change)."
+    )
+
+
 class ResearchResult(BaseModel):
     """
     Final packaged output after the research pipeline completes.
@@ -13,6 +29,68 @@ class ResearchResult(BaseModel):
         default_factory=list,
         description="List of source URLs with optional titles/snippets."
     )
+    partial: bool = Field(
+        False,
+        description="True if steps were skipped or shortened to meet the deadline."
+    )
+    summarizer: str = Field(
+        "llm",
+        description="How the summary was produced: llm | extractive "
+                    "(fast mode, or LLMs unavailable) | lead (deadline fallback)."
+    )
+    refresh: Optional[RefreshInfo] = Field(
+        None,
+        description="Set on refreshed results: the diff against the earlier task."
+    )
+
+
+class SourceProgress(BaseModel):
+    """
+    Extraction status of one source while a task runs.
+    """
+    url: str
+    title: str = ""
+    status: str = Field(..., description="fetching | extracted | failed | cancelled | skipped")
+    elapsed_ms: Optional[float] = Field(None, description="Time spent on this source so far.")
+
+
+class PartialResults(BaseModel):
+    """
+    Intermediate artifacts published by the graph nodes as they appear.
+    """
+    search_results: list[Dict[str, str]] = Field(default_factory=list)
+    sources: list[SourceProgress] = Field(default_factory=list)
+    draft_summary: Optional[str] = Field(None, description="Summary text streamed so far.")
+
+
+class TaskUsage(BaseModel):
+    """
+    Resources a task used so far. Times are summed over concurrent
+    calls (io_wait_ms can exceed the task's wall-clock time).
+    """
+    search_calls: int = Field(0, description="Search requests made (cache misses).")
+    search_cache_hits: int = 0
+    pages_fetched: int = Field(0, description="Pages downloaded (HTTP 200).")
+    pages_not_modified: int = Field(0, description="Refresh re-checks answered 304.")
+    pages_failed: int = 0
+    pages_skipped: int = Field(0, description="Not fetched or abandoned (deadline).")
+    page_cache_hits: int = 0
+    summary_cache_hits: int = 0
+    bytes_downloaded: int = 0
+    retries: int = 0
+    llm_calls: int = 0
+    llm_providers: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Calls per provider: gemini | ollama | extractive."
+    )
+    prompt_chars: int = 0
+    response_chars: int = 0
+    prompt_tokens: int = Field(0, description="As reported by the provider (0 if not).")
+    response_tokens: int = 0
+    parse_cpu_ms: float = Field(0.0, description="CPU-bound parsing (HTML, readability, extractive summary).")
+    io_wait_ms: float = Field(0.0, description="Waiting on search / page HTTP calls.")
+    llm_queue_wait_ms: float = Field(0.0, description="Waiting for an LLM gateway slot.")
+    llm_ms: float = Field(0.0, description="Time inside LLM calls.")
 
 
 class ResearchStatus(BaseModel):
@@ -24,6 +102,14 @@ class ResearchStatus(BaseModel):
     task_id: str = Field(..., description="Unique ID of the research task.")
     status: str = Field(..., description="pending | running | completed | failed")
     progress: float = Field(..., description="Progress percentage from 0 to 100.")
+    stage: Optional[str] = Field(
+        None,
+        description="queued | planning | searching | extracting | summarizing | formatting | done"
+    )
+    partial_results: Optional[PartialResults] = Field(
+        None,
+        description="Artifacts available before the task completes."
+    )
     
     result: Optional[ResearchResult] = Field(
         None, 
@@ -34,3 +120,29 @@ class ResearchStatus(BaseModel):
         None, 
         description="Error message if the task failed."
     )
+
+    usage: Optional[TaskUsage] = Field(
+        None,
+        description="Resources used by the task so far."
+    )
+
+
+class TaskSummary(BaseModel):
+    """
+    One task in GET /research listings (no result body).
+    """
+    task_id: str
+    query: str
+    status: str = Field(..., description="pending | running | completed | failed")
+    progress: float
+    stage: Optional[str] = None
+    created_at: float = Field(..., description="Creation time (epoch seconds).")
+    error: Optional[str] = None
+
+
+class TaskPage(BaseModel):
+    """
+    A page of GET /research. Pass `next_cursor` as `cursor` for the next one.
+    """
+    tasks: list[TaskSummary] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="None on the last page.")
@@ -0,0 +1,130 @@
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import settings
+
+
+class TaskJournal:
+    """
+    Persistent SQLite record of pipeline tasks: the parameters needed to
+    resume a task plus its lifecycle status (running / completed / failed).
+    The graph state itself lives in the LangGraph checkpointer, keyed by
+    the same task_id.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = Lock()
+
+    # -------------------------------------------------------
+    # Lazy connection + schema
+    # -------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS task_journal (
+                    task_id     TEXT PRIMARY KEY,
+                    query       TEXT NOT NULL,
+                    max_results INTEGER NOT NULL,
+                    deadline_ms INTEGER,
+                    path        TEXT,
+                    status      TEXT NOT NULL,
+                    error       TEXT,
+                    attempts    INTEGER NOT NULL DEFAULT 1,
+                    created_at  REAL NOT NULL,
+                    updated_at  REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_journal_status
+                    ON task_journal (status);
+                """
+            )
+            # Journals created before the columns existed
+            for column in ("mode TEXT NOT NULL DEFAULT 'standard'", "source_task_id TEXT"):
+                try:
+                    conn.execute(f"ALTER TABLE task_journal ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    pass
+            self._conn = conn
+        return self._conn
+
+    # -------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------
+    def record_start(
+        self,
+        task_id: str,
+        query: str,
+        max_results: int,
+        deadline_ms: Optional[int],
+        mode: str = "standard",
+    ):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO task_journal
+                        (task_id, query, max_results, deadline_ms, mode, status, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, 'running', ?, ?)
+                    ON CONFLICT (task_id) DO UPDATE SET
+                        status = 'running', error = NULL,
+                        attempts = attempts + 1, updated_at = excluded.updated_at
+                    """,
+                    (task_id, query, max_results, deadline_ms, mode, now, now),
+                )
+
+    def set_path(self, task_id: str, path: str):
+        """The route is fixed once chosen, so a resume replays the same graph."""
+        self._update(task_id, path=path)
+
+    def set_source(self, task_id: str, source_task_id: str):
+        """The task a refresh re-runs, so a resume can reload its result."""
+        self._update(task_id, source_task_id=source_task_id)
+
+    def mark_completed(self, task_id: str):
+        self._update(task_id, status="completed")
+
+    def mark_failed(self, task_id: str, error: str):
+        self._update(task_id, status="failed", error=error)
+
+    def _update(self, task_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    f"UPDATE task_journal SET {assignments}, updated_at = ? WHERE task_id = ?",
+                    (*fields.values(), time.time(), task_id),
+                )
+
+    # -------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT * FROM task_journal WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def running(self) -> List[Dict[str, Any]]:
+        """Tasks still marked running (i.e. interrupted by a restart)."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT * FROM task_journal WHERE status = 'running' ORDER BY created_at"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+# Global instance (import anywhere)
+task_journal = TaskJournal(settings.TASK_JOURNAL_PATH)
@@ -1,30 +1,92 @@
-from typing import Dict, Any, Optional
+import logging
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from threading import Lock
-from .response_models import ResearchStatus, ResearchResult
+
+from app.config.settings import settings
+from app.utils.blob_store import BlobNotFound, blob_store
+from app.utils.usage import UsageMeter
+from .response_models import ResearchStatus, ResearchResult, PartialResults, SourceProgress, TaskSummary, TaskUsage
+
+logger = logging.getLogger("task_store")
 
 
 class TaskStore:
     """
     Simple thread-safe in-memory task store.
+    Only the newest `max_resident_results` results stay in memory; older
+    ones are spilled to the blob store and read back on demand.
+
+    get_status / set_result may touch the blob store (file I/O): async
+    callers run them in a worker thread.
+
+    Tasks are indexed by creation time, overall and per status (sorted
+    (created_at, task_id) lists), so listings are range scans instead
+    of full passes over every task.
     """
 
-    def __init__(self):
+    def __init__(self, max_resident_results: int = 256):
         self._tasks: Dict[str, Dict[str, Any]] = {}
         self._lock = Lock()
+        self._max_resident = max_resident_results
+        # task_ids whose result is held in memory, oldest first
+        self._resident: "OrderedDict[str, None]" = OrderedDict()
+        # Secondary indexes: (created_at, task_id), sorted
+        self._by_created: List[Tuple[float, str]] = []
+        self._by_status: Dict[str, List[Tuple[float, str]]] = {}
 
     # -------------------------------------------------------
     # Create a new task
     # -------------------------------------------------------
     def create_task(self, task_id: str, query: str):
         with self._lock:
+            previous = self._tasks.get(task_id)
+            if previous:
+                # Re-created (resume): keeps its place in the listing
+                created_at = previous["created_at"]
+                self._unindex_status(previous)
+            else:
+                created_at = time.time()
+                insort(self._by_created, (created_at, task_id))
+
             self._tasks[task_id] = {
                 "task_id": task_id,
+                "created_at": created_at,
                 "status": "pending",
                 "progress": 0.0,
                 "query": query,
                 "result": None,
                 "error": None,
+                "stage": "queued",
+                "search_results": [],
+                "sources": {},
+                "draft_summary": None,
+                "result_handle": None,
+                # Filled in by the tools while the task runs
+                "usage": UsageMeter(),
             }
+            self._index_status(self._tasks[task_id])
+
+    # -------------------------------------------------------
+    # Status index (callers hold the lock)
+    # -------------------------------------------------------
+    def _index_status(self, data: Dict[str, Any]):
+        insort(self._by_status.setdefault(data["status"], []), (data["created_at"], data["task_id"]))
+
+    def _unindex_status(self, data: Dict[str, Any]):
+        entries = self._by_status.get(data["status"], [])
+        key = (data["created_at"], data["task_id"])
+        i = bisect_left(entries, key)
+        if i < len(entries) and entries[i] == key:
+            del entries[i]
+
+    def _set_status(self, data: Dict[str, Any], status: str):
+        if data["status"] != status:
+            self._unindex_status(data)
+            data["status"] = status
+            self._index_status(data)
 
     # -------------------------------------------------------
     # Update task progress
@@ -33,7 +95,48 @@ class TaskStore:
         with self._lock:
             if task_id in self._tasks:
                 self._tasks[task_id]["progress"] = progress
-                self._tasks[task_id]["status"] = "running"
+                self._set_status(self._tasks[task_id], "running")
+
+    # -------------------------------------------------------
+    # Intermediate artifacts (published by graph nodes)
+    # -------------------------------------------------------
+    def set_stage(self, task_id: str, stage: str):
+        with self._lock:
+            if task_id in self._tasks:
+                self._tasks[task_id]["stage"] = stage
+
+    def publish_search_results(self, task_id: str, results: List[Dict[str, str]]):
+        with self._lock:
+            if task_id in self._tasks:
+                self._tasks[task_id]["search_results"] = list(results)
+
+    def update_source(self, task_id: str, url: str, status: str, title: Optional[str] = None):
+        """
+        Records the extraction status of one source. The elapsed time runs
+        from its first "fetching" update until it reaches a final status.
+        """
+        with self._lock:
+            if task_id not in self._tasks:
+                return
+
+            sources = self._tasks[task_id]["sources"]
+            entry = sources.setdefault(url, {"url": url, "title": "", "started": time.monotonic()})
+            entry["status"] = status
+            if title:
+                entry["title"] = title
+            if status != "fetching":
+                entry["elapsed_ms"] = round((time.monotonic() - entry["started"]) * 1000, 1)
+
+    def usage_meter(self, task_id: str) -> Optional[UsageMeter]:
+        with self._lock:
+            data = self._tasks.get(task_id)
+            usage = data["usage"] if data else None
+            return usage if isinstance(usage, UsageMeter) else None
+
+    def set_draft_summary(self, task_id: str, text: str):
+        with self._lock:
+            if task_id in self._tasks:
+                self._tasks[task_id]["draft_summary"] = text
 
     # -------------------------------------------------------
     # Mark completed
@@ -41,9 +144,75 @@ class TaskStore:
     def set_result(self, task_id: str, result: ResearchResult):
         with self._lock:
             if task_id in self._tasks:
-                self._tasks[task_id]["status"] = "completed"
+                self._set_status(self._tasks[task_id], "completed")
                 self._tasks[task_id]["progress"] = 100.0
+                self._tasks[task_id]["stage"] = "done"
                 self._tasks[task_id]["result"] = result
+                self._tasks[task_id]["result_handle"] = None
+                self._resident[task_id] = None
+                self._resident.move_to_end(task_id)
+
+        self._spill_results()
+
+    def _spill_results(self):
+        """Moves the oldest in-memory results beyond the limit to the blob store."""
+        while True:
+            with self._lock:
+                if len(self._resident) <= self._max_resident:
+                    return
+                victim_id, _ = self._resident.popitem(last=False)
+                victim = self._tasks.get(victim_id)
+                result = victim["result"] if victim else None
+            if result is None:
+                continue
+
+            try:
+                handle = blob_store.put(result.model_dump_json())
+            except OSError as e:
+                logger.warning(f"[{victim_id}] Could not spill result, keeping it in memory: {e}")
+                return
+
+            with self._lock:
+                # Skip if the result was replaced meanwhile
+                if victim_id in self._tasks and self._tasks[victim_id]["result"] is result:
+                    self._tasks[victim_id]["result"] = None
+                    self._tasks[victim_id]["result_handle"] = handle
+                    # Superseded by the result
+                    self._tasks[victim_id]["search_results"] = []
+                    self._tasks[victim_id]["sources"] = {}
+                    self._tasks[victim_id]["draft_summary"] = None
+                    # Final by now: keep the counts, not the meter
+                    usage = self._tasks[victim_id]["usage"]
+                    if isinstance(usage, UsageMeter):
+                        self._tasks[victim_id]["usage"] = TaskUsage(**usage.snapshot())
+
+    # -------------------------------------------------------
+    # Retention: finished tasks are forgotten after a while
+    # -------------------------------------------------------
+    def evict_finished(self, max_age_s: float) -> int:
+        """
+        Drops completed / failed tasks created more than `max_age_s`
+        ago (their spilled results are left to blob pruning). Returns
+        the count.
+        """
+        cutoff = time.time() - max_age_s
+        with self._lock:
+            victims = [
+                task_id
+                for status in ("completed", "failed")
+                for created_at, task_id in self._by_status.get(status, [])[
+                    :bisect_left(self._by_status.get(status, []), (cutoff, ""))
+                ]
+            ]
+            for task_id in victims:
+                data = self._tasks.pop(task_id)
+                self._unindex_status(data)
+                key = (data["created_at"], task_id)
+                i = bisect_left(self._by_created, key)
+                if i < len(self._by_created) and self._by_created[i] == key:
+                    del self._by_created[i]
+                self._resident.pop(task_id, None)
+        return len(victims)
 
     # -------------------------------------------------------
     # Mark failed
@@ -51,7 +220,7 @@ class TaskStore:
     def set_error(self, task_id: str, message: str):
         with self._lock:
             if task_id in self._tasks:
-                self._tasks[task_id]["status"] = "failed"
+                self._set_status(self._tasks[task_id], "failed")
                 self._tasks[task_id]["error"] = message
 
     # -------------------------------------------------------
@@ -62,14 +231,123 @@ class TaskStore:
             data = self._tasks.get(task_id)
             if not data:
                 return None
+            status, handle = self._status_of(data)
+
+        return self._load_spilled(status, handle)
+
+    def get_many(self, task_ids: List[str]) -> Iterator[Tuple[str, Optional[ResearchStatus]]]:
+        """
+        Statuses of many tasks, snapshotted under a single lock
+        acquisition. Yields (task_id, status or None if unknown); spilled
+        results are read back lazily, as the caller consumes them.
+        """
+        with self._lock:
+            snapshots = [
+                (task_id, self._status_of(self._tasks[task_id]) if task_id in self._tasks else None)
+                for task_id in task_ids
+            ]
+
+        for task_id, snapshot in snapshots:
+            yield task_id, self._load_spilled(*snapshot) if snapshot else None
+
+    def _status_of(self, data: Dict[str, Any]) -> Tuple[ResearchStatus, Optional[str]]:
+        status = ResearchStatus(
+            task_id=data["task_id"],
+            status=data["status"],
+            progress=data["progress"],
+            stage=data["stage"],
+            partial_results=self._partial_results(data),
+            result=data["result"],
+            error=data["error"],
+            usage=_usage_of(data),
+        )
+        return status, data["result_handle"]
+
+    @staticmethod
+    def _load_spilled(status: ResearchStatus, handle: Optional[str]) -> ResearchStatus:
+        # Spilled result: read back (outside the lock), not re-cached
+        if status.result is None and handle:
+            try:
+                status.result = ResearchResult.model_validate_json(blob_store.read_text(handle))
+            except BlobNotFound:
+                logger.warning(f"[{status.task_id}] Spilled result {handle} is gone")
+        return status
+
+    # -------------------------------------------------------
+    # Listing (uses the indexes)
+    # -------------------------------------------------------
+    def list_tasks(
+        self,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        after: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[TaskSummary], Optional[str]]:
+        """
+        Tasks in creation order, optionally only one status and/or those
+        created at or after `since` (epoch seconds). `after` is the
+        cursor: the last task_id of the previous page. Returns the page
+        and the next cursor (None on the last page).
+        """
+        with self._lock:
+            entries = self._by_created if status is None else self._by_status.get(status, [])
+
+            start = 0
+            if since is not None:
+                start = bisect_left(entries, (since, ""))
+            if after is not None:
+                anchor = self._tasks.get(after)
+                if anchor is None:
+                    raise KeyError(after)
+                start = max(start, bisect_right(entries, (anchor["created_at"], after)))
+
+            page = [
+                self._summary_of(self._tasks[task_id])
+                for _, task_id in entries[start:start + limit]
+            ]
+            more = start + limit < len(entries)
+
+        return page, (page[-1].task_id if more and page else None)
+
+    @staticmethod
+    def _summary_of(data: Dict[str, Any]) -> TaskSummary:
+        return TaskSummary(
+            task_id=data["task_id"],
+            query=data["query"],
+            status=data["status"],
+            progress=data["progress"],
+            stage=data["stage"],
+            created_at=data["created_at"],
+            error=data["error"],
+        )
 
-            return ResearchStatus(
-                task_id=data["task_id"],
-                status=data["status"],
-                progress=data["progress"],
-                result=data["result"],
-                error=data["error"],
+    @staticmethod
+    def _partial_results(data: Dict[str, Any]) -> Optional[PartialResults]:
+        if not (data["search_results"] or data["sources"] or data["draft_summary"]):
+            return None
+
+        now = time.monotonic()
+        sources = [
+            SourceProgress(
+                url=entry["url"],
+                title=entry["title"],
+                status=entry["status"],
+                elapsed_ms=entry.get("elapsed_ms", round((now - entry["started"]) * 1000, 1)),
             )
+            for entry in data["sources"].values()
+        ]
+        return PartialResults(
+            search_results=data["search_results"],
+            sources=sources,
+            draft_summary=data["draft_summary"],
+        )
+
+    # -------------------------------------------------------
+    # Number of tasks waiting or in progress (queue depth)
+    # -------------------------------------------------------
+    def count_active(self) -> int:
+        with self._lock:
+            return sum(len(self._by_status.get(s, [])) for s in ("pending", "running"))
 
     # -------------------------------------------------------
     # Task exists?
@@ -79,5 +357,10 @@ class TaskStore:
             return task_id in self._tasks
 
 
+def _usage_of(data: Dict[str, Any]) -> TaskUsage:
+    usage = data["usage"]
+    return usage if isinstance(usage, TaskUsage) else TaskUsage(**usage.snapshot())
+
+
 # Global instance (import anywhere)
-task_store = TaskStore()
+task_store = TaskStore(max_resident_results=settings.TASK_RESULTS_IN_MEMORY)
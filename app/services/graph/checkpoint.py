@@ -0,0 +1,68 @@
+"""
+Process-wide LangGraph checkpointer (SQLite).
+
+The graph state is saved after every node under thread_id = task_id,
+so a failed or interrupted task resumes from its last finished stage.
+Like the tools, the saver wraps a loop-bound connection and is created
+on first use inside the running event loop.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from app.config.settings import settings
+
+logger = logging.getLogger("checkpoint")
+
+_saver: Optional[Any] = None
+_conn: Optional[Any] = None
+_init_lock = asyncio.Lock()
+
+
+async def get_checkpointer():
+    """
+    Returns the shared AsyncSqliteSaver, or None when checkpointing
+    is disabled.
+    """
+    global _saver, _conn
+
+    if not settings.CHECKPOINT_ENABLED:
+        return None
+
+    async with _init_lock:
+        if _saver is None:
+            # Deferred: only needed once the first task runs
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+            Path(settings.CHECKPOINT_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+            _conn = await aiosqlite.connect(settings.CHECKPOINT_DB_PATH)
+            await _conn.execute("PRAGMA journal_mode=WAL")
+
+            saver = AsyncSqliteSaver(_conn)
+            await saver.setup()
+            _saver = saver
+            logger.info(f"Graph checkpoints stored in {settings.CHECKPOINT_DB_PATH}")
+
+    return _saver
+
+
+async def discard_checkpoints(task_id: str):
+    """Drops a finished task's checkpoints (they are only needed to resume)."""
+    if _saver is None:
+        return
+    try:
+        await _saver.adelete_thread(task_id)
+    except Exception as e:
+        logger.warning(f"[{task_id}] Could not delete checkpoints: {e}")
+
+
+async def close_checkpointer():
+    """Closes the SQLite connection (called at shutdown)."""
+    global _saver, _conn
+
+    if _conn is not None:
+        await _conn.close()
+    _saver, _conn = None, None
@@ -3,34 +3,75 @@ Graph Executor for the Research Pipeline
 Builds and runs a LangGraph StateGraph depending on the chosen path.
 """
 
-from typing import Dict, Any
-from langgraph.graph import StateGraph, START, END
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Dict, Any, Optional
 
 from app.services.graph.nodes import (
+    decompose_node,
     search_node,
     extract_content_node,
+    refresh_extract_node,
+    needs_summary,
     summarize_node,
     format_report_node,
 )
+from app.services.graph.state import ResearchState, ResearchContext
+from app.services.llm_gateway import PATH_PRIORITY, bind_caller
+from app.config.settings import settings
+from app.utils.deadline import deadline_from_ms
+from app.utils.tracing import tracer
+from app.utils.usage import UsageMeter, bind_usage
+
+logger = logging.getLogger("graph_executor")
+
+
+# ------------------------------------------------------------
+# NODE ADAPTER: hand tools + task_id from the runtime context
+# ------------------------------------------------------------
+def _bind(node):
+    """
+    Wraps a node(state, tools, task_id) so LangGraph can call it
+    with the per-run context, inside a trace span named after the node.
+    """
+    span_name = node.__name__.removesuffix("_node")
+
+    # LangGraph injects its Runtime by parameter name; runtime.context
+    # is the ResearchContext passed to ainvoke
+    async def run(state: ResearchState, runtime):
+        with tracer.span(span_name, kind="node"):
+            return await node(state, runtime.context["tools"], runtime.context["task_id"])
+
+    run.__name__ = node.__name__
+    return run
 
 
 # ------------------------------------------------------------
 # BUILD GRAPH BASED ON SIMPLE OR COMPLEX PATH
 # ------------------------------------------------------------
-def build_graph(path: str):
+@lru_cache(maxsize=None)
+def build_graph(path: str, checkpointer=None):
     """
-    Builds a StateGraph for either the simple or complex research path.
+    Builds a StateGraph for the simple, complex or refresh research path.
+    Compiled once per (path, checkpointer) and reused — compiled graphs
+    are stateless; per-task state lives in the checkpointer.
     """
+    # Deferred: langgraph is heavy and not needed to import the app
+    from langgraph.graph import StateGraph, START, END
 
-    graph = StateGraph(name=f"{path}_research_graph")
+    graph = StateGraph(ResearchState, context_schema=ResearchContext)
 
     # Register nodes (but wiring depends on path)
-    graph.add_node("search", search_node)
-    graph.add_node("summarize", summarize_node)
-    graph.add_node("format", format_report_node)
+    graph.add_node("search", _bind(search_node))
+    graph.add_node("summarize", _bind(summarize_node))
+    graph.add_node("format", _bind(format_report_node))
 
     if path == "complex":
-        graph.add_node("extract", extract_content_node)
+        graph.add_node("decompose", _bind(decompose_node))
+        graph.add_node("extract", _bind(extract_content_node))
+    elif path == "refresh":
+        graph.add_node("refresh_extract", _bind(refresh_extract_node))
 
     # -----------------------------
     # Simple path wiring
@@ -42,18 +83,31 @@ def build_graph(path: str):
         graph.add_edge("summarize", "format")
         graph.add_edge("format", END)
 
+    # -----------------------------
+    # Refresh path wiring (incremental re-run of an earlier task)
+    # START → search → refresh_extract → [summarize →] format → END
+    # summarize is skipped when the sources did not materially change
+    # -----------------------------
+    elif path == "refresh":
+        graph.add_edge(START, "search")
+        graph.add_edge("search", "refresh_extract")
+        graph.add_conditional_edges("refresh_extract", needs_summary, ["summarize", "format"])
+        graph.add_edge("summarize", "format")
+        graph.add_edge("format", END)
+
     # -----------------------------
     # Complex path wiring
-    # START → search → extract → summarize → format → END
+    # START → decompose → search → extract → summarize → format → END
     # -----------------------------
     else:
-        graph.add_edge(START, "search")
+        graph.add_edge(START, "decompose")
+        graph.add_edge("decompose", "search")
         graph.add_edge("search", "extract")
         graph.add_edge("extract", "summarize")
         graph.add_edge("summarize", "format")
         graph.add_edge("format", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer, name=f"{path}_research_graph")
 
 
 # ------------------------------------------------------------
@@ -65,34 +119,112 @@ async def execute_graph(
     max_results: int,
     path: str,
     tools: Dict[str, Any],
+    deadline_ms: Optional[int] = None,
+    checkpointer=None,
+    resume: bool = False,
+    priority: Optional[str] = None,
+    mode: str = "standard",
+    previous: Optional[Dict[str, Any]] = None,
+    usage: Optional[UsageMeter] = None,
 ) -> Dict[str, Any]:
     """
     Executes the graph for the given task asynchronously.
-    Returns the final state (summary, key_points, sources).
+    Returns the final state (summary, key_points, sources, partial).
+
+    With `deadline_ms`, every node shortens or skips work so the graph
+    finishes within the budget, marking the result as partial.
+
+    With a `checkpointer`, the state is saved after every node under
+    thread_id = task_id. `resume=True` continues from the last saved
+    node (with a fresh deadline) instead of starting over; a task with
+    no checkpoint yet simply runs from the start.
+
+    LLM calls are scheduled by the gateway at `priority` (default: by
+    path — simple is interactive, complex is bulk). mode="fast"
+    summarizes extractively without any LLM call.
+
+    path="refresh" re-runs an earlier result incrementally; `previous`
+    holds its summary, key_points, sources and summarizer.
+
+    Resources the tools use are counted on `usage` (a fresh meter if
+    None) and returned under "usage".
     """
 
     # Initial state passed into the graph
     initial_state = {
         "query": query,
         "max_results": max_results,
+        "deadline_at": deadline_from_ms(deadline_ms),
+        "partial": False,
+        "mode": mode,
+        "summarizer": "llm",
+        "sub_queries": [],
         "search_results": [],
-        "extracted_texts": [],
+        "alternate_results": [],
+        "extracted_handles": [],
         "summary": "",
         "key_points": [],
         "sources": [],
+        "previous": previous or {},
         "final": {},
     }
 
     # Build and compile the LangGraph workflow
-    graph = build_graph(path)
-
-    # Execute asynchronously
-    final_state = await graph.ainvoke(
-        initial_state,
-        config={"metadata": {"task_id": task_id}},
-        # context is passed to all nodes → tools + task_id
-        context={"tools": tools, "task_id": task_id},
-    )
-
-    # final_state contains everything from the pipeline
-    return final_state.get("final", {})
+    graph = build_graph(path, checkpointer)
+
+    config = {"metadata": {"task_id": task_id}}
+    if checkpointer is not None:
+        config["configurable"] = {"thread_id": task_id}
+
+    priority = priority or PATH_PRIORITY.get(path, "bulk")
+    usage = usage or UsageMeter()
+
+    # Root span of the task's trace (node tasks inherit it, like the LLM
+    # caller binding); a resume adds a second root to the same trace
+    try:
+        with tracer.span(
+            "execute_graph", trace_id=task_id, path=path, mode=mode,
+            priority=priority, resume=resume, max_results=max_results,
+        ) as span:
+            graph_input = initial_state
+            if resume and checkpointer is not None:
+                snapshot = await graph.aget_state(config)
+                if snapshot.values and not snapshot.next:
+                    # Finished before the interruption: nothing left to run
+                    span.event("already_finished")
+                    return snapshot.values.get("final", {})
+                if snapshot.next:
+                    # Continue from the last finished node; the old deadline has
+                    # long passed, so the remaining stages get a fresh budget
+                    span.event("resumed", next=list(snapshot.next))
+                    await graph.aupdate_state(config, {"deadline_at": initial_state["deadline_at"]})
+                    graph_input = None
+
+            # Execute asynchronously (node tasks inherit the LLM caller
+            # and usage bindings)
+            with bind_caller(task_id, priority), bind_usage(usage):
+                final_state = await graph.ainvoke(
+                    graph_input,
+                    config=config,
+                    # context is passed to all nodes → tools + task_id
+                    context={"tools": tools, "task_id": task_id},
+                    # persist each node's state before the next one starts
+                    durability="sync" if checkpointer is not None else None,
+                )
+
+            span.set(partial=final_state.get("partial", False), summarizer=final_state.get("summarizer"))
+
+        # final_state contains everything from the pipeline
+        return {**final_state.get("final", {}), "usage": usage.snapshot()}
+
+    finally:
+        if settings.TRACE_EXPORT_PATH:
+            await _export_trace(task_id)
+
+
+async def _export_trace(task_id: str):
+    """Best-effort: a task never fails because its trace could not be written."""
+    try:
+        await asyncio.to_thread(tracer.export, task_id, settings.TRACE_EXPORT_PATH)
+    except Exception as e:
+        logger.warning(f"[{task_id}] Could not export trace: {e}")
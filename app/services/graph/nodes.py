@@ -2,8 +2,59 @@
 Graph Nodes for the Research Pipeline
 """
 
-from typing import Dict, Any, List
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Tuple
+
+from app.config.settings import settings
 from app.models.task_store import task_store
+from app.utils.blob_store import BlobNotFound, blob_store
+from app.utils.deadline import DeadlineExceeded, has_time, time_left, within
+from app.utils.hedging import hedged
+from app.utils.query_decomposer import llm_split_query, split_query
+from app.utils.ranking import reciprocal_rank_fusion
+from app.utils.text_cleaner import split_sentences, truncate
+from app.utils.tracing import tracer
+from app.utils.usage import current_usage
+
+logger = logging.getLogger("graph_nodes")
+
+
+# ------------------------------------------------------------
+# NODE 0: Decompose (used only in complex path)
+# ------------------------------------------------------------
+async def decompose_node(state: Dict[str, Any], tools: Dict[str, Any], task_id: str):
+    """
+    Splits a broad question into focused sub-queries, searched
+    concurrently by the search node.
+    Updates:
+        - state["sub_queries"] ([query] when there is nothing to split)
+        - progress: 10%
+    """
+    task_store.set_stage(task_id, "planning")
+    query = state["query"]
+    deadline_at = state.get("deadline_at")
+    sub_queries = [query]
+
+    if settings.DECOMPOSE_MODE == "llm":
+        # Bounded by its own timeout as well as the task deadline
+        llm_deadline = time.time() + settings.DECOMPOSE_LLM_TIMEOUT_S
+        if deadline_at is not None:
+            llm_deadline = min(llm_deadline, deadline_at - settings.DEADLINE_SUMMARY_RESERVE_S)
+        try:
+            sub_queries = await within(llm_split_query(query), llm_deadline)
+        except Exception as e:
+            logger.info(f"[{task_id}] LLM decomposition unavailable, using rules: {e}")
+            tracer.annotate("fallback", to="rules", error=f"{type(e).__name__}: {e}"[:300])
+
+    if settings.DECOMPOSE_MODE != "off" and len(sub_queries) == 1:
+        sub_queries = split_query(query)
+
+    state["sub_queries"] = sub_queries
+    tracer.current().set(sub_queries=len(sub_queries))
+    task_store.update_progress(task_id, 10)
+    return state
 
 
 # ------------------------------------------------------------
@@ -11,18 +62,64 @@ from app.models.task_store import task_store
 # ------------------------------------------------------------
 async def search_node(state: Dict[str, Any], tools: Dict[str, Any], task_id: str):
     """
-    Performs a web search for the given query.
+    Performs a web search for the given query — or, after decomposition,
+    for all sub-queries concurrently, fused into one deduped ranking.
     Updates:
         - state["search_results"]
+        - state["alternate_results"] (spare results used to hedge slow fetches)
+        - published search results
         - task progress: 20%
     """
+    task_store.set_stage(task_id, "searching")
     query = state["query"]
     max_results = state["max_results"]
+    spare = settings.HEDGE_SPARE_RESULTS if settings.HEDGE_ENABLED else 0
 
     search_tool = tools["search"]
-    results = await search_tool.search(query, max_results)
+    sub_queries = state.get("sub_queries") or [query]
+
+    # Leave the summary its reserve, unless that leaves no time to search
+    # at all (without results there is nothing to summarize)
+    deadline_at = state.get("deadline_at")
+    reserve = settings.DEADLINE_SUMMARY_RESERVE_S
+    if not has_time(deadline_at, settings.DEADLINE_MIN_STEP_S, reserve=reserve):
+        reserve = 0.0
+
+    if len(sub_queries) == 1:
+        try:
+            results = await within(
+                search_tool.search(query, max_results + spare),
+                deadline_at,
+                reserve=reserve,
+            )
+        except DeadlineExceeded:
+            results = []
+            state["partial"] = True
+
+        state["search_results"] = results[:max_results]
+        state["alternate_results"] = results[max_results:]
+
+    else:
+        # One search round for all sub-queries, merged + deduped by URL
+        outcomes = await asyncio.gather(
+            *(within(search_tool.search(q, max_results), deadline_at, reserve=reserve) for q in sub_queries),
+            return_exceptions=True,
+        )
+        ranked = [r for r in outcomes if not isinstance(r, BaseException)]
+        errors = [e for e in outcomes if isinstance(e, BaseException)]
+
+        if any(isinstance(e, DeadlineExceeded) for e in errors):
+            state["partial"] = True
+        elif not ranked:
+            raise errors[0]
+
+        merged = reciprocal_rank_fusion(ranked)
+        fetch_count = min(max(settings.DECOMPOSE_FETCH_BUDGET, max_results), max_results * len(sub_queries))
 
-    state["search_results"] = results
+        state["search_results"] = merged[:fetch_count]
+        state["alternate_results"] = merged[fetch_count:fetch_count + spare]
+
+    task_store.publish_search_results(task_id, state["search_results"])
     task_store.update_progress(task_id, 20)
 
     return state
@@ -33,38 +130,227 @@ async def search_node(state: Dict[str, Any], tools: Dict[str, Any], task_id: str
 # ------------------------------------------------------------
 async def extract_content_node(state: Dict[str, Any], tools: Dict[str, Any], task_id: str):
     """
-    Fetches readable text from URLs.
+    Fetches readable text from URLs concurrently.
+    A fetch slower than the observed p95 is hedged with a spare search result.
+    Under a deadline, only pages extracted before the summary reserve are kept.
     Updates:
-        - state["extracted_texts"]
+        - state["extracted_handles"] (page texts go to the blob store)
         - state["sources"]
+        - per-source extraction status + timings (published)
         - progress: 45%
     """
+    task_store.set_stage(task_id, "extracting")
     extractor = tools["extract"]
-    search_results = state.get("search_results", [])
+    deadline_at = state.get("deadline_at")
+    reserve = settings.DEADLINE_SUMMARY_RESERVE_S
 
-    extracted_texts: List[str] = []
-    sources: List[Dict[str, str]] = []
+    search_results = [r for r in state.get("search_results", []) if r.get("url")]
+    alternates = [r for r in state.get("alternate_results", []) if r.get("url")]
 
-    for result in search_results:
-        url = result.get("url")
-        if not url:
-            continue
+    # Not enough time left to fetch anything → summarize snippets instead
+    if not has_time(deadline_at, settings.DEADLINE_MIN_STEP_S, reserve=reserve):
+        state["partial"] = True
+        for r in search_results:
+            task_store.update_source(task_id, r["url"], "skipped", title=r.get("title"))
+        current_usage().add(pages_skipped=len(search_results))
+        task_store.update_progress(task_id, 45)
+        return state
 
+    async def fetch(result: Dict[str, str]) -> Tuple[Dict[str, str], str]:
+        url = result["url"]
+        task_store.update_source(task_id, url, "fetching", title=result.get("title"))
         try:
             text = await extractor.extract(url)
-            extracted_texts.append(text)
-            sources.append({"url": url, "title": result.get("title")})
+        except asyncio.CancelledError:
+            task_store.update_source(task_id, url, "cancelled")
+            current_usage().add(pages_skipped=1)
+            raise
         except Exception:
-            # skip failed URLs gracefully
+            task_store.update_source(task_id, url, "failed")
+            current_usage().add(pages_failed=1)
+            raise
+
+        # Spill the page right away: only its handle stays in memory
+        handle = await asyncio.to_thread(blob_store.put, text)
+        task_store.update_source(task_id, url, "extracted")
+        return result, handle
+
+    async def fetch_alternate() -> Tuple[Dict[str, str], str]:
+        if not alternates:
+            raise LookupError("No spare search result left to hedge with.")
+        return await fetch(alternates.pop(0))
+
+    async def fetch_hedged(result: Dict[str, str]) -> Tuple[Dict[str, str], str]:
+        if not settings.HEDGE_ENABLED:
+            return await fetch(result)
+        return await hedged(
+            lambda: fetch(result),
+            fetch_alternate,
+            delay=extractor.hedge_delay(),
+        )
+
+    tasks = [asyncio.ensure_future(fetch_hedged(r)) for r in search_results]
+    done, pending = set(), set()
+    if tasks:
+        # Keep whatever is extracted by the time the summary reserve starts
+        done, pending = await asyncio.wait(tasks, timeout=time_left(deadline_at, reserve))
+
+    if pending:
+        state["partial"] = True
+        tracer.annotate("deadline_cut", unfinished=len(pending))
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    extracted_handles: List[str] = []
+    sources: List[Dict[str, str]] = []
+
+    for task in tasks:
+        if task not in done or task.exception() is not None:
+            # skip failed or unfinished URLs gracefully
             continue
 
-    state["extracted_texts"] = extracted_texts
+        result, handle = task.result()
+        extracted_handles.append(handle)
+        sources.append(_source_entry(result, handle, extractor))
+
+    state["extracted_handles"] = extracted_handles
     state["sources"] = sources
 
     task_store.update_progress(task_id, 45)
     return state
 
 
+# ------------------------------------------------------------
+# NODE 2b: Incremental extraction (refresh path only)
+# ------------------------------------------------------------
+async def refresh_extract_node(state: Dict[str, Any], tools: Dict[str, Any], task_id: str):
+    """
+    Diffs the new search results against the previous result's sources.
+    New URLs are extracted; known ones are re-validated (conditional GET
+    with the stored ETag / Last-Modified, else re-fetched) and compared
+    by content hash. Unchanged pages keep their stored text.
+    Updates:
+        - state["extracted_handles"] (all current pages, new and kept)
+        - state["sources"] (with fresh content hashes / validators)
+        - state["refresh"] (added / removed / changed URLs, resummarized)
+        - state["summary"], ["key_points"], ["summarizer"] (the previous
+          ones, when the sources did not materially change)
+        - progress: 45%
+    """
+    task_store.set_stage(task_id, "extracting")
+    extractor = tools["extract"]
+    deadline_at = state.get("deadline_at")
+    previous = state.get("previous") or {}
+    known = {s["url"]: s for s in previous.get("sources", []) if s.get("url")}
+
+    results = [r for r in state.get("search_results", []) if r.get("url")]
+
+    async def refetch(result: Dict[str, str]) -> Tuple[Dict[str, str], str, str]:
+        """Returns (result, handle, "added" | "changed" | "unchanged")."""
+        url = result["url"]
+        before = known.get(url)
+        old_handle = (before or {}).get("content_hash", "")
+        task_store.update_source(task_id, url, "fetching", title=result.get("title"))
+
+        try:
+            if before is None or not old_handle or await extractor.is_cached(url):
+                text = await extractor.extract(url)
+            else:
+                text = await extractor.revalidate(url, before.get("etag", ""), before.get("last_modified", ""))
+                if text is None and not await asyncio.to_thread(blob_store.exists, old_handle):
+                    # 304, but the stored copy was pruned: extract it again
+                    text = await extractor.extract(url)
+        except asyncio.CancelledError:
+            task_store.update_source(task_id, url, "cancelled")
+            current_usage().add(pages_skipped=1)
+            raise
+        except Exception:
+            task_store.update_source(task_id, url, "failed")
+            current_usage().add(pages_failed=1)
+            raise
+
+        if text is None:
+            # 304 Not Modified: the stored copy is still current
+            task_store.update_source(task_id, url, "extracted")
+            return result, old_handle, "unchanged"
+
+        handle = await asyncio.to_thread(blob_store.put, text)
+        task_store.update_source(task_id, url, "extracted")
+        if before is None:
+            return result, handle, "added"
+        return result, handle, "unchanged" if handle == old_handle else "changed"
+
+    tasks = [asyncio.ensure_future(refetch(r)) for r in results]
+    done, pending = set(), set()
+    if tasks:
+        done, pending = await asyncio.wait(tasks, timeout=time_left(deadline_at, settings.DEADLINE_SUMMARY_RESERVE_S))
+
+    if pending:
+        state["partial"] = True
+        tracer.annotate("deadline_cut", unfinished=len(pending))
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    handles: List[str] = []
+    sources: List[Dict[str, str]] = []
+    changes: Dict[str, List[str]] = {"added": [], "changed": [], "unchanged": []}
+
+    for result, task in zip(results, tasks):
+        if task in done and task.exception() is None:
+            result, handle, change = task.result()
+        else:
+            # Not re-checked (failed / out of time): keep what we had, if anything
+            before = known.get(result["url"])
+            handle = (before or {}).get("content_hash", "")
+            if not handle or not await asyncio.to_thread(blob_store.exists, handle):
+                continue
+            change = "unchanged"
+
+        handles.append(handle)
+        sources.append(_source_entry(result, handle, extractor))
+        changes[change].append(result["url"])
+
+    current = {s["url"] for s in sources}
+    changes["removed"] = [url for url in known if url not in current]
+
+    # Share of the (old + new) sources that differ
+    touched = len(changes["added"]) + len(changes["changed"]) + len(changes["removed"])
+    ratio = touched / max(1, len(current | set(known)))
+    resummarize = not previous.get("summary") or (touched > 0 and ratio >= settings.REFRESH_MATERIAL_CHANGE)
+
+    state["extracted_handles"] = handles
+    state["sources"] = sources
+    state["refresh"] = {
+        "refreshed_from": previous.get("task_id", ""),
+        "added": changes["added"],
+        "removed": changes["removed"],
+        "changed": changes["changed"],
+        "unchanged": len(changes["unchanged"]),
+        "change_ratio": round(ratio, 3),
+        "resummarized": resummarize,
+    }
+    tracer.current().set(
+        added=len(changes["added"]), removed=len(changes["removed"]),
+        changed=len(changes["changed"]), resummarized=resummarize,
+    )
+
+    if not resummarize:
+        # Nothing material changed: keep the previous summary
+        state["summary"] = previous.get("summary", "")
+        state["key_points"] = previous.get("key_points", [])
+        state["summarizer"] = previous.get("summarizer", "llm")
+
+    task_store.update_progress(task_id, 45)
+    return state
+
+
+def needs_summary(state: Dict[str, Any]) -> str:
+    """Refresh path: next node after refresh_extract."""
+    return "summarize" if (state.get("refresh") or {}).get("resummarized", True) else "format"
+
+
 # ------------------------------------------------------------
 # NODE 3: Summarization (used by both simple & complex paths)
 # ------------------------------------------------------------
@@ -73,16 +359,26 @@ async def summarize_node(state: Dict[str, Any], tools: Dict[str, Any], task_id:
     Summarizes either:
         - search result snippets (simple path)
         - extracted page text (complex path)
+    mode="fast" (and degraded mode: LLMs failing or saturated) uses the
+    extractive summarizer instead of an LLM.
+    Falls back to a lead-sentence summary when the deadline is too close.
     Updates:
         - state["summary"]
         - state["key_points"]
+        - state["summarizer"] (llm | extractive | lead)
+        - state["partial"] (only when the lead fallback was used)
+        - draft summary text while the LLM streams (published)
         - progress: 80%
     """
+    task_store.set_stage(task_id, "summarizing")
     summarizer = tools["summarize"]
 
-    if state.get("extracted_texts"):
-        # Complex path
-        combined_text = "\n\n".join(state["extracted_texts"])[:20000]
+    handles = state.get("extracted_handles") or []
+    if handles:
+        # Complex path (streamed from the blob store, reading only
+        # as much as the summarizer takes; every page gets an equal
+        # share, so all sub-queries reach the summary)
+        combined_text = await asyncio.to_thread(blob_store.read_joined, handles, "\n\n", 20000)
     else:
         # Simple path (fallback to snippets)
         snippets = [
@@ -91,10 +387,57 @@ async def summarize_node(state: Dict[str, Any], tools: Dict[str, Any], task_id:
         ]
         combined_text = "\n".join(snippets)[:5000]
 
-    summary, key_points = await summarizer.summarize(combined_text)
+    deadline_at = state.get("deadline_at")
+    summary, key_points = None, None
+    method = "llm"
+
+    # Extractive (no LLM): requested, or the LLMs are down / saturated
+    fast = tools.get("fast_summarize")
+    use_fast = fast is not None and state.get("mode") == "fast"
+    if fast is not None and not use_fast and settings.SUMMARY_DEGRADED_FALLBACK:
+        reason = getattr(summarizer, "degraded_reason", lambda: None)()
+        if reason:
+            logger.warning(f"[{task_id}] Degraded mode, summarizing extractively: {reason}")
+            tracer.annotate("fallback", to="extractive", reason=reason)
+            use_fast = True
+
+    if use_fast:
+        summary, key_points = await fast.summarize(combined_text)
+        method = "extractive"
+
+    elif has_time(deadline_at, settings.DEADLINE_MIN_STEP_S):
+        try:
+            summary, key_points = await within(
+                summarizer.summarize(
+                    combined_text,
+                    on_draft=lambda draft: task_store.set_draft_summary(task_id, draft),
+                ),
+                deadline_at,
+            )
+        except DeadlineExceeded:
+            pass
+        except Exception as e:
+            if fast is None or not settings.SUMMARY_DEGRADED_FALLBACK:
+                raise
+            logger.warning(f"[{task_id}] LLM summarization failed, summarizing extractively: {e}")
+            tracer.annotate("fallback", to="extractive", error=f"{type(e).__name__}: {e}"[:300])
+            summary, key_points = await fast.summarize(combined_text)
+            method = "extractive"
+
+    if summary is None:
+        # Out of time → cheap lead-sentence summary of what we have
+        if handles:
+            texts = await asyncio.to_thread(_read_leads, handles)
+        else:
+            texts = combined_text.split("\n")
+        summary, key_points = _lead_summary(texts)
+        state["partial"] = True
+        method = "lead"
+        tracer.annotate("fallback", to="lead", reason="deadline")
 
     state["summary"] = summary
     state["key_points"] = key_points
+    state["summarizer"] = method
 
     task_store.update_progress(task_id, 80)
     return state
@@ -110,11 +453,56 @@ async def format_report_node(state: Dict[str, Any], tools: Dict[str, Any], task_
         - state["final"]
         - progress: 100%
     """
+    task_store.set_stage(task_id, "formatting")
     state["final"] = {
         "summary": state.get("summary"),
         "key_points": state.get("key_points"),
         "sources": state.get("sources", []),
+        "partial": state.get("partial", False),
+        "summarizer": state.get("summarizer", "llm"),
+        "refresh": state.get("refresh"),
     }
 
     task_store.update_progress(task_id, 100)
     return state
+
+
+# ------------------------------------------------------------
+# HELPER: Source entry (content hash + HTTP validators for refreshes)
+# ------------------------------------------------------------
+def _source_entry(result: Dict[str, str], handle: str, extractor) -> Dict[str, str]:
+    entry = {"url": result["url"], "title": result.get("title") or "", "content_hash": handle}
+    validators = getattr(extractor, "validators", None)
+    if validators:
+        entry.update(validators(result["url"]))
+    return entry
+
+
+# ------------------------------------------------------------
+# HELPER: Beginning of each extracted page (enough for its leads)
+# ------------------------------------------------------------
+def _read_leads(handles: List[str], chars: int = 2000) -> List[str]:
+    texts = []
+    for handle in handles:
+        try:
+            texts.append(blob_store.read_text(handle, limit=chars))
+        except BlobNotFound:
+            continue
+    return texts
+
+
+# ------------------------------------------------------------
+# HELPER: Deadline fallback summary (no LLM)
+# ------------------------------------------------------------
+def _lead_summary(texts: List[str], max_points: int = 7) -> Tuple[str, List[str]]:
+    """
+    Builds a summary from the leading sentences of the gathered texts.
+    Used when the deadline leaves no time for the LLM.
+    """
+    leads = [split_sentences(t) for t in texts if t and t.strip()]
+
+    summary_sentences = [s for sentences in leads for s in sentences[:2]]
+    summary = truncate(" ".join(summary_sentences), 1200)
+
+    key_points = [sentences[0] for sentences in leads if sentences][:max_points]
+    return summary, key_points
@@ -3,43 +3,187 @@ Decides whether to route a research query through the simple
 or complex research pipeline.
 
 Simple Path  -> short, direct queries
-Complex Path -> long or research-heavy queries
+Complex Path -> research-heavy queries, or long queries when the
+                complex path is cheap right now (warm cache, low load)
+
+Every decision is recorded with its reasons for offline tuning.
 """
 
+import asyncio
+import json
+import logging
 import re
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+
+from app.config.settings import settings
+from app.models.task_store import task_store
+from app.utils.hedging import LatencyTracker
+
+logger = logging.getLogger("query_router")
 
 
-def choose_path(query: str) -> str:
+# Compiled once at import instead of rebuilt on every call
+_RESEARCH_KEYWORDS = re.compile(
+    r"\b(?:impact|future|analysis|deep dive|research|evaluate|global|"
+    r"comparison|effects|consequences|overview)"
+)
+_SHORT_QUESTION = re.compile(r"^(?:what|who|when|where|define)\b")
+
+
+class RouteDecision(BaseModel):
     """
-    Determine whether the query needs a simple or complex research flow.
+    A routing decision and the signals behind it.
+    """
+    query: str
+    path: str = Field(..., description="simple | complex")
+    preferred: str = Field(..., description="Path suggested by the query text alone.")
+    reasons: List[str] = Field(default_factory=list)
+    signals: Dict[str, Any] = Field(default_factory=dict)
+    timestamp: float = Field(default_factory=time.time)
 
-    Rules:
-    - If query is short (< 6 words), choose simple
-    - If query contains research-heavy keywords, choose complex
-    - Otherwise default to complex
+
+class QueryRouter:
+    """
+    Cost- and latency-aware router.
+
+    Signals:
+    - query shape (word count, research keywords, short question form)
+    - cache warmth of the search results and their extracted pages
+    - current queue depth (pending + running tasks)
+    - measured end-to-end latency per path
     """
 
-    cleaned = query.strip().lower()
-    word_count = len(cleaned.split())
+    def __init__(self, history: int = 500):
+        self._latency = {
+            "simple": LatencyTracker(default=settings.ROUTER_SIMPLE_DEFAULT_S),
+            "complex": LatencyTracker(default=settings.ROUTER_COMPLEX_DEFAULT_S),
+        }
+        self._decisions: deque = deque(maxlen=history)
+        self._log_lock = Lock()
+
+    # -------------------------------------------------------
+    # Route a query
+    # -------------------------------------------------------
+    async def route(self, query: str) -> RouteDecision:
+        cleaned = query.strip().lower()
+        word_count = len(cleaned.split())
+        has_keywords = bool(_RESEARCH_KEYWORDS.search(cleaned))
+
+        queue_depth = task_store.count_active()
+        warm_search, warm_pages = await self._cache_warmth(query)
+        complex_p50 = self._latency["complex"].percentile(50)
+
+        signals = {
+            "word_count": word_count,
+            "research_keywords": has_keywords,
+            "queue_depth": queue_depth,
+            "warm_search": warm_search,
+            "warm_page_ratio": round(warm_pages, 2),
+            "simple_p50_s": round(self._latency["simple"].percentile(50), 3),
+            "complex_p50_s": round(complex_p50, 3),
+        }
+        reasons: List[str] = []
+
+        # --- Text-only preference (the original heuristics) ---
+        if word_count <= 5:
+            preferred, strong = "simple", True
+            reasons.append("short query")
+        elif has_keywords:
+            preferred, strong = "complex", True
+            reasons.append("research keywords")
+        elif _SHORT_QUESTION.match(cleaned) and word_count <= 8:
+            preferred, strong = "simple", True
+            reasons.append("short direct question")
+        else:
+            preferred, strong = "complex", False
+            reasons.append("long query without research keywords")
 
-    # Rule 1: Short, direct queries → simple path
-    if word_count <= 5:
-        return "simple"
+        path = preferred
 
-    # Rule 2: Research-heavy keywords → complex path
-    research_keywords = [
-        "impact", "future", "analysis", "deep dive",
-        "research", "evaluate", "global", "comparison",
-        "effects", "consequences", "overview"
-    ]
+        # --- Cost adjustments (only ever downgrade complex → simple) ---
+        if preferred == "complex":
+            warm = warm_search and warm_pages >= settings.ROUTER_WARM_PAGE_RATIO
 
-    if any(kw in cleaned for kw in research_keywords):
-        return "complex"
+            if warm:
+                reasons.append("cache warm: complex path is cheap")
+            elif strong and queue_depth >= settings.ROUTER_QUEUE_HARD_LIMIT:
+                path = "simple"
+                reasons.append(f"queue depth {queue_depth} ≥ hard limit")
+            elif not strong:
+                if queue_depth >= settings.ROUTER_QUEUE_SOFT_LIMIT:
+                    path = "simple"
+                    reasons.append(f"queue depth {queue_depth} ≥ soft limit")
+                elif complex_p50 > settings.ROUTER_COMPLEX_BUDGET_S:
+                    path = "simple"
+                    reasons.append(f"complex p50 {complex_p50:.1f}s over budget")
 
-    # Rule 3: If question form is short → simple
-    if re.match(r"^(what|who|when|where|define)\b", cleaned):
-        if word_count <= 8:
-            return "simple"
+        decision = RouteDecision(
+            query=query,
+            path=path,
+            preferred=preferred,
+            reasons=reasons,
+            signals=signals,
+        )
+        self._record(decision)
+        return decision
 
-    # Default
-    return "complex"
+    # -------------------------------------------------------
+    # Feedback: measured end-to-end latency of a finished task
+    # -------------------------------------------------------
+    def record_latency(self, path: str, seconds: float):
+        if path in self._latency:
+            self._latency[path].observe(seconds)
+
+    def recent_decisions(self, limit: int = 50) -> List[RouteDecision]:
+        return list(self._decisions)[-limit:]
+
+    # -------------------------------------------------------
+    # INTERNAL
+    # -------------------------------------------------------
+    async def _cache_warmth(self, query: str) -> tuple[bool, float]:
+        """
+        Returns (search results cached?, fraction of their pages cached),
+        over every cached result of the query.
+        """
+        from app.tools.content_extractor_tool import ContentExtractorTool
+        from app.tools.web_search_tool import WebSearchTool
+
+        cached = await WebSearchTool.cached_results(query)
+        if not cached:
+            return False, 0.0
+
+        urls = [r["url"] for r in cached if r.get("url")]
+        if not urls:
+            return True, 0.0
+
+        warm = sum(await asyncio.gather(*(ContentExtractorTool.is_cached(u) for u in urls)))
+        return True, warm / len(urls)
+
+    def _record(self, decision: RouteDecision):
+        self._decisions.append(decision)
+        logger.info(f"Route → {decision.path} ({'; '.join(decision.reasons)})")
+
+        if not settings.ROUTER_DECISION_LOG:
+            return
+        try:
+            with self._log_lock, open(settings.ROUTER_DECISION_LOG, "a", encoding="utf-8") as f:
+                f.write(json.dumps(decision.model_dump(), ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write routing decision log: {e}")
+
+
+# Global instance (import anywhere)
+query_router = QueryRouter()
+
+
+async def choose_path(query: str) -> str:
+    """
+    Determine whether the query needs a simple or complex research flow.
+    Thin wrapper around the global QueryRouter.
+    """
+    return (await query_router.route(query)).path
@@ -0,0 +1,52 @@
+"""
+State and runtime context schemas for the research graph.
+"""
+
+from typing import Any, Dict, List, Optional, TypedDict
+
+
+class ResearchState(TypedDict, total=False):
+    """
+    Values carried between graph nodes.
+    Keys not declared here are dropped by LangGraph.
+    """
+    query: str
+    max_results: int
+
+    # Absolute wall-clock deadline (epoch seconds), None = unbounded
+    deadline_at: Optional[float]
+    # Set by any node that had to skip or shorten work
+    partial: bool
+
+    # "standard" (LLM summary) or "fast" (extractive, no LLM)
+    mode: str
+    # How the summary was produced: llm | extractive | lead
+    summarizer: str
+
+    # Complex path: [query, *focused sub-queries] searched concurrently
+    sub_queries: List[str]
+
+    search_results: List[Dict[str, str]]
+    alternate_results: List[Dict[str, str]]
+    # Blob store handles of the extracted page texts (the text itself
+    # is never held in state — see app/utils/blob_store.py)
+    extracted_handles: List[str]
+    summary: str
+    key_points: List[str]
+    sources: List[Dict[str, str]]
+
+    # Refresh path: the earlier result being refreshed (summary,
+    # key_points, sources, summarizer) and what changed since
+    # (added / removed / changed URLs, resummarized)
+    previous: Dict[str, Any]
+    refresh: Dict[str, Any]
+
+    final: Dict[str, Any]
+
+
+class ResearchContext(TypedDict):
+    """
+    Per-run context handed to every node (not part of the state).
+    """
+    tools: Dict[str, Any]
+    task_id: str
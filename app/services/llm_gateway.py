@@ -0,0 +1,412 @@
+"""
+In-process LLM gateway.
+
+Every summarization call takes a slot from here instead of calling its
+provider directly. Per provider there is:
+- a concurrency cap, with slots reserved for interactive work so bulk
+  complex-path and batch tasks can never take all of them;
+- priority queues (interactive < bulk < batch), aged so low-priority
+  work is delayed but never starved;
+- fair sharing: within a priority, waiting tasks are served round-robin;
+- optional micro-batching of small prompts (MicroBatcher), for
+  providers whose calls can carry several prompts at once.
+
+Queue wait and model time are tracked separately (GET /stats/llm).
+
+Usage:
+    async with llm_gateway.slot("gemini"):
+        ...call the model...
+
+The caller (task id + priority) comes from a context variable set once
+per graph run (bind_caller), so tools need no extra parameters.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.utils.hedging import LatencyTracker
+from app.utils.tracing import tracer
+from app.utils.usage import bind_usage, current_usage
+
+logger = logging.getLogger("llm_gateway")
+
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "bulk": 1, "batch": 2}
+
+# Graph path → priority of its LLM calls
+PATH_PRIORITY = {"simple": "interactive", "complex": "bulk", "refresh": "bulk"}
+
+# (task_id, priority name) of the code currently running
+_caller: ContextVar[Tuple[str, str]] = ContextVar("llm_caller", default=("-", "bulk"))
+
+
+@contextmanager
+def bind_caller(task_id: str, priority: str):
+    """Attributes every LLM call made inside the block to this task."""
+    token = _caller.set((task_id, priority if priority in PRIORITIES else "bulk"))
+    try:
+        yield
+    finally:
+        _caller.reset(token)
+
+
+def current_caller() -> Tuple[str, str]:
+    return _caller.get()
+
+
+class _Ticket:
+    __slots__ = ("task_id", "priority", "enqueued", "future")
+
+    def __init__(self, task_id: str, priority: int, future: asyncio.Future):
+        self.task_id = task_id
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.future = future
+
+
+class ProviderQueue:
+    """
+    Slots of one provider. Waiters are kept per priority, and per task
+    within a priority (an OrderedDict rotated round-robin).
+    """
+
+    def __init__(self, name: str, concurrency: int, reserved_interactive: int, aging_s: float):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        # Leave at least one slot usable by everyone
+        self.reserved = max(0, min(reserved_interactive, self.concurrency - 1))
+        self.aging_s = aging_s
+        self.in_flight = 0
+        self._waiting: Dict[int, "OrderedDict[str, Deque[_Ticket]]"] = {
+            level: OrderedDict() for level in PRIORITIES.values()
+        }
+
+        self.queue_wait = LatencyTracker(default=0.0, min_samples=1)
+        self.model_time = LatencyTracker(default=0.0, min_samples=1)
+        self.calls = 0
+        self.failures = 0
+        self.batches = 0
+        self.batched_items = 0
+
+    # -------------------------------------------------------
+    # Admission
+    # -------------------------------------------------------
+    def _limit_for(self, priority: int) -> int:
+        if priority == PRIORITIES["interactive"]:
+            return self.concurrency
+        return self.concurrency - self.reserved
+
+    def _queued(self) -> int:
+        return sum(len(t) for tasks in self._waiting.values() for t in tasks.values())
+
+    async def acquire(self, task_id: str, priority: int) -> float:
+        """Waits for a slot; returns the time spent queued (seconds)."""
+        started = time.monotonic()
+        if self._queued() == 0 and self.in_flight < self._limit_for(priority):
+            self.in_flight += 1
+            return 0.0
+
+        ticket = _Ticket(task_id, priority, asyncio.get_running_loop().create_future())
+        self._waiting[priority].setdefault(task_id, deque()).append(ticket)
+        # A reserved slot may be free even though others are queued
+        self._grant()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Granted just as we were cancelled: hand the slot on
+                self.release()
+            else:
+                self._remove(ticket)
+            raise
+
+        return time.monotonic() - started
+
+    def release(self):
+        self.in_flight -= 1
+        self._grant()
+
+    def _remove(self, ticket: _Ticket):
+        tasks = self._waiting[ticket.priority]
+        queue = tasks.get(ticket.task_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del tasks[ticket.task_id]
+
+    def _grant(self):
+        """Hands free slots to the best waiting tickets."""
+        while True:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+
+            tasks = self._waiting[ticket.priority]
+            queue = tasks.pop(ticket.task_id)
+            queue.popleft()
+            if queue:
+                # Round-robin: the task goes to the back of its priority
+                tasks[ticket.task_id] = queue
+
+            if not ticket.future.done():
+                self.in_flight += 1
+                ticket.future.set_result(None)
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        now = time.monotonic()
+        best, best_rank = None, None
+
+        for level, tasks in self._waiting.items():
+            if not tasks:
+                continue
+            head = next(iter(tasks.values()))[0]
+            if self.in_flight >= self._limit_for(level):
+                continue
+
+            # Aging: every aging_s of waiting promotes a ticket one level
+            rank = level - (now - head.enqueued) / self.aging_s if self.aging_s > 0 else level
+            if best_rank is None or rank < best_rank:
+                best, best_rank = head, rank
+
+        return best
+
+    def saturated(self, queue_ratio: float) -> bool:
+        """True when the backlog is `queue_ratio` times the slot count or more."""
+        return self._queued() >= self.concurrency * queue_ratio
+
+    def snapshot(self) -> Dict[str, Any]:
+        queued = {
+            name: sum(len(t) for t in self._waiting[level].values())
+            for name, level in PRIORITIES.items()
+        }
+        return {
+            "concurrency": self.concurrency,
+            "reserved_interactive": self.reserved,
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "calls": self.calls,
+            "failures": self.failures,
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "queue_wait_ms": _percentiles(self.queue_wait),
+            "model_time_ms": _percentiles(self.model_time),
+        }
+
+
+def _percentiles(tracker: LatencyTracker) -> Dict[str, float]:
+    return {
+        f"p{pct}": round(tracker.percentile(pct) * 1000, 1)
+        for pct in (50, 95, 99)
+    }
+
+
+# ============================================================
+#   Micro-batching
+# ============================================================
+
+class _BatchItem:
+    __slots__ = ("item", "future", "caller", "on_start", "submitted", "acquired", "finished")
+
+    def __init__(self, item: Any, future: asyncio.Future, on_start: Optional[Callable[[], None]]):
+        self.item = item
+        self.future = future
+        self.caller = current_caller()
+        self.on_start = on_start
+        self.submitted = time.monotonic()
+        self.acquired: Optional[float] = None
+        self.finished: Optional[float] = None
+
+
+class MicroBatcher:
+    """
+    Collects small prompts for up to `window_s` (or until `max_size`)
+    and runs them as one call through a single gateway slot.
+    `run_batch(items)` must return one result per item, in order.
+
+    The shared slot is charged to no task; instead every caller is
+    charged one call, its own wait (batch window + queue) as queue wait
+    and the batch's model time.
+    """
+
+    def __init__(
+        self,
+        gateway: "LLMGateway",
+        provider: str,
+        run_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_size: int,
+        window_s: float,
+    ):
+        self.gateway = gateway
+        self.provider = provider
+        self.run_batch = run_batch
+        self.max_size = max(1, max_size)
+        self.window_s = window_s
+        self._pending: List[_BatchItem] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Running batches (the loop only keeps weak references to tasks)
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any, on_start: Optional[Callable[[], None]] = None) -> Any:
+        """
+        Returns the item's result. `on_start` is called once the batch
+        holding the item got its slot (the model call starts).
+        """
+        loop = asyncio.get_running_loop()
+        entry = _BatchItem(item, loop.create_future(), on_start)
+        self._pending.append(entry)
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+
+        try:
+            return await entry.future
+        finally:
+            if entry.acquired is not None:
+                usage = current_usage()
+                finished = entry.finished or time.monotonic()
+                usage.add(
+                    llm_calls=1,
+                    llm_queue_wait_ms=(entry.acquired - entry.submitted) * 1000,
+                    llm_ms=(finished - entry.acquired) * 1000,
+                )
+                usage.provider(self.provider)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Callers that gave up meanwhile (e.g. lost a hedge) are dropped
+        batch = [entry for entry in self._pending if not entry.future.done()]
+        self._pending = []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[_BatchItem]):
+        # The batch runs at its most urgent member's priority
+        task_id, priority = min((entry.caller for entry in batch), key=lambda c: PRIORITIES[c[1]])
+
+        try:
+            # Shared call: each caller is charged for its own item (see
+            # submit), not the flushing task
+            with bind_caller(task_id, priority), bind_usage(None):
+                async with self.gateway.slot(self.provider, batch_size=len(batch)):
+                    acquired = time.monotonic()
+                    for entry in batch:
+                        entry.acquired = acquired
+                        if entry.on_start is not None:
+                            entry.on_start()
+                    try:
+                        results = await self.run_batch([entry.item for entry in batch])
+                    finally:
+                        finished = time.monotonic()
+                        for entry in batch:
+                            entry.finished = finished
+        except Exception as e:
+            for entry in batch:
+                if not entry.future.done():
+                    entry.future.set_exception(e)
+            return
+
+        for entry, result in zip(batch, results):
+            if not entry.future.done():
+                entry.future.set_result(result)
+
+
+# ============================================================
+#   Gateway
+# ============================================================
+
+class LLMGateway:
+    """
+    Registry of provider queues (created on first use from settings).
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, ProviderQueue] = {}
+        self._lock = Lock()
+
+    def provider(self, name: str) -> ProviderQueue:
+        with self._lock:
+            queue = self._providers.get(name)
+            if queue is None:
+                queue = ProviderQueue(
+                    name,
+                    concurrency=settings.LLM_CONCURRENCY.get(name, settings.LLM_DEFAULT_CONCURRENCY),
+                    reserved_interactive=settings.LLM_RESERVED_INTERACTIVE,
+                    aging_s=settings.LLM_PRIORITY_AGING_S,
+                )
+                self._providers[name] = queue
+            return queue
+
+    @asynccontextmanager
+    async def slot(self, provider: str, batch_size: int = 1):
+        """
+        Holds one of the provider's slots for the duration of the block,
+        recording queue wait and model time separately (per provider and
+        on the calling task's usage).
+        """
+        queue = self.provider(provider)
+        task_id, priority = current_caller()
+        usage = current_usage()
+
+        with tracer.span(f"llm {provider}", kind="llm", priority=priority, batch_size=batch_size) as span:
+            waited = await queue.acquire(task_id, PRIORITIES[priority])
+            queue.queue_wait.observe(waited)
+            span.set(queue_wait_ms=round(waited * 1000, 1))
+            usage.add(llm_calls=1, llm_queue_wait_ms=waited * 1000)
+            usage.provider(provider)
+            if waited > 1.0:
+                logger.info(f"[{task_id}] waited {waited:.2f}s for a {provider} slot ({priority})")
+
+            started = time.monotonic()
+            failed = False
+            try:
+                yield
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                queue.model_time.observe(time.monotonic() - started)
+                usage.add(llm_ms=(time.monotonic() - started) * 1000)
+                queue.calls += 1
+                queue.failures += failed
+                if batch_size > 1:
+                    queue.batches += 1
+                    queue.batched_items += batch_size
+                queue.release()
+
+    def batcher(
+        self,
+        provider: str,
+        run_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+    ) -> MicroBatcher:
+        return MicroBatcher(
+            self,
+            provider,
+            run_batch,
+            max_size=settings.LLM_BATCH_MAX_SIZE,
+            window_s=settings.LLM_BATCH_WINDOW_MS / 1000,
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = dict(self._providers)
+        return {name: queue.snapshot() for name, queue in providers.items()}
+
+
+# Global instance (import anywhere)
+llm_gateway = LLMGateway()
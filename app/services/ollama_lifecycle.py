@@ -0,0 +1,145 @@
+"""
+Ollama model lifecycle: warm-up, keep-alive and warmth probing.
+
+Loading llama3 takes seconds, and a cold model turned the first
+fallback summary after idle time into our worst latency outlier. At
+startup the model is preloaded (a generate call with an empty prompt),
+every request sends `keep_alive`, and a periodic probe of /api/ps
+re-warms the model if Ollama has unloaded it anyway.
+"""
+
+import asyncio
+import logging
+import time
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from app.config.settings import settings
+
+logger = logging.getLogger("ollama_lifecycle")
+
+
+class OllamaLifecycle:
+    """
+    Keeps the fallback model loaded and records its state for the
+    health endpoint. Thread-safe snapshot; the probe loop runs on the
+    app's event loop.
+    """
+
+    def __init__(self, base_url: str, model: str, keep_alive: str):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.keep_alive = keep_alive
+        self._lock = Lock()
+        self._state: Dict[str, Any] = {
+            "model": model,
+            "reachable": None,
+            "loaded": False,
+            "expires_at": None,
+            "last_probe_at": None,
+            "last_warmup_ms": None,
+            "warmups": 0,
+            "error": None,
+        }
+
+    def _set(self, **fields):
+        with self._lock:
+            self._state.update(fields)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._state)
+
+    # -------------------------------------------------------
+    # Warm-up: load the model (no tokens generated)
+    # -------------------------------------------------------
+    async def warm_up(self) -> bool:
+        import aiohttp
+
+        started = time.perf_counter()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{self.base_url}/api/generate",
+                    json={"model": self.model, "prompt": "", "keep_alive": self.keep_alive, "stream": False},
+                    timeout=aiohttp.ClientTimeout(total=settings.OLLAMA_WARMUP_TIMEOUT_S),
+                ) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"HTTP {resp.status}: {(await resp.text())[:200]}")
+                    await resp.read()
+
+        except Exception as e:
+            self._set(reachable=not _is_connection_error(e), loaded=False, error=f"warm-up failed: {e}")
+            logger.warning(f"Ollama warm-up for {self.model} failed: {e}")
+            return False
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        with self._lock:
+            self._state.update(reachable=True, loaded=True, last_warmup_ms=elapsed_ms, error=None)
+            self._state["warmups"] += 1
+        logger.info(f"Ollama model {self.model} warm ({elapsed_ms} ms)")
+        return True
+
+    # -------------------------------------------------------
+    # Probe: is the model still resident? (GET /api/ps)
+    # -------------------------------------------------------
+    async def probe(self) -> bool:
+        import aiohttp
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(
+                    f"{self.base_url}/api/ps",
+                    timeout=aiohttp.ClientTimeout(total=5),
+                ) as resp:
+                    resp.raise_for_status()
+                    data = await resp.json()
+
+        except Exception as e:
+            self._set(reachable=False, loaded=False, last_probe_at=time.time(), error=f"probe failed: {e}")
+            return False
+
+        running = _find_model(data.get("models") or [], self.model)
+        self._set(
+            reachable=True,
+            loaded=running is not None,
+            expires_at=running.get("expires_at") if running else None,
+            last_probe_at=time.time(),
+            error=None,
+        )
+        return running is not None
+
+    # -------------------------------------------------------
+    # Background loop (started from the FastAPI lifespan)
+    # -------------------------------------------------------
+    async def run(self):
+        """Warms the model, then probes it and re-warms it when cold."""
+        await self.warm_up()
+
+        while True:
+            await asyncio.sleep(settings.OLLAMA_PROBE_INTERVAL_S)
+            if not await self.probe() and self.snapshot()["reachable"]:
+                logger.info(f"Ollama unloaded {self.model}; re-warming")
+                await self.warm_up()
+
+
+def _find_model(models, name: str) -> Optional[Dict[str, Any]]:
+    """Matches "llama3" against "llama3:latest" etc."""
+    for entry in models:
+        model = entry.get("name") or entry.get("model") or ""
+        if model == name or model.split(":")[0] == name:
+            return entry
+    return None
+
+
+def _is_connection_error(exc: Exception) -> bool:
+    import aiohttp
+    return isinstance(exc, (aiohttp.ClientConnectionError, ConnectionError))
+
+
+# Global instance (import anywhere)
+ollama_lifecycle = OllamaLifecycle(
+    base_url=settings.OLLAMA_URL,
+    model=settings.OLLAMA_MODEL,
+    keep_alive=settings.OLLAMA_KEEP_ALIVE,
+)
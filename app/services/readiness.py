@@ -0,0 +1,156 @@
+"""
+Startup warm-up and readiness tracking.
+
+The app starts serving immediately; heavy modules, compiled graphs and
+provider clients are initialized in the background. GET /ready reports
+503 until that warm-up has finished.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from threading import Lock
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger("readiness")
+
+
+# Heavy modules imported off the event loop during warm-up
+_HEAVY_MODULES = (
+    "langgraph.graph",
+    "app.services.graph.executor",
+    "app.tools.web_search_tool",
+    "app.tools.content_extractor_tool",
+    "app.tools.summarizer_tool",
+    "app.tools.extractive_summarizer_tool",
+    "readability",
+)
+
+
+class Readiness:
+    """
+    Thread-safe record of warm-up steps and their durations.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._started_at = time.monotonic()
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        self._ready = False
+        self._ready_after_ms: float | None = None
+
+    def record(self, step: str, ok: bool, duration_ms: float, error: str | None = None):
+        with self._lock:
+            self._steps[step] = {"ok": ok, "ms": round(duration_ms, 1), "error": error}
+
+    def mark_ready(self):
+        with self._lock:
+            self._ready = True
+            self._ready_after_ms = round((time.monotonic() - self._started_at) * 1000, 1)
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self._ready
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self._ready,
+                "ready_after_ms": self._ready_after_ms,
+                "steps": dict(self._steps),
+            }
+
+
+# Global instance (import anywhere)
+readiness = Readiness()
+
+
+async def _step(name: str, fn: Callable, *, in_thread: bool = False):
+    """Runs one warm-up step, recording its duration and outcome."""
+    started = time.perf_counter()
+    try:
+        if in_thread:
+            await asyncio.to_thread(fn)
+        else:
+            result = fn()
+            if asyncio.iscoroutine(result):
+                await result
+        readiness.record(name, True, (time.perf_counter() - started) * 1000)
+    except Exception as e:
+        logger.warning(f"Warm-up step '{name}' failed: {e}")
+        readiness.record(name, False, (time.perf_counter() - started) * 1000, str(e))
+
+
+def _prune_blobs():
+    from app.config.settings import settings
+    from app.utils.blob_store import blob_store
+    removed = blob_store.prune(settings.BLOB_TTL_S)
+    if removed:
+        logger.info(f"Pruned {removed} expired blob(s)")
+
+
+def _prune_shared_cache():
+    from app.utils.shared_cache import shared_tier
+    removed = shared_tier.prune() if shared_tier else 0
+    if removed:
+        logger.info(f"Pruned {removed} expired shared cache entries")
+
+
+def _evict_tasks():
+    from app.config.settings import settings
+    from app.models.task_store import task_store
+    removed = task_store.evict_finished(settings.TASK_RETENTION_S)
+    if removed:
+        logger.info(f"Forgot {removed} finished task(s) past retention")
+
+
+async def housekeeping():
+    """
+    Background loop (started from the FastAPI lifespan): prunes expired
+    blobs and shared cache entries and evicts old finished tasks, so a
+    long-running process stays bounded.
+    """
+    from app.config.settings import settings
+
+    while True:
+        await asyncio.sleep(settings.HOUSEKEEPING_INTERVAL_S)
+        for step in (_prune_blobs, _prune_shared_cache, _evict_tasks):
+            try:
+                await asyncio.to_thread(step)
+            except Exception as e:
+                logger.warning(f"Housekeeping step {step.__name__} failed: {e}")
+
+
+async def warm_up():
+    """
+    Background warm-up run from the FastAPI lifespan.
+    Failed steps are recorded but do not block readiness: the
+    corresponding work simply happens lazily on the first task.
+    """
+
+    def import_heavy_modules():
+        for module in _HEAVY_MODULES:
+            importlib.import_module(module)
+
+    async def compile_graphs():
+        # Same cache key as at runtime: build_graph(path, checkpointer)
+        from app.services.graph.checkpoint import get_checkpointer
+        from app.services.graph.executor import build_graph
+        checkpointer = await get_checkpointer()
+        for path in ("simple", "complex", "refresh"):
+            await asyncio.to_thread(build_graph, path, checkpointer)
+
+    def init_tools():
+        from app.services.tool_registry import get_tools
+        get_tools()
+
+    await _step("imports", import_heavy_modules, in_thread=True)
+    await _step("graphs", compile_graphs)
+    await _step("tools", init_tools)
+    await _step("blobs", _prune_blobs, in_thread=True)
+    await _step("cache", _prune_shared_cache, in_thread=True)
+
+    readiness.mark_ready()
+    logger.info(f"Warm-up complete: {readiness.snapshot()}")
@@ -1,58 +1,204 @@
+import asyncio
 import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.config.settings import settings
 from app.models.task_store import task_store
-from app.models.response_models import ResearchResult
+from app.models.history_store import history_store
+from app.models.task_journal import task_journal
+from app.models.response_models import ResearchResult, RefreshInfo
 
-from app.services.graph.router import choose_path
+from app.services.graph.router import query_router
 from app.services.graph.executor import execute_graph
-
-from app.tools.web_search_tool import WebSearchTool
-from app.tools.content_extractor_tool import ContentExtractorTool
-from app.tools.summarizer_tool import SummarizerTool
+from app.services.graph.checkpoint import get_checkpointer, discard_checkpoints
+from app.services.tool_registry import get_tools
+from app.utils.usage import usage_stats
 
 logger = logging.getLogger("research_service")
 
+# Tasks resumed at startup (the loop only keeps weak references to tasks)
+_resumed_tasks: set = set()
+
 
 # --------------------------------------------------------------
 # MAIN PIPELINE ENTRYPOINT — called from FastAPI background task
 # --------------------------------------------------------------
-async def start_research_pipeline(task_id: str, query: str, max_results: int):
+async def start_research_pipeline(
+    task_id: str,
+    query: str,
+    max_results: int,
+    deadline_ms: Optional[int] = None,
+    mode: str = "standard",
+):
     """
     Background task that executes the entire research pipeline.
     This is triggered by POST /research.
     """
 
     logger.info(f"[{task_id}] Starting research pipeline for query: {query}")
+    await _journal(task_journal.record_start, task_id, query, max_results, deadline_ms, mode)
+    await _run_pipeline(task_id, query, max_results, deadline_ms, mode=mode)
+
+
+# --------------------------------------------------------------
+# REFRESH — POST /research/{task_id}/refresh
+# --------------------------------------------------------------
+async def start_refresh_pipeline(
+    task_id: str,
+    source_task_id: str,
+    max_results: int,
+    previous: ResearchResult,
+):
+    """
+    Re-runs an earlier task incrementally as a new task: search again,
+    extract only new or changed pages, re-summarize only on material
+    change (the "refresh" graph path).
+    """
+
+    logger.info(f"[{task_id}] Refreshing research from task {source_task_id}")
+    await _journal(task_journal.record_start, task_id, previous.topic, max_results, None)
+    await _journal(task_journal.set_path, task_id, "refresh")
+    await _journal(task_journal.set_source, task_id, source_task_id)
+    await _run_pipeline(
+        task_id,
+        previous.topic,
+        max_results,
+        None,
+        path="refresh",
+        previous=_previous_state(source_task_id, previous),
+    )
+
+
+def _previous_state(source_task_id: str, previous: ResearchResult) -> Dict[str, Any]:
+    """What the refresh path compares against (state["previous"])."""
+    return {
+        "task_id": source_task_id,
+        "summary": previous.summary,
+        "key_points": previous.key_points,
+        "sources": previous.sources,
+        "summarizer": previous.summarizer,
+    }
+
+
+async def _load_result(task_id: str) -> Optional[ResearchResult]:
+    """A finished task's result: from the task store, else from history."""
+    status = await asyncio.to_thread(task_store.get_status, task_id)
+    result = status.result if status else None
+    if result is None and settings.HISTORY_ENABLED:
+        result = await asyncio.to_thread(history_store.get, task_id)
+    return result
+
+
+# --------------------------------------------------------------
+# RESUME — POST /research/{task_id}/resume and startup recovery
+# --------------------------------------------------------------
+async def resume_research_pipeline(task_id: str, entry: Dict[str, Any]):
+    """
+    Continues a failed or interrupted task from its last checkpoint.
+    `entry` is the task's journal row (query, max_results, path, ...).
+    """
+
+    logger.info(f"[{task_id}] Resuming research pipeline from its last checkpoint")
+    mode = entry.get("mode") or "standard"
+
+    # A refresh without a checkpoint starts over: it needs the result it
+    # refreshes again (only its id is journaled)
+    previous = None
+    source_task_id = entry.get("source_task_id")
+    if entry.get("path") == "refresh" and source_task_id:
+        result = await _load_result(source_task_id)
+        if result is not None:
+            previous = _previous_state(source_task_id, result)
+        else:
+            logger.warning(f"[{task_id}] Result of refreshed task {source_task_id} is gone")
+
+    await _journal(task_journal.record_start, task_id, entry["query"], entry["max_results"], entry["deadline_ms"], mode)
+    await _run_pipeline(
+        task_id,
+        entry["query"],
+        entry["max_results"],
+        entry["deadline_ms"],
+        mode=mode,
+        path=entry["path"],
+        resume=True,
+        previous=previous,
+    )
+
+
+async def resume_interrupted_tasks():
+    """
+    Re-queues every task the journal still lists as running — i.e. those
+    cut off by a restart. Called once from the FastAPI lifespan.
+    """
+    try:
+        entries = await asyncio.to_thread(task_journal.running)
+    except Exception as e:
+        logger.warning(f"Could not read the task journal: {e}")
+        return
+
+    for entry in entries:
+        task_store.create_task(entry["task_id"], query=entry["query"])
+        task = asyncio.create_task(resume_research_pipeline(entry["task_id"], entry))
+        _resumed_tasks.add(task)
+        task.add_done_callback(_resumed_tasks.discard)
+
+    if entries:
+        logger.info(f"Resuming {len(entries)} interrupted task(s)")
+
+
+async def _run_pipeline(
+    task_id: str,
+    query: str,
+    max_results: int,
+    deadline_ms: Optional[int],
+    mode: str = "standard",
+    path: Optional[str] = None,
+    resume: bool = False,
+    previous: Optional[Dict[str, Any]] = None,
+):
     task_store.update_progress(task_id, 5)
+    usage = task_store.usage_meter(task_id)
+    path_type = path
 
     try:
         # ----------------------------------------------------------
         # 1. Determine whether this is a simple or complex query
+        #    (a resumed task keeps the path its checkpoints belong to)
         # ----------------------------------------------------------
-        path_type = choose_path(query)
-        logger.info(f"[{task_id}] Routing to pipeline: {path_type}")
+        if path_type is None:
+            decision = await query_router.route(query)
+            path_type = decision.path
+            logger.info(f"[{task_id}] Routing to pipeline: {path_type} ({'; '.join(decision.reasons)})")
+            await _journal(task_journal.set_path, task_id, path_type)
 
         # ----------------------------------------------------------
-        # 2. Initialize tools (can share across nodes)
+        # 2. Shared tools (created once per process, reused by tasks)
         # ----------------------------------------------------------
-        web_search = WebSearchTool()
-        extractor = ContentExtractorTool()
-        summarizer = SummarizerTool()
+        tools = get_tools()
+        checkpointer = await get_checkpointer()
 
         # ----------------------------------------------------------
         # 3. Execute graph (LangGraph-style orchestration)
         # ----------------------------------------------------------
+        started = time.perf_counter()
         result_payload = await execute_graph(
             task_id=task_id,
             query=query,
             max_results=max_results,
             path=path_type,
-            tools={
-                "search": web_search,
-                "extract": extractor,
-                "summarize": summarizer,
-            }
+            deadline_ms=deadline_ms,
+            tools=tools,
+            checkpointer=checkpointer,
+            resume=resume,
+            mode=mode,
+            previous=previous,
+            usage=usage,
         )
 
+        if not resume:
+            query_router.record_latency(path_type, time.perf_counter() - started)
+
         # ----------------------------------------------------------
         # 4. Format final result
         # ----------------------------------------------------------
@@ -60,23 +206,52 @@ async def start_research_pipeline(task_id: str, query: str, max_results: int):
             topic=query,
             summary=result_payload["summary"],
             key_points=result_payload["key_points"],
-            sources=result_payload["sources"]
+            sources=result_payload["sources"],
+            partial=result_payload.get("partial", False),
+            summarizer=result_payload.get("summarizer", "llm"),
+            refresh=RefreshInfo(**result_payload["refresh"]) if result_payload.get("refresh") else None,
         )
 
-        task_store.set_result(task_id, final_result)
+        # May spill older results to the blob store (file I/O)
+        await asyncio.to_thread(task_store.set_result, task_id, final_result)
+        _record_usage(path_type, usage)
+        await _journal(task_journal.mark_completed, task_id)
+        await discard_checkpoints(task_id)
         logger.info(f"[{task_id}] Research pipeline completed successfully.")
 
+        # Persist complete results so they survive restarts and can be reused
+        # (extractive summaries are not worth reusing for later queries)
+        if settings.HISTORY_ENABLED and not final_result.partial and final_result.summarizer == "llm":
+            try:
+                await asyncio.to_thread(history_store.save, task_id, final_result)
+            except Exception as e:
+                logger.warning(f"[{task_id}] Could not save result to history: {e}")
+
+    except asyncio.CancelledError:
+        # Shutdown: stays "running" in the journal, resumed on next start
+        logger.info(f"[{task_id}] Research task interrupted; it can be resumed")
+        raise
+
     except Exception as e:
         # ----------------------------------------------------------
         # Handle any pipeline error gracefully
+        # (checkpoints are kept: POST /research/{task_id}/resume)
         # ----------------------------------------------------------
         logger.exception(f"[{task_id}] Research task failed due to error: {e}")
         task_store.set_error(task_id, str(e))
+        _record_usage(path_type, usage)
+        await _journal(task_journal.mark_failed, task_id, str(e))
 
-    finally:
-        # Close tool sessions (aiohttp clients)
-        try:
-            await web_search.close()
-            await extractor.close()
-        except Exception:
-            pass
+
+def _record_usage(path: Optional[str], usage):
+    """Adds a finished task's usage to the per-path totals (GET /stats/usage)."""
+    if path and usage is not None:
+        usage_stats.record(path, usage.snapshot())
+
+
+async def _journal(fn, *args):
+    """Journal writes are best-effort: a task never fails because of them."""
+    try:
+        await asyncio.to_thread(fn, *args)
+    except Exception as e:
+        logger.warning(f"Task journal update failed: {e}")
@@ -0,0 +1,59 @@
+"""
+Shared tool instances for the research pipeline.
+
+Tools are created once per process, on first use inside the running
+event loop (aiohttp sessions are loop-bound), and reused by every task.
+The tool modules themselves are imported lazily so importing the app
+stays cheap.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("tool_registry")
+
+_tools: Optional[Dict[str, Any]] = None
+
+
+def get_tools() -> Dict[str, Any]:
+    """
+    Returns the shared {"search", "extract", "summarize", "fast_summarize"} tools,
+    creating them on the first call. Must be called inside the event loop.
+    """
+    global _tools
+
+    if _tools is None:
+        from app.tools.web_search_tool import WebSearchTool
+        from app.tools.content_extractor_tool import ContentExtractorTool
+        from app.tools.summarizer_tool import SummarizerTool
+        from app.tools.extractive_summarizer_tool import ExtractiveSummarizerTool
+
+        _tools = {
+            "search": WebSearchTool(),
+            "extract": ContentExtractorTool(),
+            "summarize": SummarizerTool(),
+            # LLM-free: mode="fast" and degraded-mode fallback
+            "fast_summarize": ExtractiveSummarizerTool(),
+        }
+        logger.info("Shared research tools initialized")
+
+    return _tools
+
+
+async def close_tools():
+    """Closes the tools' HTTP sessions (called at shutdown)."""
+    global _tools
+
+    if _tools is None:
+        return
+
+    for name, tool in _tools.items():
+        close = getattr(tool, "close", None)
+        if close is None:
+            continue
+        try:
+            await close()
+        except Exception as e:
+            logger.error(f"Error closing tool '{name}': {e}")
+
+    _tools = None
@@ -1,13 +1,44 @@
+import asyncio
 import aiohttp
 import re
-from readability import Document
-from typing import Optional
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import time
+from typing import Dict, Optional, Tuple
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from app.config.settings import settings
+from app.utils.cache import TTLCache
+from app.utils.hedging import LatencyTracker
+from app.utils.outbound import outbound, retryable
+from app.utils.shared_cache import TwoLevelCache
+from app.utils.tracing import annotate_retry, http_trace_config, tracer
+from app.utils.usage import current_usage
 
 
 class ContentExtractorError(Exception):
     """Raised when content extraction fails."""
-    pass
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = True):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+# Observed page fetch latencies (shared by all extractor instances)
+_fetch_latency = LatencyTracker(default=settings.HEDGE_FETCH_DEFAULT_DELAY_S)
+
+# Recently extracted page text by URL (shared by all extractor instances
+# and, through the shared tier, by all workers)
+_page_cache = TwoLevelCache(
+    "page",
+    max_entries=settings.PAGE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PAGE_CACHE_TTL_S,
+)
+
+# HTTP cache validators (ETag / Last-Modified) of recently fetched pages
+_validators = TTLCache(
+    max_entries=settings.PAGE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PAGE_CACHE_TTL_S,
+)
 
 
 class ContentExtractorTool:
@@ -17,43 +48,125 @@ class ContentExtractorTool:
     """
 
     def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = aiohttp.ClientSession()
+        self.session: Optional[aiohttp.ClientSession] = aiohttp.ClientSession(trace_configs=[http_trace_config()])
 
     async def close(self):
         """Close aiohttp session."""
         if self.session:
             await self.session.close()
 
+    @staticmethod
+    def hedge_delay() -> float:
+        """Delay after which a slow fetch should be hedged (observed p95)."""
+        return _fetch_latency.percentile(settings.HEDGE_PERCENTILE)
+
+    @staticmethod
+    async def is_cached(url: str) -> bool:
+        """True if the extracted text for this URL is still warm."""
+        return await _page_cache.contains(url)
+
+    @staticmethod
+    def validators(url: str) -> Dict[str, str]:
+        """ETag / Last-Modified the page was last served with (if any)."""
+        return _validators.get(url) or {}
+
     # -----------------------------------------------------------------
     # PUBLIC METHOD: Extract content from a URL
     # -----------------------------------------------------------------
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=6),
-        retry=retry_if_exception_type((aiohttp.ClientError, ContentExtractorError)),
+        retry=retryable(aiohttp.ClientError, ContentExtractorError),
+        before_sleep=annotate_retry,
     )
     async def extract(self, url: str) -> str:
         """
         Fetch the URL and return cleaned readable text.
         """
-        html = await self._fetch_html(url)
-        text = self._extract_readable_text(html)
-        return text
+        with tracer.span("extract", url=url) as span:
+            # Concurrent misses for the same page fetch it once
+            text, cached = await _page_cache.get_or_compute(url, lambda: self._fetch_and_extract(url))
+            span.set(cached=cached, chars=len(text))
+            if cached:
+                current_usage().add(page_cache_hits=1)
+            return text
+
+    # -----------------------------------------------------------------
+    # PUBLIC METHOD: Re-fetch a page only if it changed
+    # -----------------------------------------------------------------
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=6),
+        retry=retryable(aiohttp.ClientError, ContentExtractorError),
+        before_sleep=annotate_retry,
+    )
+    async def revalidate(self, url: str, etag: str = "", last_modified: str = "") -> Optional[str]:
+        """
+        Conditional re-fetch (If-None-Match / If-Modified-Since).
+        Returns None when the server answers 304 Not Modified, else the
+        freshly extracted text. Without validators it is a plain fetch
+        (the caller compares content hashes).
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        with tracer.span("revalidate", url=url, conditional=bool(headers)) as span:
+            text = await self._fetch_and_extract(url, headers)
+            span.set(not_modified=text is None)
+            if text is not None:
+                await _page_cache.set(url, text)
+            return text
+
+    async def _fetch_and_extract(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[str]:
+        started = time.perf_counter()
+        html, validators = await self._fetch_html(url, headers)
+        _fetch_latency.observe(time.perf_counter() - started)
+
+        if validators:
+            _validators.set(url, validators)
+        if html is None:
+            return None
+
+        with tracer.span("readability", html_chars=len(html)), current_usage().timed("parse_cpu_ms"):
+            return self._extract_readable_text(html)
 
     # -----------------------------------------------------------------
     # INTERNAL: Fetch raw HTML
     # -----------------------------------------------------------------
-    async def _fetch_html(self, url: str) -> str:
-        try:
-            async with self.session.get(url, timeout=20) as resp:
-                if resp.status != 200:
-                    raise ContentExtractorError(
-                        f"Failed to fetch {url}: status {resp.status}"
-                    )
-                return await resp.text()
+    async def _fetch_html(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        Returns (html, validators); html is None on 304 Not Modified
+        (only possible with conditional headers).
+        """
+        usage = current_usage()
+        # Breaker / concurrency limit / outcome tracking for this host
+        with tracer.span("http fetch", kind="client"), usage.timed("io_wait_ms"):
+            async with outbound.guard(url):
+                try:
+                    async with self.session.get(url, headers=headers, timeout=20) as resp:
+                        validators = {
+                            key: resp.headers[header]
+                            for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                            if resp.headers.get(header)
+                        }
+                        if resp.status == 304 and headers:
+                            usage.add(pages_not_modified=1)
+                            return None, validators
+                        if resp.status != 200:
+                            raise ContentExtractorError(
+                                f"Failed to fetch {url}: status {resp.status}",
+                                status=resp.status,
+                            )
+                        usage.add(pages_fetched=1, bytes_downloaded=len(await resp.read()))
+                        return await resp.text(), validators
 
-        except aiohttp.ClientError as e:
-            raise ContentExtractorError(f"Network error while fetching {url}: {e}")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    raise ContentExtractorError(f"Network error while fetching {url}: {e}") from e
 
     # -----------------------------------------------------------------
     # INTERNAL: Extract readable content using Readability
@@ -62,11 +175,15 @@ class ContentExtractorTool:
         """
         Converts HTML → readable content → clean plaintext.
         """
+        # Deferred: readability/lxml are only needed once a page is fetched
+        from readability import Document
+
         try:
             doc = Document(html)
             content_html = doc.summary()
         except Exception:
-            raise ContentExtractorError("Failed to extract readable content.")
+            # Parsing is deterministic: re-fetching will not help
+            raise ContentExtractorError("Failed to extract readable content.", retryable=False)
 
         # Strip HTML tags
         text = re.sub(r"<[^>]+>", "", content_html)
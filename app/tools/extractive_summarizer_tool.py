@@ -0,0 +1,138 @@
+import asyncio
+from typing import List, Tuple
+
+import numpy as np
+
+from app.models.history_store import normalize_tokens
+from app.utils.text_cleaner import split_sentences, truncate
+from app.utils.tracing import tracer
+from app.utils.usage import current_usage
+
+
+# Sentences outside this length (in words) are rarely useful summary material
+_MIN_WORDS, _MAX_WORDS = 5, 60
+# Cap on scored sentences (keeps the similarity matrix small)
+_MAX_SENTENCES = 400
+
+
+def _sentences(text: str) -> List[str]:
+    """Sentences of every line (snippets often lack final punctuation)."""
+    seen, result = set(), []
+    for line in text.split("\n"):
+        for sentence in split_sentences(line):
+            words = len(sentence.split())
+            key = sentence.lower()
+            if _MIN_WORDS <= words <= _MAX_WORDS and key not in seen:
+                seen.add(key)
+                result.append(sentence)
+    return result[:_MAX_SENTENCES]
+
+
+def _tfidf(sentences: List[str]) -> np.ndarray:
+    """L2-normalized TF-IDF rows, one per sentence."""
+    tokenized = [normalize_tokens(s) for s in sentences]
+    vocab = {}
+    rows, cols = [], []
+    for i, tokens in enumerate(tokenized):
+        for token in tokens:
+            rows.append(i)
+            cols.append(vocab.setdefault(token, len(vocab)))
+
+    tf = np.zeros((len(sentences), max(1, len(vocab))), dtype=np.float32)
+    np.add.at(tf, (rows, cols), 1.0)
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + df)) + 1.0
+    matrix = tf * idf
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _textrank(similarity: np.ndarray, damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    """PageRank over the sentence similarity graph (power iteration)."""
+    n = similarity.shape[0]
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0.0)
+
+    out_weight = weights.sum(axis=1, keepdims=True)
+    transition = np.divide(weights, out_weight, out=np.full_like(weights, 1.0 / n), where=out_weight > 0)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def _select(order: np.ndarray, similarity: np.ndarray, limit: int, max_overlap: float = 0.6) -> List[int]:
+    """Best-ranked sentences, skipping near-duplicates of those already picked."""
+    picked: List[int] = []
+    for index in order:
+        if len(picked) >= limit:
+            break
+        if picked and similarity[index, picked].max() >= max_overlap:
+            continue
+        picked.append(int(index))
+    return picked
+
+
+def extractive_summary(text: str, summary_words: int = 170, max_points: int = 6) -> Tuple[str, List[str]]:
+    """
+    TextRank over TF-IDF cosine similarities, blended with centroid
+    similarity (how typical a sentence is of the whole text).
+    Returns (summary, key_points); no LLM involved.
+    """
+    sentences = _sentences(text)
+    if len(sentences) < 3:
+        fallback = split_sentences(text)
+        return truncate(" ".join(fallback), 1200), fallback[:max_points]
+
+    matrix = _tfidf(sentences)
+    similarity = matrix @ matrix.T
+
+    centroid = matrix.mean(axis=0)
+    centroid_score = matrix @ (centroid / (np.linalg.norm(centroid) or 1.0))
+    rank_score = _textrank(similarity)
+    scores = rank_score / (rank_score.max() or 1.0) + 0.5 * centroid_score
+
+    order = np.argsort(-scores)
+
+    # Summary: top sentences up to the word budget, in reading order
+    chosen, words = [], 0
+    for index in _select(order, similarity, limit=len(sentences)):
+        if words >= summary_words:
+            break
+        chosen.append(index)
+        words += len(sentences[index].split())
+    # Search snippets often lack final punctuation
+    summary = " ".join(
+        sentences[i] if sentences[i][-1] in ".!?" else sentences[i] + "."
+        for i in sorted(chosen)
+    )
+
+    # Key points: the best short, mutually distinct sentences
+    short = np.array([i for i in order if len(sentences[i].split()) <= 35])
+    key_points = [sentences[i] for i in _select(short, similarity, limit=max_points)]
+
+    return summary, key_points
+
+
+class ExtractiveSummarizerTool:
+    """
+    LLM-free summarizer (mode="fast", and the degraded-mode fallback
+    when the LLM providers are down or saturated).
+
+    Returns:
+        summary: str
+        key_points: List[str]
+    """
+
+    async def summarize(self, text: str, on_draft=None) -> Tuple[str, list]:
+        # CPU-bound but short (milliseconds); kept off the event loop
+        usage = current_usage()
+        usage.provider("extractive")
+        with tracer.span("summarize", summarizer="extractive", chars=len(text)), usage.timed("parse_cpu_ms"):
+            return await asyncio.to_thread(extractive_summary, text)
@@ -1,10 +1,23 @@
-import os
+import hashlib
+import re
+import asyncio
 import json
+import time
 import aiohttp
-from typing import Tuple, Optional
+from typing import Callable, Tuple, Optional
 
 from pydantic import BaseModel, ValidationError
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from app.config.settings import settings
+from app.services.llm_gateway import llm_gateway
+from app.services.ollama_lifecycle import ollama_lifecycle
+from app.utils.gemini import GEMINI_HOST, configured_client
+from app.utils.hedging import LatencyTracker, hedged
+from app.utils.outbound import CircuitOpenError, is_retryable, outbound, retryable
+from app.utils.shared_cache import TwoLevelCache
+from app.utils.tracing import annotate_retry, http_trace_config, tracer
+from app.utils.usage import current_usage
 
 
 # ===================================================
@@ -18,7 +31,69 @@ class SummaryOutput(BaseModel):
 
 class SummarizerError(Exception):
     """Raised when summarization fails."""
-    pass
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = True):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+# Observed Gemini latencies (shared by all summarizer instances)
+_gemini_latency = LatencyTracker(default=settings.HEDGE_GEMINI_DEFAULT_DELAY_S)
+
+# LLM summaries by hash of the summarized text (shared by all instances
+# and, through the shared tier, by all workers)
+_summary_cache = TwoLevelCache(
+    "summary",
+    max_entries=settings.SUMMARY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SUMMARY_CACHE_TTL_S,
+)
+
+# Called with the summary text streamed so far
+DraftCallback = Optional[Callable[[str], None]]
+
+
+_PARTIAL_SUMMARY = re.compile(r'"summary"\s*:\s*"((?:[^"\\]|\\.)*)', re.S)
+
+
+class _DraftStream:
+    """
+    Accumulates streamed LLM output and reports the (possibly still
+    unterminated) "summary" string of the JSON answer as it grows.
+    """
+
+    def __init__(self, on_draft: DraftCallback):
+        self.on_draft = on_draft
+        self.raw = ""
+        self._last_draft = ""
+
+    def feed(self, chunk: str):
+        self.raw += chunk
+        if not self.on_draft:
+            return
+
+        match = _PARTIAL_SUMMARY.search(self.raw)
+        if not match:
+            return
+
+        escaped = match.group(1).rstrip("\\")
+        try:
+            draft = json.loads(f'"{escaped}"')
+        except ValueError:
+            draft = escaped
+
+        if draft and draft != self._last_draft:
+            self._last_draft = draft
+            self.on_draft(draft)
+
+
+def _gemini_error(e: Exception) -> SummarizerError:
+    """SDK errors carry the HTTP status as `code`."""
+    status = getattr(e, "code", None)
+    return SummarizerError(
+        f"Gemini request failed: {e}",
+        status=status if isinstance(status, int) else None,
+    )
 
 
 # ===================================================
@@ -37,16 +112,32 @@ class SummarizerTool:
     """
 
     def __init__(self):
-        self.gemini_key = os.getenv("GEMINI_API_KEY")
+        self.gemini_client = configured_client()
 
-        self.gemini_client = None
-        if self.gemini_key:
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=self.gemini_key)
-                self.gemini_client = genai
-            except Exception:
-                self.gemini_client = None
+        # Small prompts arriving together share one Gemini request
+        self._gemini_batcher = llm_gateway.batcher("gemini", self._run_gemini_batch)
+
+    # --------------------------------------------------------------
+    # DEGRADED MODE CHECK (see summarize_node)
+    # --------------------------------------------------------------
+    def degraded_reason(self) -> Optional[str]:
+        """
+        Why calling the LLMs is pointless right now, or None. Checked
+        before each summary so outages and overload fail over instantly
+        instead of after retries.
+        """
+        primary = "gemini" if self.gemini_client else "ollama"
+        if llm_gateway.provider(primary).saturated(settings.LLM_SATURATION_QUEUE_RATIO):
+            return f"{primary} queue saturated"
+
+        ollama_down = (
+            outbound.is_open(settings.OLLAMA_URL)
+            or ollama_lifecycle.snapshot()["reachable"] is False
+        )
+        gemini_down = not self.gemini_client or outbound.is_open(GEMINI_HOST)
+        if gemini_down and ollama_down:
+            return "no LLM provider reachable"
+        return None
 
     # --------------------------------------------------------------
     # PUBLIC SUMMARIZATION ENTRYPOINT
@@ -54,34 +145,108 @@ class SummarizerTool:
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=6),
-        retry=retry_if_exception_type((SummarizerError, aiohttp.ClientError)),
+        retry=retryable(SummarizerError, aiohttp.ClientError),
+        before_sleep=annotate_retry,
     )
-    async def summarize(self, text: str) -> Tuple[str, list]:
+    async def summarize(self, text: str, on_draft: DraftCallback = None) -> Tuple[str, list]:
         """
         Returns summary and key points.
+        `on_draft` receives the summary text while the model streams it.
         """
+        with tracer.span("summarize", chars=len(text)) as span:
+            # Concurrent requests for the same text summarize it once
+            (summary, key_points), cached = await _summary_cache.get_or_compute(
+                hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                lambda: self._summarize(text, on_draft),
+            )
+            span.set(cached=cached)
+            if cached:
+                current_usage().add(summary_cache_hits=1)
+                if on_draft:
+                    on_draft(summary)
+            return summary, key_points
+
+    async def _summarize(self, text: str, on_draft: DraftCallback) -> Tuple[str, list]:
+        # Gemini first, hedged with Ollama once it is slower than its p95.
+        # The p95 is measured inside the gateway slot, so the hedge timer
+        # starts once the slot is acquired: a busy queue alone must not
+        # double the LLM load
+        if self.gemini_client and settings.HEDGE_ENABLED:
+            started = asyncio.Event()
+            try:
+                parsed = await hedged(
+                    lambda: self._summarize_gemini(text, on_draft, on_start=started.set),
+                    lambda: self._summarize_ollama(text, on_draft),
+                    delay=_gemini_latency.percentile(settings.HEDGE_PERCENTILE),
+                    started=started,
+                )
+                return parsed.summary, parsed.key_points
+            except Exception as e:
+                error = SummarizerError(
+                    f"All summarization providers failed: {e}",
+                    retryable=is_retryable(e),
+                )
+                # Retries draw on the failing host's retry budget
+                # (OutboundPolicy.should_retry); a refused call (open
+                # breaker) is already not retryable
+                host = getattr(e, "outbound_host", None)
+                if host:
+                    error.outbound_host = host
+                raise error from e
 
         # Try Gemini first
         if self.gemini_client:
             try:
-                parsed = await self._summarize_gemini(text)
+                parsed = await self._summarize_gemini(text, on_draft)
                 if parsed:
                     return parsed.summary, parsed.key_points
-            except Exception:
-                pass  # fallback to Ollama
+            except Exception as e:
+                # fallback to Ollama
+                tracer.annotate("fallback", to="ollama", error=f"{type(e).__name__}: {e}"[:300])
 
         # Fallback to Ollama
-        parsed = await self._summarize_ollama(text)
+        parsed = await self._summarize_ollama(text, on_draft)
         return parsed.summary, parsed.key_points
 
     # --------------------------------------------------------------
     # GEMINI SUMMARIZATION
     # --------------------------------------------------------------
-    async def _summarize_gemini(self, text: str) -> Optional[SummaryOutput]:
+    async def _summarize_gemini(
+        self,
+        text: str,
+        on_draft: DraftCallback = None,
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> Optional[SummaryOutput]:
         """
-        Uses Google Gemini to produce structured JSON output.
+        Uses Google Gemini to produce structured JSON output (streamed),
+        through the LLM gateway. Small texts are micro-batched (no drafts).
+        `on_start` is called once a gateway slot is acquired.
         """
+        if settings.LLM_BATCH_ENABLED and len(text) <= settings.LLM_BATCH_MAX_CHARS:
+            # The batcher charges the call and its timings; the shared
+            # request's sizes are charged per item here
+            parsed = await self._gemini_batcher.submit(text, on_start=on_start)
+            current_usage().add(prompt_chars=len(text), response_chars=len(parsed.model_dump_json()))
+            return parsed
+
+        async with llm_gateway.slot("gemini"):
+            if on_start is not None:
+                on_start()
+            return await self._gemini_call(text, on_draft)
+
+    async def _run_gemini_batch(self, texts: list) -> list:
+        """MicroBatcher callback: runs inside one gateway slot."""
+        if len(texts) == 1:
+            return [await self._gemini_call(texts[0])]
+
+        try:
+            return await self._gemini_batch_call(texts)
+        except SummarizerError:
+            # A malformed combined answer must not fail every caller. One
+            # at a time: the batch holds a single slot of the concurrency cap
+            return [await self._gemini_call(t) for t in texts]
 
+    async def _gemini_call(self, text: str, on_draft: DraftCallback = None) -> SummaryOutput:
         try:
             model = self.gemini_client.GenerativeModel("gemini-pro")
 
@@ -99,27 +264,91 @@ class SummarizerTool:
             {text}
             """
 
-            response = model.generate_content(prompt)
-
-            if not response or not response.text:
+            # Async streaming call so a losing hedge can be cancelled
+            started = time.perf_counter()
+            stream = _DraftStream(on_draft)
+            with tracer.span("gemini generate", kind="client", provider="gemini", chars=len(text)) as span:
+                async with outbound.guard(GEMINI_HOST):
+                    try:
+                        response = await model.generate_content_async(prompt, stream=True)
+                        async for chunk in response:
+                            if not stream.raw:
+                                span.event("first_token")
+                            stream.feed(chunk.text)
+                    except Exception as e:
+                        raise _gemini_error(e) from e
+
+            # The last chunk carries the token counts
+            tokens = getattr(response, "usage_metadata", None)
+            current_usage().add(
+                prompt_chars=len(prompt),
+                response_chars=len(stream.raw),
+                prompt_tokens=getattr(tokens, "prompt_token_count", 0) or 0,
+                response_tokens=getattr(tokens, "candidates_token_count", 0) or 0,
+            )
+
+            if not stream.raw:
                 raise SummarizerError("Gemini returned empty response.")
 
-            json_data = self._extract_json(response.text)
+            json_data = self._extract_json(stream.raw)
             if not json_data:
                 raise SummarizerError("Gemini returned invalid JSON.")
 
             # Pydantic validation — strong type checking
-            return SummaryOutput.model_validate(json_data)
+            parsed = SummaryOutput.model_validate(json_data)
+            _gemini_latency.observe(time.perf_counter() - started)
+            return parsed
 
+        except (SummarizerError, CircuitOpenError):
+            # Already classified (an open breaker is not retried)
+            raise
         except (ValidationError, Exception) as e:
             raise SummarizerError(f"Gemini summarization failed: {e}")
 
+    async def _gemini_batch_call(self, texts: list) -> list:
+        """
+        Several small texts in one request; the model answers with a
+        JSON list holding one summary object per text, in order.
+        """
+        model = self.gemini_client.GenerativeModel("gemini-pro")
+        numbered = "\n\n".join(f"### Text {i}\n{t}" for i, t in enumerate(texts, start=1))
+
+        prompt = f"""
+        For EACH of the {len(texts)} numbered texts below, write a 120–200 word
+        summary and 4–7 key bullet points.
+
+        Return ONLY a valid JSON list with exactly {len(texts)} objects, in order:
+
+        [{{"summary": "string", "key_points": ["point1", "point2"]}}, ...]
+
+        {numbered}
+        """
+
+        with tracer.span("gemini generate", kind="client", provider="gemini", batch_size=len(texts)):
+            async with outbound.guard(GEMINI_HOST):
+                try:
+                    response = await model.generate_content_async(prompt)
+                    raw = response.text
+                except Exception as e:
+                    raise _gemini_error(e) from e
+
+        try:
+            items = json.loads(raw[raw.find("["):raw.rfind("]") + 1])
+            parsed = [SummaryOutput.model_validate(item) for item in items]
+        except (ValueError, ValidationError) as e:
+            raise SummarizerError(f"Gemini returned an invalid batch answer: {e}")
+
+        if len(parsed) != len(texts):
+            raise SummarizerError(f"Gemini answered {len(parsed)} of {len(texts)} batched texts.")
+        return parsed
+
     # --------------------------------------------------------------
     # OLLAMA FALLBACK
     # --------------------------------------------------------------
-    async def _summarize_ollama(self, text: str) -> SummaryOutput:
+    async def _summarize_ollama(self, text: str, on_draft: DraftCallback = None) -> SummaryOutput:
         """
-        Local fallback summarization using Ollama (llama3).
+        Local fallback summarization using Ollama, streamed. `keep_alive`
+        keeps the model loaded between calls (see app/services/ollama_lifecycle.py).
         """
 
         prompt = f"""
@@ -136,19 +365,45 @@ class SummarizerTool:
         {text}
         """
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "http://localhost:11434/api/generate",
-                json={"model": "llama3", "prompt": prompt},
-                timeout=60,
-            ) as resp:
-                if resp.status != 200:
-                    raise SummarizerError(f"Ollama request failed: HTTP {resp.status}")
-
-                data = await resp.json()
-                raw_text = data.get("response") or data
-
-        json_data = self._extract_json(raw_text)
+        endpoint = f"{settings.OLLAMA_URL.rstrip('/')}/api/generate"
+        stream = _DraftStream(on_draft)
+
+        async with llm_gateway.slot("ollama"), outbound.guard(endpoint):
+            with tracer.span("http ollama", kind="client", provider="ollama"):
+                async with aiohttp.ClientSession(trace_configs=[http_trace_config()]) as session:
+                    async with session.post(
+                        endpoint,
+                        json={
+                            "model": settings.OLLAMA_MODEL,
+                            "prompt": prompt,
+                            "stream": True,
+                            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+                        },
+                        timeout=60,
+                    ) as resp:
+                        if resp.status != 200:
+                            raise SummarizerError(
+                                f"Ollama request failed: HTTP {resp.status}",
+                                status=resp.status,
+                            )
+
+                        # One JSON object per line: {"response": "<tokens>", "done": bool}
+                        async for line in resp.content:
+                            if not line.strip():
+                                continue
+                            data = json.loads(line)
+                            stream.feed(data.get("response", ""))
+                            if data.get("done"):
+                                # The final line carries the token counts
+                                current_usage().add(
+                                    prompt_tokens=data.get("prompt_eval_count", 0),
+                                    response_tokens=data.get("eval_count", 0),
+                                )
+                                break
+
+        current_usage().add(prompt_chars=len(prompt), response_chars=len(stream.raw))
+
+        json_data = self._extract_json(stream.raw)
         if not json_data:
             raise SummarizerError("Ollama returned invalid JSON.")
 
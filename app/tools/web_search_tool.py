@@ -1,13 +1,69 @@
+import asyncio
 import aiohttp
+import html as html_lib
 import os
 import re
-from typing import List, Dict, Optional
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from typing import Any, List, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from app.config.settings import settings
+from app.utils.outbound import outbound, retryable
+from app.utils.ranking import reciprocal_rank_fusion
+from app.utils.shared_cache import TwoLevelCache
+from app.utils.text_cleaner import clean_html
+from app.utils.tracing import annotate_retry, http_trace_config, tracer
+from app.utils.usage import current_usage
 
 
 class WebSearchError(Exception):
     """Raised when search operation fails."""
-    pass
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+# Recent search results by normalized query (shared by all instances
+# and, through the shared tier, by all workers)
+_search_cache = TwoLevelCache(
+    "search",
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_S,
+)
+
+
+def _cache_key(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _covers(entry: Any, count: Optional[int]) -> bool:
+    """
+    True if a cached search ({"requested": n, "results": [...]}) answers
+    a search for `count` results: it holds that many, or it asked for at
+    least that many and the providers had no more.
+    """
+    if isinstance(entry, list):
+        # Entries cached before the requested count was stored
+        entry = {"requested": len(entry), "results": entry}
+    if not entry or not entry.get("results"):
+        return False
+    return count is None or len(entry["results"]) >= count or entry.get("requested", 0) >= count
+
+
+def _results_of(entry: Any) -> List[Dict[str, str]]:
+    return entry if isinstance(entry, list) else entry["results"]
+
+
+def _is_good(result: Dict[str, str]) -> bool:
+    """A result worth summarizing: a URL plus a title or snippet."""
+    return bool(result.get("url") and (result.get("title") or result.get("snippet")))
+
+
+# DuckDuckGo HTML result blocks: title link, then an optional snippet
+_DDG_TITLE = re.compile(r'<a\b[^>]*class="result__a"[^>]*>(.*?)</a>', re.S)
+_DDG_SNIPPET = re.compile(r'class="result__snippet"[^>]*>(.*?)</(?:a|div|td)>', re.S)
+_HREF = re.compile(r'href="([^"]+)"')
 
 
 class WebSearchTool:
@@ -15,32 +71,120 @@ class WebSearchTool:
     Web Search Tool:
     - If BING_API_KEY is present → uses Bing Web Search API
     - Otherwise → falls back to DuckDuckGo HTML scraping
+    - With SEARCH_FANOUT → queries every configured provider concurrently
+      and merges the results (reciprocal rank fusion)
     """
 
     def __init__(self):
         self.bing_key = os.getenv("BING_API_KEY")
-        self.session = aiohttp.ClientSession()
+        self.session = aiohttp.ClientSession(trace_configs=[http_trace_config()])
 
     async def close(self):
         """Close aiohttp session."""
         await self.session.close()
 
+    @staticmethod
+    async def cached_results(query: str, count: Optional[int] = None) -> Optional[List[Dict[str, str]]]:
+        """
+        Returns cached results for the query if a search for `count`
+        (the first `count`; all of them when None) would be answered
+        from the cache.
+        """
+        cached = await _search_cache.get(_cache_key(query))
+        if not _covers(cached, count):
+            return None
+        results = _results_of(cached)
+        return results if count is None else results[:count]
+
     # -------------------------------------------------------------
     # PUBLIC METHOD: Perform Search
     # -------------------------------------------------------------
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=6),
-        retry=retry_if_exception_type((aiohttp.ClientError, WebSearchError)),
+        retry=retryable(aiohttp.ClientError, WebSearchError),
+        before_sleep=annotate_retry,
     )
     async def search(self, query: str, count: int = 5) -> List[Dict[str, str]]:
         """
         Returns: list of { title, url, snippet }
         """
+        with tracer.span("search", query=query, count=count) as span:
+            # Concurrent misses for the same query search once
+            entry, cached = await _search_cache.get_or_compute(
+                _cache_key(query),
+                lambda: self._search_entry(query, count),
+                accept=lambda entry: _covers(entry, count),
+            )
+            results = _results_of(entry)[:count]
+            span.set(cached=cached, results=len(results))
+            if cached:
+                current_usage().add(search_cache_hits=1)
+            return results
+
+    async def _search_entry(self, query: str, count: int) -> Dict[str, Any]:
+        """Cache entry: the results plus how many were asked for."""
+        return {"requested": count, "results": await self._search(query, count)}
+
+    async def _search(self, query: str, count: int) -> List[Dict[str, str]]:
+        if settings.SEARCH_FANOUT:
+            return await self._fanout_search(query, count)
         if self.bing_key:
             return await self._bing_search(query, count)
         return await self._duckduckgo_search(query, count)
 
+    # -------------------------------------------------------------
+    # FAN-OUT: all providers concurrently, merged + ranked
+    # -------------------------------------------------------------
+    async def _fanout_search(self, query: str, count: int) -> List[Dict[str, str]]:
+        """
+        Queries all configured providers at once. Returns as soon as the
+        merged list holds `count` good results, or once every provider
+        has answered, failed or hit its deadline.
+        """
+        providers = [self._duckduckgo_search]
+        if self.bing_key:
+            providers.insert(0, self._bing_search)
+
+        deadline = settings.SEARCH_PROVIDER_DEADLINE_S
+        tasks = [
+            asyncio.ensure_future(asyncio.wait_for(provider(query, count), timeout=deadline))
+            for provider in providers
+        ]
+
+        ranked_lists: List[List[Dict[str, str]]] = []
+        errors: List[Exception] = []
+        merged: List[Dict[str, str]] = []
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    ranked_lists.append(await next_done)
+                except Exception as e:
+                    errors.append(e)
+                    tracer.annotate("provider_failed", error=f"{type(e).__name__}: {e}"[:300])
+                    continue
+
+                merged = reciprocal_rank_fusion(ranked_lists)
+                if sum(1 for r in merged if _is_good(r)) >= count:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not merged:
+            if errors:
+                raise WebSearchError(
+                    f"All search providers failed: {errors[0]!r}",
+                    status=getattr(errors[0], "status", None),
+                ) from errors[0]
+            raise WebSearchError("No results found from any search provider.")
+
+        # Good results first, keeping the fused order within each group
+        merged.sort(key=lambda r: not _is_good(r))
+        return merged[:count]
+
     # -------------------------------------------------------------
     # BING SEARCH API
     # -------------------------------------------------------------
@@ -52,12 +196,20 @@ class WebSearchTool:
         headers = {"Ocp-Apim-Subscription-Key": self.bing_key}
         params = {"q": query, "count": count}
 
-        async with self.session.get(endpoint, headers=headers, params=params, timeout=15) as resp:
-            if resp.status != 200:
-                text = await resp.text()
-                raise WebSearchError(f"Bing search failed ({resp.status}): {text}")
+        usage = current_usage()
+        usage.add(search_calls=1)
+        with tracer.span("http bing", kind="client", provider="bing"), usage.timed("io_wait_ms"):
+            async with outbound.guard(endpoint):
+                async with self.session.get(endpoint, headers=headers, params=params, timeout=15) as resp:
+                    usage.add(bytes_downloaded=len(await resp.read()))
+                    if resp.status != 200:
+                        text = await resp.text()
+                        raise WebSearchError(
+                            f"Bing search failed ({resp.status}): {text}",
+                            status=resp.status,
+                        )
 
-            data = await resp.json()
+                    data = await resp.json()
 
         results = []
         web_pages = data.get("webPages", {}).get("value", [])
@@ -84,23 +236,70 @@ class WebSearchTool:
         search_url = "https://duckduckgo.com/html/"
         data = {"q": query}
 
-        async with self.session.post(search_url, data=data, timeout=15) as resp:
-            if resp.status != 200:
-                raise WebSearchError(f"DuckDuckGo search failed ({resp.status})")
+        usage = current_usage()
+        usage.add(search_calls=1)
+        with tracer.span("http duckduckgo", kind="client", provider="duckduckgo"), usage.timed("io_wait_ms"):
+            async with outbound.guard(search_url):
+                async with self.session.post(search_url, data=data, timeout=15) as resp:
+                    if resp.status != 200:
+                        raise WebSearchError(
+                            f"DuckDuckGo search failed ({resp.status})",
+                            status=resp.status,
+                        )
 
-            html = await resp.text()
+                    usage.add(bytes_downloaded=len(await resp.read()))
+                    html = await resp.text()
 
-        # Extract result links
-        urls = re.findall(
-            r'<a rel="noopener" class="result__a" href="(https?://[^"]+)"',
-            html,
-        )
-
-        results = []
-        for u in urls[:count]:
-            results.append({"title": "", "url": u, "snippet": ""})
+        with usage.timed("parse_cpu_ms"):
+            results = self._parse_duckduckgo(html)[:count]
 
         if not results:
             raise WebSearchError("No results found from DuckDuckGo.")
 
         return results
+
+    @staticmethod
+    def _parse_duckduckgo(html: str) -> List[Dict[str, str]]:
+        """
+        Extracts { title, url, snippet } from the DuckDuckGo HTML page.
+        Redirect links (/l/?uddg=...) are resolved to the target URL.
+        """
+        titles = list(_DDG_TITLE.finditer(html))
+        results = []
+
+        for i, match in enumerate(titles):
+            href = _HREF.search(match.group(0))
+            if not href:
+                continue
+            url = _resolve_ddg_link(html_lib.unescape(href.group(1)))
+            if not url:
+                continue
+
+            # The snippet sits between this title and the next one
+            block_end = titles[i + 1].start() if i + 1 < len(titles) else len(html)
+            snippet = _DDG_SNIPPET.search(html, match.end(), block_end)
+
+            results.append(
+                {
+                    "title": html_lib.unescape(clean_html(match.group(1))),
+                    "url": url,
+                    "snippet": html_lib.unescape(clean_html(snippet.group(1))) if snippet else "",
+                }
+            )
+
+        return results
+
+
+def _resolve_ddg_link(href: str) -> Optional[str]:
+    """Returns the real target of a DuckDuckGo result link (or None for ads)."""
+    if href.startswith("//"):
+        href = "https:" + href
+
+    parts = urlsplit(href)
+    if parts.path.startswith("/l/"):
+        target = parse_qs(parts.query).get("uddg")
+        return target[0] if target else None
+
+    if "duckduckgo.com" in parts.netloc or parts.scheme not in ("http", "https"):
+        return None
+    return href
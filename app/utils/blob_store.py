@@ -0,0 +1,151 @@
+"""
+Local content-addressed blob store.
+
+Large artifacts (extracted page text, spilled task results) are written
+once to <root>/<aa>/<sha256> and referenced by a small handle
+("sha256:<hex>") in graph state and the task store. Identical content
+— the same page fetched by several tasks — is stored once. Blobs are
+read lazily and in chunks, so a task only holds what it is using.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+from app.config.settings import settings
+
+
+HANDLE_PREFIX = "sha256:"
+_CHUNK_CHARS = 64 * 1024
+
+
+class BlobNotFound(KeyError):
+    """Raised when a handle points at a blob that is gone (pruned)."""
+    pass
+
+
+class BlobStore:
+    """
+    Immutable blobs on the local filesystem. Writes are atomic
+    (temp file + rename), so concurrent writers of the same content
+    are safe without locking.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, handle: str) -> Path:
+        if not handle.startswith(HANDLE_PREFIX):
+            raise ValueError(f"Not a blob handle: {handle!r}")
+        digest = handle[len(HANDLE_PREFIX):]
+        return self.root / digest[:2] / digest
+
+    # -------------------------------------------------------
+    # Write
+    # -------------------------------------------------------
+    def put(self, data: Union[str, bytes]) -> str:
+        """Stores `data` (str is UTF-8 encoded) and returns its handle."""
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        handle = HANDLE_PREFIX + hashlib.sha256(raw).hexdigest()
+        path = self._path(handle)
+
+        if path.exists():
+            # Already stored: refresh mtime so pruning keeps it
+            os.utime(path)
+            return handle
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return handle
+
+    # -------------------------------------------------------
+    # Read (lazily / streamed)
+    # -------------------------------------------------------
+    def iter_text(self, handle: str, chunk_chars: int = _CHUNK_CHARS) -> Iterator[str]:
+        try:
+            f = open(self._path(handle), encoding="utf-8")
+        except FileNotFoundError:
+            raise BlobNotFound(handle)
+
+        with f:
+            while True:
+                chunk = f.read(chunk_chars)
+                if not chunk:
+                    return
+                yield chunk
+
+    def read_text(self, handle: str, limit: Optional[int] = None) -> str:
+        """Reads a text blob, or only its first `limit` characters."""
+        parts, size = [], 0
+        for chunk in self.iter_text(handle, chunk_chars=min(limit or _CHUNK_CHARS, _CHUNK_CHARS)):
+            parts.append(chunk)
+            size += len(chunk)
+            if limit is not None and size >= limit:
+                break
+        text = "".join(parts)
+        return text[:limit] if limit is not None else text
+
+    def read_joined(self, handles: Iterable[str], separator: str, limit: int) -> str:
+        """
+        Concatenates text blobs up to `limit` characters, reading no
+        more than needed. Every blob gets an equal share of the limit
+        (what a short blob leaves unused goes to the ones after it), so
+        the first blobs cannot crowd out the rest. Missing blobs are
+        skipped.
+        """
+        handles = list(handles)
+        parts: List[str] = []
+        size = 0
+        for i, handle in enumerate(handles):
+            budget = limit - size - (len(separator) if parts else 0)
+            if budget <= 0:
+                break
+            share = budget // (len(handles) - i)
+            if share <= 0:
+                break
+            try:
+                text = self.read_text(handle, limit=share)
+            except BlobNotFound:
+                continue
+            if parts:
+                parts.append(separator)
+                size += len(separator)
+            parts.append(text)
+            size += len(text)
+        return "".join(parts)[:limit]
+
+    def exists(self, handle: str) -> bool:
+        return self._path(handle).exists()
+
+    # -------------------------------------------------------
+    # Housekeeping
+    # -------------------------------------------------------
+    def prune(self, max_age_s: float) -> int:
+        """Deletes blobs not written or re-used for `max_age_s`. Returns the count."""
+        if not self.root.exists():
+            return 0
+
+        cutoff = time.time() - max_age_s
+        removed = 0
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+# Global instance (import anywhere)
+blob_store = BlobStore(settings.BLOB_STORE_PATH)
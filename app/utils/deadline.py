@@ -0,0 +1,59 @@
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a step cannot finish before the task deadline."""
+    pass
+
+
+def deadline_from_ms(deadline_ms: Optional[int]) -> Optional[float]:
+    """
+    Converts a relative budget in milliseconds into an absolute
+    wall-clock deadline (epoch seconds). None means "no deadline".
+    Wall-clock time keeps the value meaningful inside persisted state.
+    """
+    if not deadline_ms:
+        return None
+    return time.time() + deadline_ms / 1000
+
+
+def time_left(deadline_at: Optional[float], reserve: float = 0.0) -> Optional[float]:
+    """
+    Seconds left before the deadline, minus `reserve` seconds kept
+    back for later steps. Never negative; None if there is no deadline.
+    """
+    if deadline_at is None:
+        return None
+    return max(0.0, deadline_at - time.time() - reserve)
+
+
+def has_time(deadline_at: Optional[float], needed: float, reserve: float = 0.0) -> bool:
+    """True if at least `needed` seconds remain after the reserve."""
+    left = time_left(deadline_at, reserve)
+    return left is None or left >= needed
+
+
+async def within(
+    awaitable: Awaitable[T],
+    deadline_at: Optional[float],
+    reserve: float = 0.0,
+) -> T:
+    """
+    Awaits `awaitable`, cancelling it (including any pending retries)
+    once the deadline minus `reserve` passes.
+
+    Usage:
+        results = await within(tool.search(query), state["deadline_at"], reserve=4)
+    """
+    timeout = time_left(deadline_at, reserve)
+    if timeout is None:
+        return await awaitable
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline reached after waiting {timeout:.2f}s.")
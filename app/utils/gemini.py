@@ -0,0 +1,33 @@
+"""
+Shared Gemini client (google.generativeai), used by the summarizer and
+the query decomposer. The SDK is imported lazily, on first use, and the
+key always comes from settings.GEMINI_API_KEY.
+"""
+
+from functools import lru_cache
+from typing import Any, Optional
+
+from app.config.settings import settings
+
+# Outbound policy key for Gemini calls (made through the SDK, not aiohttp)
+GEMINI_HOST = "generativelanguage.googleapis.com"
+
+
+@lru_cache(maxsize=4)
+def gemini_client(api_key: str) -> Optional[Any]:
+    """
+    Imports and configures google.generativeai once per key (the SDK is
+    heavy, and configure() used to run for every task). Returns None if
+    the SDK is unavailable or rejects the key.
+    """
+    try:
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        return genai
+    except Exception:
+        return None
+
+
+def configured_client() -> Optional[Any]:
+    """The client for settings.GEMINI_API_KEY; None without a key."""
+    return gemini_client(settings.GEMINI_API_KEY) if settings.GEMINI_API_KEY else None
@@ -0,0 +1,124 @@
+import asyncio
+from collections import deque
+from threading import Lock
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.utils.tracing import tracer
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """
+    Rolling window of observed call latencies (in seconds).
+    Used to derive the hedging delay (e.g. the p95 of recent calls).
+    """
+
+    def __init__(self, default: float, window: int = 200, min_samples: int = 20):
+        self.default = default
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+        self._lock = Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        """
+        Returns the given percentile of the window.
+        Falls back to the default until enough samples were observed.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.default
+            ordered = sorted(self._samples)
+
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+async def _cancel(task: Optional[asyncio.Task]):
+    """Cancel a losing task and wait until it has actually finished."""
+    if task is None or task.done():
+        return
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[T]],
+    backup: Callable[[], Awaitable[T]],
+    delay: float,
+    is_valid: Optional[Callable[[T], bool]] = None,
+    started: Optional[asyncio.Event] = None,
+) -> T:
+    """
+    Runs `primary`; if it has not produced a valid result after `delay`
+    seconds (or fails before that), `backup` is started in parallel.
+    The first valid result wins and the other call is cancelled.
+    With `started`, the delay counts from when the primary sets it
+    (e.g. once it got a concurrency slot), so time spent queued does
+    not trigger the backup.
+
+    Raises the primary's exception if both calls fail.
+
+    Usage:
+        result = await hedged(
+            lambda: fetch(url),
+            lambda: fetch(mirror_url),
+            delay=tracker.percentile(95),
+        )
+    """
+    is_valid = is_valid or (lambda value: value is not None)
+
+    primary_task = asyncio.ensure_future(primary())
+    backup_task: Optional[asyncio.Task] = None
+    primary_error: Optional[BaseException] = None
+    backup_error: Optional[BaseException] = None
+
+    try:
+        if started is not None:
+            waiting = asyncio.ensure_future(started.wait())
+            try:
+                await asyncio.wait({primary_task, waiting}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                await _cancel(waiting)
+
+        # Give the primary call its head start
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            try:
+                value = primary_task.result()
+                if is_valid(value):
+                    return value
+            except Exception as e:
+                primary_error = e
+
+        tracer.annotate("hedge", delay_s=round(delay, 3), primary_failed=primary_error is not None)
+        backup_task = asyncio.ensure_future(backup())
+        pending = {t for t in (primary_task, backup_task) if not t.done()}
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    value = task.result()
+                except Exception as e:
+                    if task is primary_task:
+                        primary_error = e
+                    else:
+                        backup_error = e
+                    continue
+
+                if is_valid(value):
+                    if task is backup_task:
+                        tracer.annotate("hedge_won", by="backup")
+                    return value
+
+        raise primary_error or backup_error or ValueError("Hedged call produced no valid result.")
+
+    finally:
+        # Losing (or abandoned) requests are cancelled cleanly
+        await _cancel(primary_task)
+        await _cancel(backup_task)
@@ -0,0 +1,364 @@
+"""
+Shared outbound call policy: per-host circuit breakers, retry
+classification by status code, retry budgets and AIMD adaptive
+concurrency limits.
+
+Usage:
+    async with outbound.guard(url):
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                raise MyToolError("...", status=resp.status)
+
+    @retry(..., retry=retryable(aiohttp.ClientError, MyToolError))
+    async def call(...): ...
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from tenacity import retry_if_exception
+
+from app.config.settings import settings
+
+logger = logging.getLogger("outbound")
+
+
+# Transient statuses worth retrying; anything else (404, 401, ...) is final
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit open for {host}; retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+# ============================================================
+#   Classification
+# ============================================================
+
+def is_host_failure(exc: BaseException) -> bool:
+    """
+    True if the error says something about the host's health
+    (timeouts, connection errors, 429/5xx) rather than the request.
+    """
+    status = getattr(exc, "status", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+
+    # Tool errors wrap the underlying network error (raise ... from e)
+    network = (aiohttp.ClientError, asyncio.TimeoutError)
+    return isinstance(exc, network) or isinstance(exc.__cause__, network)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True if retrying the same request could plausibly succeed."""
+    if isinstance(exc, CircuitOpenError) or getattr(exc, "retryable", True) is False:
+        return False
+    status = getattr(exc, "status", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return True
+
+
+# ============================================================
+#   Circuit Breaker
+# ============================================================
+
+class CircuitBreaker:
+    """
+    closed → open after N consecutive host failures,
+    open → half-open after a cool-down (a single probe is let through),
+    half-open → closed on success / open again on failure.
+    """
+
+    def __init__(self, failure_threshold: int, open_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected (open, cool-down not over)."""
+        return self.state == "open" and time.monotonic() - self._opened_at < self.open_seconds
+
+    def before_call(self, host: str):
+        if self.state == "open":
+            waited = time.monotonic() - self._opened_at
+            if waited < self.open_seconds:
+                raise CircuitOpenError(host, self.open_seconds - waited)
+            self.state = "half_open"
+
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                raise CircuitOpenError(host, self.open_seconds)
+            self._probe_in_flight = True
+
+    def on_success(self):
+        self._failures = 0
+        self._probe_in_flight = False
+        self.state = "closed"
+
+    def on_cancel(self):
+        """The call was abandoned (e.g. a losing hedge): no verdict."""
+        self._probe_in_flight = False
+
+    def on_failure(self, host: str):
+        self._failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Circuit opened for {host} after {self._failures} failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+# ============================================================
+#   AIMD Adaptive Concurrency Limit
+# ============================================================
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+    The limit grows by ~1 per window of fast successes and shrinks when
+    a call fails or is much slower than the host's latency baseline.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, tolerance: float):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self._baseline: Optional[float] = None
+        self._waiters: deque = deque()
+
+    async def acquire(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken just as we were cancelled (e.g. a losing
+                    # hedge): pass the wake-up on to the next waiter
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def abandon(self):
+        """Frees a slot without treating the call as a signal."""
+        self.in_flight -= 1
+        self._wake()
+
+    def release(self, latency: float, failed: bool):
+        self.in_flight -= 1
+
+        if failed:
+            self.limit = max(self.minimum, self.limit * 0.5)
+        elif self._baseline is not None and latency > self._baseline * self.tolerance:
+            self.limit = max(self.minimum, self.limit * 0.8)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+        if not failed:
+            # Slow-moving latency baseline (EWMA)
+            self._baseline = latency if self._baseline is None else 0.9 * self._baseline + 0.1 * latency
+
+        self._wake()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+# ============================================================
+#   Retry Budget
+# ============================================================
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of the request volume,
+    so a failing host is not hit with up to 3x its normal traffic.
+    """
+
+    def __init__(self, ratio: float, initial: float, cap: float):
+        self.ratio = ratio
+        self.cap = cap
+        self._tokens = initial
+        self._lock = Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.cap, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+# ============================================================
+#   Per-host Policy Registry
+# ============================================================
+
+class HostPolicy:
+    def __init__(self, host: str):
+        self.host = host
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.OUTBOUND_BREAKER_FAILURES,
+            open_seconds=settings.OUTBOUND_BREAKER_OPEN_S,
+        )
+        self.limiter = AIMDLimiter(
+            initial=settings.OUTBOUND_INITIAL_CONCURRENCY,
+            minimum=1,
+            maximum=settings.OUTBOUND_MAX_CONCURRENCY,
+            tolerance=settings.OUTBOUND_LATENCY_TOLERANCE,
+        )
+        self.budget = RetryBudget(
+            ratio=settings.OUTBOUND_RETRY_BUDGET_RATIO,
+            initial=settings.OUTBOUND_RETRY_BUDGET_INITIAL,
+            cap=settings.OUTBOUND_RETRY_BUDGET_INITIAL * 2,
+        )
+
+
+class OutboundPolicy:
+    """
+    Registry of HostPolicy objects (one per host), shared by all tools.
+    Every fetched page brings a new host, so only the `max_hosts` most
+    recently used are kept (least recently used evicted first).
+    """
+
+    def __init__(self, max_hosts: Optional[int] = None):
+        self._hosts: "OrderedDict[str, HostPolicy]" = OrderedDict()
+        self._max_hosts = max_hosts if max_hosts is not None else settings.OUTBOUND_MAX_HOSTS
+        self._lock = Lock()
+
+    def for_host(self, host: str) -> HostPolicy:
+        with self._lock:
+            policy = self._hosts.get(host)
+            if policy is None:
+                policy = self._hosts[host] = HostPolicy(host)
+                while len(self._hosts) > self._max_hosts:
+                    self._hosts.popitem(last=False)
+            else:
+                self._hosts.move_to_end(host)
+            return policy
+
+    def is_open(self, url_or_host: str) -> bool:
+        """True if the host's circuit breaker currently rejects calls."""
+        return self.for_host(_host_of(url_or_host)).breaker.is_open()
+
+    @asynccontextmanager
+    async def guard(self, url_or_host: str):
+        """
+        Wraps one outbound call: checks the breaker, waits for a
+        concurrency slot and records the outcome.
+        """
+        host = _host_of(url_or_host)
+        policy = self.for_host(host)
+
+        await policy.limiter.acquire()
+        try:
+            policy.breaker.before_call(host)
+        except CircuitOpenError:
+            policy.limiter.abandon()
+            raise
+        policy.budget.deposit()
+
+        started = time.perf_counter()
+        try:
+            yield policy
+        except asyncio.CancelledError:
+            policy.breaker.on_cancel()
+            policy.limiter.abandon()
+            raise
+        except Exception as e:
+            failed = is_host_failure(e)
+            if failed:
+                policy.breaker.on_failure(host)
+            else:
+                policy.breaker.on_success()
+            policy.limiter.release(time.perf_counter() - started, failed)
+            _tag_host(e, host)
+            raise
+        else:
+            policy.breaker.on_success()
+            policy.limiter.release(time.perf_counter() - started, failed=False)
+
+    def should_retry(self, exc: BaseException) -> bool:
+        """
+        Classification + retry budget of the host the error came from.
+        """
+        if not is_retryable(exc):
+            return False
+
+        host = getattr(exc, "outbound_host", None)
+        if host is None:
+            return True
+
+        if not self.for_host(host).budget.try_withdraw():
+            logger.info(f"Retry budget exhausted for {host}; not retrying")
+            return False
+        return True
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Current breaker state and concurrency limit per host."""
+        with self._lock:
+            return {
+                host: {
+                    "breaker": p.breaker.state,
+                    "limit": round(p.limiter.limit, 2),
+                    "in_flight": p.limiter.in_flight,
+                }
+                for host, p in self._hosts.items()
+            }
+
+
+def retryable(*exception_types):
+    """
+    Tenacity `retry=` predicate: retry only the given exception types,
+    and only when the outbound policy classifies them as retryable.
+    """
+
+    def predicate(exc: BaseException) -> bool:
+        return isinstance(exc, exception_types) and outbound.should_retry(exc)
+
+    return retry_if_exception(predicate)
+
+
+def _host_of(url_or_host: str) -> str:
+    return urlsplit(url_or_host).netloc.lower() if "://" in url_or_host else url_or_host.lower()
+
+
+def _tag_host(exc: BaseException, host: str):
+    try:
+        exc.outbound_host = host
+    except AttributeError:
+        pass
+
+
+# Global instance (import anywhere)
+outbound = OutboundPolicy()
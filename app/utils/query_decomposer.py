@@ -0,0 +1,109 @@
+"""
+Splits a broad research question into focused sub-queries.
+
+Rule-based by default ("impact of AI on jobs and education" →
+"impact of AI on jobs", "impact of AI on education"); optionally asks
+Gemini, falling back to the rules on any failure. The original query
+always comes first so the overall ranking is kept.
+"""
+
+import json
+import logging
+import re
+from typing import List, Optional
+
+from app.config.settings import settings
+
+logger = logging.getLogger("query_decomposer")
+
+
+# The last of these splits "head" (shared context) from the enumerated tail
+_PIVOT = re.compile(r"\s(?:on|of|for|in|across|among|within)\s", re.I)
+# Enumerations: "a, b and c", "a or b", "a vs b", "a; b"
+_ENUMERATION = re.compile(r"\s*(?:,\s*(?:and\s+|or\s+)?|;\s*|\s+(?:and|or|vs\.?|versus)\s+)", re.I)
+# "relationship between a and b" is one question, not two
+_BINDING = re.compile(r"\b(?:between|relationship|correlation|interaction)\b", re.I)
+# "compare a and b ..." frames the whole question, not its first item
+_OPENER = re.compile(
+    r"^(?:compare|contrast|explain|describe|summari[sz]e|analy[sz]e|evaluate|review|research|investigate)\s+",
+    re.I,
+)
+
+
+def split_query(query: str, max_subqueries: Optional[int] = None) -> List[str]:
+    """
+    Returns [query, *sub_queries]; just [query] when there is nothing
+    to split.
+    """
+    limit = max_subqueries if max_subqueries is not None else settings.DECOMPOSE_MAX_SUBQUERIES
+    cleaned = " ".join(query.split()).rstrip("?.! ")
+    if _BINDING.search(cleaned):
+        return [query]
+
+    parts: List[str] = []
+
+    # "impact of X on Y and Z" → share everything up to the pivot whose
+    # tail is an enumeration; the last start means independent clauses
+    # ("rust adoption and go adoption"), without any opener verb
+    opener = _OPENER.match(cleaned)
+    clauses_start = opener.end() if opener else 0
+    for start in [m.end() for m in reversed(list(_PIVOT.finditer(cleaned)))] + [clauses_start]:
+        clauses = start == clauses_start
+        head, tail = ("" if clauses else cleaned[:start]), cleaned[start:]
+        items = [p for p in _ENUMERATION.split(tail) if p]
+        if len(items) < 2:
+            continue
+
+        # "... caffeine and alcohol on sleep" → trailing context applies to all
+        trailer = _PIVOT.search(items[-1])
+        if trailer:
+            context = items[-1][trailer.start():]
+            items = [item + context for item in items[:-1]] + [items[-1]]
+
+        if clauses and any(len(p.split()) < 2 for p in items):
+            continue
+
+        parts = [head + item for item in items]
+        break
+
+    subs = [query]
+    seen = {cleaned.lower()}
+    for part in parts:
+        if part.lower() not in seen:
+            seen.add(part.lower())
+            subs.append(part)
+    return subs[:limit + 1]
+
+
+async def llm_split_query(query: str, max_subqueries: Optional[int] = None) -> List[str]:
+    """
+    Asks Gemini for focused sub-queries. Raises on any failure (the
+    caller falls back to split_query).
+    """
+    from app.utils.gemini import GEMINI_HOST, configured_client
+    from app.utils.outbound import outbound
+
+    limit = max_subqueries if max_subqueries is not None else settings.DECOMPOSE_MAX_SUBQUERIES
+    client = configured_client()
+    if client is None:
+        raise RuntimeError("Gemini is not configured.")
+
+    prompt = (
+        f"Split this research question into at most {limit} focused web search "
+        f"queries that together cover it. Return ONLY a JSON list of strings.\n\n"
+        f"Question: {query}"
+    )
+
+    model = client.GenerativeModel("gemini-pro")
+    async with outbound.guard(GEMINI_HOST):
+        response = await model.generate_content_async(prompt)
+
+    text = response.text
+    items = json.loads(text[text.find("["):text.rfind("]") + 1])
+    subs = [query]
+    for item in items:
+        if isinstance(item, str) and item.strip() and item.strip().lower() != query.lower():
+            subs.append(item.strip())
+    if len(subs) < 2:
+        raise ValueError("No sub-queries returned.")
+    return subs[:limit + 1]
@@ -0,0 +1,75 @@
+from typing import Dict, Iterable, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that never change the page content: whole families
+# by prefix, the rest by exact name (a "ref" prefix would also drop
+# "refresh", "referrer", "reference", ...)
+_TRACKING_PREFIXES = ("utm_", "mc_")
+_TRACKING_PARAMS = frozenset(("gclid", "fbclid", "ref", "ref_src"))
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param in _TRACKING_PARAMS or param.startswith(_TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalizes a URL so the same page found by different providers
+    dedupes: lowercases scheme/host, drops "www.", default ports,
+    fragments, tracking parameters and trailing slashes.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(k)
+    )
+    path = parts.path.rstrip("/") or "/"
+
+    # http and https versions of a page are the same source
+    return urlunsplit(("https" if scheme == "http" else scheme, host, path, urlencode(query), ""))
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Iterable[List[Dict[str, str]]],
+    k: int = 60,
+) -> List[Dict[str, str]]:
+    """
+    Merges several ranked result lists ({title, url, snippet}) into one.
+    Duplicates (by canonical URL) are combined; each list contributes
+    1 / (k + rank) to a result's score. Missing titles/snippets are
+    filled in from the other lists.
+    """
+    scores: Dict[str, float] = {}
+    merged: Dict[str, Dict[str, str]] = {}
+
+    for results in ranked_lists:
+        for rank, result in enumerate(results, start=1):
+            url = result.get("url")
+            if not url:
+                continue
+
+            key = canonicalize_url(url)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+
+            existing = merged.setdefault(key, dict(result))
+            for field in ("title", "snippet"):
+                if not existing.get(field) and result.get(field):
+                    existing[field] = result[field]
+
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [merged[key] for key in ordered]
@@ -0,0 +1,379 @@
+"""
+Two-level cache shared by all workers on a host.
+
+L1 is the small in-process TTLCache; L2 is a shared tier every uvicorn
+worker reads and writes: a SQLite file in WAL mode (default) or Redis.
+A value computed by one worker is warm for all of them.
+
+    cache = TwoLevelCache("page", max_entries=256, ttl_seconds=3600)
+    text = await cache.get(url)                 # L1, then L2
+    text, hit = await cache.get_or_compute(url, fetch)
+
+Values are JSON, zlib-compressed in L2 (tuples come back as lists).
+get_or_compute() protects against stampedes: concurrent misses for the
+same key run `compute` once per process (single-flight), and once per
+host (a short lease in L2 the other workers wait on).
+
+Shared-tier calls run in a worker thread, never on the event loop. The
+shared tier is best effort: if it fails, the cache keeps working from
+L1 only.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.utils.cache import TTLCache
+
+
+logger = logging.getLogger("shared_cache")
+
+# Expired L2 rows are deleted every this many writes
+_PRUNE_EVERY = 500
+
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+# ============================================================
+#   Shared tiers
+# ============================================================
+
+class SQLiteTier:
+    """
+    Shared tier in a local SQLite file (WAL: readers never block the
+    writer, and each worker process has its own connection).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Durability is not needed for a cache: no fsync per commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace  TEXT NOT NULL,
+                    key        TEXT NOT NULL,
+                    value      BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                );
+                CREATE TABLE IF NOT EXISTS cache_leases (
+                    namespace  TEXT NOT NULL,
+                    key        TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                );
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[bytes, float]]:
+        """Returns (value, seconds left) or None."""
+        now = time.time()
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, now),
+            ).fetchone()
+        return (row[0], row[1] - now) if row else None
+
+    def contains(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time()),
+            ).fetchone()
+        return row is not None
+
+    def set(self, namespace: str, key: str, value: bytes, ttl_seconds: float):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, value, time.time() + ttl_seconds),
+                )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(conn)
+
+    def acquire_lease(self, namespace: str, key: str, ttl_seconds: float) -> bool:
+        """True if this process may compute the key (no live lease held elsewhere)."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM cache_leases WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                    (namespace, key, now),
+                )
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO cache_leases (namespace, key, expires_at) VALUES (?, ?, ?)",
+                    (namespace, key, now + ttl_seconds),
+                )
+            return cur.rowcount == 1
+
+    def release_lease(self, namespace: str, key: str):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM cache_leases WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace: str):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+                conn.execute("DELETE FROM cache_leases WHERE namespace = ?", (namespace,))
+
+    def prune(self) -> int:
+        with self._lock:
+            return self._prune(self._connect())
+
+    @staticmethod
+    def _prune(conn: sqlite3.Connection) -> int:
+        now = time.time()
+        with conn:
+            removed = conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+            conn.execute("DELETE FROM cache_leases WHERE expires_at <= ?", (now,))
+        return removed
+
+
+class RedisTier:
+    """
+    Shared tier in Redis (also shared across hosts). Expiry and leases
+    use Redis key TTLs.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+
+    def _redis(self):
+        if self._client is None:
+            # Deferred: only needed with SHARED_CACHE_BACKEND=redis
+            import redis
+            self._client = redis.Redis.from_url(self.url, socket_timeout=1.0)
+        return self._client
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"cache:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[bytes, float]]:
+        name = self._key(namespace, key)
+        pipe = self._redis().pipeline()
+        pipe.get(name)
+        pipe.pttl(name)
+        value, ttl_ms = pipe.execute()
+        if value is None:
+            return None
+        # -1: no expiry set
+        return value, (ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else float("inf"))
+
+    def contains(self, namespace: str, key: str) -> bool:
+        return bool(self._redis().exists(self._key(namespace, key)))
+
+    def set(self, namespace: str, key: str, value: bytes, ttl_seconds: float):
+        self._redis().set(self._key(namespace, key), value, px=int(ttl_seconds * 1000))
+
+    def acquire_lease(self, namespace: str, key: str, ttl_seconds: float) -> bool:
+        return bool(self._redis().set("lease:" + self._key(namespace, key), 1, nx=True, px=int(ttl_seconds * 1000)))
+
+    def release_lease(self, namespace: str, key: str):
+        self._redis().delete("lease:" + self._key(namespace, key))
+
+    def clear(self, namespace: str):
+        client = self._redis()
+        for pattern in (self._key(namespace, "*"), "lease:" + self._key(namespace, "*")):
+            names = list(client.scan_iter(match=pattern, count=500))
+            if names:
+                client.delete(*names)
+
+    def prune(self) -> int:
+        return 0
+
+
+def _make_tier():
+    backend = settings.SHARED_CACHE_BACKEND
+    if backend == "sqlite":
+        return SQLiteTier(settings.SHARED_CACHE_PATH)
+    if backend == "redis":
+        return RedisTier(settings.REDIS_URL)
+    return None
+
+
+# Global instance (import anywhere); None when SHARED_CACHE_BACKEND=off
+shared_tier = _make_tier()
+
+# Shared tier skipped until then (monotonic time) after a failure
+_tier_down_until = 0.0
+
+# Every TwoLevelCache created (see clear_caches)
+_caches: List["TwoLevelCache"] = []
+
+
+# ============================================================
+#   Two-level cache
+# ============================================================
+
+class TwoLevelCache:
+    """
+    In-process LRU (L1) in front of the shared tier (L2), for one
+    namespace of keys. Keys are strings.
+    """
+
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: float):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._l1 = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        # Keys being computed in this process → done when the computation ends
+        self._flights: Dict[str, asyncio.Future] = {}
+        _caches.append(self)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._l1.get(key)
+        if value is not None:
+            return value
+
+        found = await self._l2("get", key)
+        if found is None:
+            return None
+        value, ttl_left = found
+        self._l1.set(key, value, ttl_seconds=ttl_left)
+        return value
+
+    async def set(self, key: str, value: Any):
+        self._l1.set(key, value)
+        await self._l2("set", key, value)
+
+    async def contains(self, key: str) -> bool:
+        """Cheap warmth probe: nothing is decoded or promoted."""
+        return self._l1.contains(key) or bool(await self._l2("contains", key))
+
+    def clear(self):
+        """Clears L1 only (the shared tier belongs to every worker)."""
+        self._l1.clear()
+
+    async def purge(self):
+        """Clears L1 and this namespace in the shared tier (for every worker)."""
+        self._l1.clear()
+        await self._l2("clear")
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        accept: Callable[[Any], bool] = lambda value: True,
+    ) -> Tuple[Any, bool]:
+        """
+        Returns (value, True) from the cache, or (compute(), False) after
+        caching it. Concurrent callers of the same key wait for the one
+        computing it instead of computing it again; if that one fails or
+        is cancelled, the next waiter computes it. `accept` rejects
+        cached values that are not good enough (e.g. too few results).
+        """
+        while True:
+            value = await self.get(key)
+            if value is not None and accept(value):
+                return value, True
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                await asyncio.shield(flight)
+                continue
+
+            flight = asyncio.get_running_loop().create_future()
+            self._flights[key] = flight
+            try:
+                return await self._compute_once(key, compute, accept)
+            finally:
+                del self._flights[key]
+                flight.set_result(None)
+
+    async def _compute_once(self, key: str, compute, accept) -> Tuple[Any, bool]:
+        """Computes the key unless another worker holds its lease."""
+        lease_s = settings.SHARED_CACHE_LEASE_S
+        wait_until = time.monotonic() + lease_s
+
+        # Another worker is computing it: poll L2 until it shows up, the
+        # lease is released (that worker failed) or expires
+        while True:
+            leased = await self._l2("acquire_lease", key, lease_s)
+            if leased is not False or time.monotonic() > wait_until:
+                break
+            await asyncio.sleep(settings.SHARED_CACHE_POLL_S)
+            value = await self.get(key)
+            if value is not None and accept(value):
+                return value, True
+
+        try:
+            value = await compute()
+            await self.set(key, value)
+            return value, False
+        finally:
+            if leased:
+                await self._l2("release_lease", key)
+
+    async def _l2(self, op: str, *args) -> Any:
+        """
+        Runs one shared-tier operation in a worker thread (SQLite lock
+        waits and Redis round trips would otherwise stall the event
+        loop). Returns None if there is no tier or it failed. After a
+        failure the tier is skipped for a while, so an unreachable Redis
+        does not add a timeout to every lookup.
+        """
+        global _tier_down_until
+        if shared_tier is None or time.monotonic() < _tier_down_until:
+            return None
+        try:
+            return await asyncio.to_thread(self._call, op, *args)
+        except Exception as e:
+            _tier_down_until = time.monotonic() + settings.SHARED_CACHE_RETRY_S
+            logger.warning(
+                f"Shared cache {op} failed ({type(e).__name__}: {e}); "
+                f"using in-process cache only for {settings.SHARED_CACHE_RETRY_S:.0f}s"
+            )
+            return None
+
+    def _call(self, op: str, *args) -> Any:
+        """The tier operation, plus (de)serialization for get / set."""
+        if op == "get":
+            found = shared_tier.get(self.namespace, *args)
+            return None if found is None else (_decode(found[0]), found[1])
+        if op == "set":
+            key, value = args
+            return shared_tier.set(self.namespace, key, _encode(value), self.ttl_seconds)
+        return getattr(shared_tier, op)(self.namespace, *args)
+
+
+async def clear_caches():
+    """
+    Empties every cache: this process's L1s and the shared tier. Other
+    workers keep their own L1 entries until they expire.
+    """
+    for cache in _caches:
+        await cache.purge()
@@ -33,3 +33,12 @@ def truncate(text: str, max_length: int = 20000) -> str:
         truncated = truncated[:last_space]
 
     return truncated.strip()
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Naive sentence splitter (punctuation followed by whitespace).
+    Good enough for picking lead sentences out of web text.
+    """
+    sentences = re.split(r"(?<=[.!?])\s+", normalize_whitespace(text))
+    return [s for s in sentences if s]
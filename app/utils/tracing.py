@@ -0,0 +1,425 @@
+"""
+Lightweight per-task tracing.
+
+Spans are opened with `tracer.span(...)` and nest through a context
+variable, so asyncio tasks started inside a span (graph nodes, hedged
+fetches) attach their spans to it automatically. Every trace is keyed
+by its task id and kept in a bounded ring buffer (the oldest tasks are
+dropped), served as a waterfall by GET /research/{task_id}/trace and
+optionally appended to an OTLP/JSON file.
+
+HTTP spans get DNS / connect / TTFB / body phases from aiohttp trace
+hooks: sessions created with `trace_configs=[http_trace_config()]`
+fill them in on whichever span is current when the request runs.
+
+Usage:
+    with tracer.span("search", kind="client", query=query) as span:
+        ...
+        span.set(results=len(results))
+
+    tracer.annotate("fallback", to="ollama")   # event on the current span
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.config.settings import settings
+from app.utils.usage import current_usage
+
+
+# OTLP span kinds
+_OTLP_KIND = {"internal": 1, "server": 2, "client": 3}
+_OTLP_STATUS = {"ok": 1, "error": 2, "cancelled": 2}
+
+
+class Span:
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind",
+        "start", "end", "status", "attributes", "events", "_marks",
+    )
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: str, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        # Raw HTTP phase timestamps (aiohttp hooks)
+        self._marks: Dict[str, float] = {}
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def event(self, name: str, **attributes):
+        self.events.append({"name": name, "time": time.time(), "attributes": attributes})
+
+    def _finish(self, status: str):
+        self.end = time.time()
+        self.status = status
+        if self._marks:
+            self.attributes["phases_ms"] = _http_phases(self._marks, self.end)
+
+
+class _NoopSpan:
+    """Returned outside any trace (or with tracing off): records nothing."""
+
+    def set(self, **attributes):
+        pass
+
+    def event(self, name: str, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+class _Trace:
+    __slots__ = ("spans", "dropped", "exported")
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.exported = 0
+
+
+class Tracer:
+    """
+    Ring buffer of the last `max_traces` traces, at most `max_spans`
+    spans each (further spans are counted, not stored).
+    """
+
+    def __init__(self, max_traces: int, max_spans: int, enabled: bool = True):
+        self.max_traces = max(1, max_traces)
+        self.max_spans = max(1, max_spans)
+        self.enabled = enabled
+        self._traces: "OrderedDict[str, _Trace]" = OrderedDict()
+        self._lock = Lock()
+
+    # -------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", trace_id: Optional[str] = None, **attributes) -> Iterator[Any]:
+        """
+        Opens a child of the current span, or a root span of `trace_id`.
+        Outside a trace (no parent, no trace_id) nothing is recorded.
+        """
+        parent = _current.get()
+        trace_id = trace_id or (parent.trace_id if parent else None)
+        if not self.enabled or trace_id is None:
+            yield _NOOP
+            return
+
+        span = Span(trace_id, parent.span_id if parent and parent.trace_id == trace_id else None, name, kind, attributes)
+        self._record(span)
+
+        token = _current.set(span)
+        status = "ok"
+        try:
+            yield span
+        except BaseException as e:
+            status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            span.set(error=f"{type(e).__name__}: {e}"[:500])
+            raise
+        finally:
+            _current.reset(token)
+            span._finish(status)
+
+    def _record(self, span: Span):
+        with self._lock:
+            trace = self._traces.get(span.trace_id)
+            if trace is None:
+                trace = self._traces[span.trace_id] = _Trace()
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            else:
+                self._traces.move_to_end(span.trace_id)
+
+            if len(trace.spans) < self.max_spans:
+                trace.spans.append(span)
+            else:
+                trace.dropped += 1
+
+    @staticmethod
+    def current():
+        return _current.get() or _NOOP
+
+    def annotate(self, name: str, **attributes):
+        """Adds an event (retry, fallback, hedge, ...) to the current span."""
+        self.current().event(name, **attributes)
+
+    # -------------------------------------------------------
+    # Reading
+    # -------------------------------------------------------
+    def waterfall(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The trace as a waterfall: spans in tree order (each followed by
+        its children, siblings by start time) with their depth, offset
+        from the first span and duration (None while still open).
+        """
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                return None
+            spans = sorted(trace.spans, key=lambda s: s.start)
+            dropped = trace.dropped
+
+        if not spans:
+            return None
+
+        known = {s.span_id for s in spans}
+        children: Dict[Optional[str], List[Span]] = {}
+        for s in spans:
+            # Parent dropped (span limit) → shown as a root
+            children.setdefault(s.parent_id if s.parent_id in known else None, []).append(s)
+
+        ordered: List[tuple] = []
+        stack = [(s, 0) for s in reversed(children.get(None, []))]
+        while stack:
+            s, depth = stack.pop()
+            ordered.append((s, depth))
+            stack.extend((c, depth + 1) for c in reversed(children.get(s.span_id, [])))
+
+        origin = spans[0].start
+        ends = [s.end for s in spans if s.end is not None]
+        rows = []
+        for s, depth in ordered:
+            rows.append({
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "depth": depth,
+                "name": s.name,
+                "kind": s.kind,
+                "offset_ms": _ms(s.start - origin),
+                "duration_ms": _ms(s.end - s.start) if s.end is not None else None,
+                "status": s.status if s.end is not None else "open",
+                "attributes": dict(s.attributes),
+                "events": [
+                    {"name": e["name"], "offset_ms": _ms(e["time"] - origin), "attributes": e["attributes"]}
+                    for e in list(s.events)
+                ],
+            })
+
+        return {
+            "task_id": trace_id,
+            "started_at": origin,
+            "duration_ms": _ms(max(ends) - origin) if ends else None,
+            "span_count": len(rows),
+            "dropped_spans": dropped,
+            "spans": rows,
+        }
+
+    # -------------------------------------------------------
+    # Export (OTLP/JSON, one ExportTraceServiceRequest per line)
+    # -------------------------------------------------------
+    def export(self, trace_id: str, path: str) -> int:
+        """
+        Appends the trace's finished, not yet exported spans to `path`.
+        Returns the number of spans written.
+        """
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            if trace is None:
+                return 0
+            spans = [s for s in trace.spans[trace.exported:] if s.end is not None]
+            trace.exported = len(trace.spans)
+
+        if not spans:
+            return 0
+
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", "research-assistant")]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.utils.tracing"},
+                    "spans": [_otlp_span(s) for s in spans],
+                }],
+            }]
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(request, default=str) + "\n")
+        return len(spans)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def _otlp_trace_id(trace_id: str) -> str:
+    try:
+        return uuid.UUID(trace_id).hex
+    except ValueError:
+        return hashlib.sha256(trace_id.encode("utf-8")).hexdigest()[:32]
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    elif isinstance(value, str):
+        typed = {"stringValue": value}
+    else:
+        typed = {"stringValue": json.dumps(value, default=str)}
+    return {"key": key, "value": typed}
+
+
+def _otlp_span(s: Span) -> Dict[str, Any]:
+    span = {
+        "traceId": _otlp_trace_id(s.trace_id),
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": _OTLP_KIND.get(s.kind, 1),
+        "startTimeUnixNano": str(int(s.start * 1e9)),
+        "endTimeUnixNano": str(int(s.end * 1e9)),
+        "attributes": [_otlp_attribute(k, v) for k, v in s.attributes.items()],
+        "events": [
+            {
+                "name": e["name"],
+                "timeUnixNano": str(int(e["time"] * 1e9)),
+                "attributes": [_otlp_attribute(k, v) for k, v in e["attributes"].items()],
+            }
+            for e in s.events
+        ],
+        "status": {"code": _OTLP_STATUS.get(s.status, 0)},
+    }
+    if s.parent_id:
+        span["parentSpanId"] = s.parent_id
+    return span
+
+
+# ============================================================
+#   tenacity hook (retries become events on the current span)
+# ============================================================
+
+def annotate_retry(retry_state):
+    """
+    `before_sleep` callback for tenacity's @retry (also counts the
+    retry in the task's usage).
+    """
+    current_usage().add(retries=1)
+
+    outcome = retry_state.outcome
+    error = outcome.exception() if outcome is not None else None
+    tracer.annotate(
+        "retry",
+        call=getattr(retry_state.fn, "__qualname__", str(retry_state.fn)),
+        attempt=retry_state.attempt_number,
+        wait_s=round(retry_state.next_action.sleep, 3) if retry_state.next_action else None,
+        error=f"{type(error).__name__}: {error}"[:300] if error else None,
+    )
+
+
+# ============================================================
+#   aiohttp phases
+# ============================================================
+
+def _http_phases(marks: Dict[str, float], end: float) -> Dict[str, float]:
+    """
+    dns:     resolving the host (absent on cache hit / reused connection)
+    connect: TCP + TLS handshake (connection creation minus DNS)
+    queued:  waiting for a free connection in the session's pool
+    ttfb:    request sent → response headers
+    body:    response headers → end of the span (reading the body)
+    """
+    phases: Dict[str, float] = {}
+    dns = marks.get("dns_end", 0) - marks.get("dns_start", 0) if "dns_end" in marks else 0.0
+    if "dns_end" in marks:
+        phases["dns"] = _ms(dns)
+    if "connect_end" in marks:
+        phases["connect"] = _ms(marks["connect_end"] - marks["connect_start"] - dns)
+    if "queued_end" in marks:
+        phases["queued"] = _ms(marks["queued_end"] - marks["queued_start"])
+    if "headers" in marks:
+        sent = marks.get("sent") or marks.get("connect_end") or marks.get("start", marks["headers"])
+        phases["ttfb"] = _ms(marks["headers"] - sent)
+        phases["body"] = _ms(end - marks["headers"])
+    return phases
+
+
+def http_trace_config():
+    """
+    aiohttp TraceConfig recording request phases on the current span.
+    Pass to ClientSession(trace_configs=[...]).
+    """
+    # Deferred: aiohttp is not needed to import the app
+    import aiohttp
+
+    def mark(name: str):
+        async def hook(session, ctx, params):
+            span = _current.get()
+            if span is not None:
+                span._marks[name] = time.time()
+        return hook
+
+    async def on_request_start(session, ctx, params):
+        span = _current.get()
+        if span is not None:
+            # A span may cover several requests (redirects): phases are the last one's
+            span._marks = {"start": time.time()}
+            span.set(http_method=params.method, http_url=str(params.url))
+
+    async def on_request_end(session, ctx, params):
+        span = _current.get()
+        if span is not None:
+            span._marks["headers"] = time.time()
+            span.set(http_status=params.response.status)
+
+    async def on_request_exception(session, ctx, params):
+        span = _current.get()
+        if span is not None:
+            span.event("http_error", error=f"{type(params.exception).__name__}: {params.exception}"[:300])
+
+    async def on_request_redirect(session, ctx, params):
+        span = _current.get()
+        if span is not None:
+            span.event("redirect", status=params.response.status, location=params.response.headers.get("Location", ""))
+
+    async def on_connection_reuseconn(session, ctx, params):
+        span = _current.get()
+        if span is not None:
+            span.set(connection_reused=True)
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    config.on_request_redirect.append(on_request_redirect)
+    config.on_request_headers_sent.append(mark("sent"))
+    config.on_dns_resolvehost_start.append(mark("dns_start"))
+    config.on_dns_resolvehost_end.append(mark("dns_end"))
+    config.on_connection_create_start.append(mark("connect_start"))
+    config.on_connection_create_end.append(mark("connect_end"))
+    config.on_connection_queued_start.append(mark("queued_start"))
+    config.on_connection_queued_end.append(mark("queued_end"))
+    config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return config
+
+
+# Global instance (import anywhere)
+tracer = Tracer(
+    max_traces=settings.TRACE_BUFFER_TASKS,
+    max_spans=settings.TRACE_MAX_SPANS,
+    enabled=settings.TRACING_ENABLED,
+)
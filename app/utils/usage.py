@@ -0,0 +1,147 @@
+"""
+Per-task resource accounting.
+
+A UsageMeter is bound to the running task through a context variable
+(bind_usage, set once per graph run like the LLM caller binding), so
+the tools record what they spend without extra parameters:
+
+    current_usage().add(pages_fetched=1, bytes_downloaded=len(raw))
+
+    with current_usage().timed("parse_cpu_ms"):
+        text = parse(html)
+
+Outside a bound task, current_usage() is a meter nobody reads.
+Times are summed over concurrent calls, so io_wait_ms can exceed the
+task's wall-clock time.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Dict, Optional
+
+
+# Every counter a meter tracks (all start at 0)
+COUNTERS = (
+    "search_calls",
+    "search_cache_hits",
+    "pages_fetched",
+    "pages_not_modified",
+    "pages_failed",
+    "pages_skipped",
+    "page_cache_hits",
+    "summary_cache_hits",
+    "bytes_downloaded",
+    "retries",
+    "llm_calls",
+    "prompt_chars",
+    "response_chars",
+    "prompt_tokens",
+    "response_tokens",
+    "parse_cpu_ms",
+    "io_wait_ms",
+    "llm_queue_wait_ms",
+    "llm_ms",
+)
+
+
+class UsageMeter:
+    """
+    Counters of one task. Thread-safe: parsing may run in worker threads.
+    """
+
+    def __init__(self):
+        self._counts: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+        self._providers: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def add(self, **counts: float):
+        with self._lock:
+            for name, value in counts.items():
+                self._counts[name] += value
+
+    def provider(self, name: str):
+        """Counts one LLM call answered by `name` (gemini, ollama, extractive)."""
+        with self._lock:
+            self._providers[name] = self._providers.get(name, 0) + 1
+
+    @contextmanager
+    def timed(self, counter: str):
+        """Adds the block's wall-clock time (ms) to `counter`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(**{counter: (time.perf_counter() - started) * 1000})
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {
+                name: round(value, 1) if name.endswith("_ms") else int(value)
+                for name, value in self._counts.items()
+            }
+            counts["llm_providers"] = dict(self._providers)
+        return counts
+
+
+_usage: ContextVar[Optional[UsageMeter]] = ContextVar("task_usage", default=None)
+
+# Sink for calls made outside any task (warm-up, probes, shared batches)
+_UNBOUND = UsageMeter()
+
+
+@contextmanager
+def bind_usage(meter: Optional[UsageMeter]):
+    """Charges everything recorded inside the block to `meter` (None = nobody)."""
+    token = _usage.set(meter)
+    try:
+        yield
+    finally:
+        _usage.reset(token)
+
+
+def current_usage() -> UsageMeter:
+    return _usage.get() or _UNBOUND
+
+
+# ============================================================
+#   Aggregation per query path
+# ============================================================
+
+class UsageStats:
+    """
+    Totals and per-task averages of finished tasks, per graph path
+    (GET /stats/usage).
+    """
+
+    def __init__(self):
+        self._paths: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+
+    def record(self, path: str, usage: Dict[str, Any]):
+        with self._lock:
+            entry = self._paths.setdefault(
+                path, {"tasks": 0, "totals": dict.fromkeys(COUNTERS, 0), "llm_providers": {}}
+            )
+            entry["tasks"] += 1
+            for name in COUNTERS:
+                entry["totals"][name] += usage.get(name, 0)
+            for provider, calls in usage.get("llm_providers", {}).items():
+                entry["llm_providers"][provider] = entry["llm_providers"].get(provider, 0) + calls
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                path: {
+                    "tasks": entry["tasks"],
+                    "totals": {k: round(v, 1) for k, v in entry["totals"].items()},
+                    "per_task": {k: round(v / entry["tasks"], 1) for k, v in entry["totals"].items()},
+                    "llm_providers": dict(entry["llm_providers"]),
+                }
+                for path, entry in self._paths.items()
+            }
+
+
+# Global instance (import anywhere)
+usage_stats = UsageStats()
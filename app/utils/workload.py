@@ -0,0 +1,92 @@
+"""
+Replay workload format (JSONL), shared by the request recorder and the
+replay / batch CLIs.
+
+One request per line; the timing key is optional:
+
+    {"at": 0.0,  "query": "impact of AI on jobs", "max_results": 5}
+    {"at": 1.25, "query": "what is rust", "deadline_ms": 8000}
+    {"timestamp": 1767225600.5, "query": "..."}   # epoch seconds or ISO-8601
+
+Every other key is passed through as the ResearchRequest body.
+Lines without a "query" (e.g. other JSONL content) or with a malformed
+timing key are skipped.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("workload")
+
+_TIMING_KEYS = ("at", "timestamp")
+_record_lock = Lock()
+
+
+def record_request(path: str, body: Dict[str, Any]):
+    """Appends one incoming request (with its arrival time) to a workload file."""
+    line = json.dumps({"timestamp": time.time(), **body}, ensure_ascii=False)
+    with _record_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def load_workload(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Reads a workload file. Returns entries sorted by arrival, each with
+    "at" (seconds after the first arrival) and "body" (request fields).
+    """
+    entries = []
+    skipped = 0
+    bad_timing = 0
+
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+            if not isinstance(data, dict) or not data.get("query"):
+                skipped += 1
+                continue
+
+            try:
+                arrival = _arrival_seconds(data)
+            except (TypeError, ValueError):
+                bad_timing += 1
+                continue
+            body = {k: v for k, v in data.items() if k not in _TIMING_KEYS}
+            entries.append({"line": line_no, "arrival": arrival, "body": body})
+
+    if skipped:
+        logger.warning(f"{path}: skipped {skipped} line(s) without a research query")
+    if bad_timing:
+        logger.warning(f"{path}: skipped {bad_timing} line(s) with a malformed \"at\" / \"timestamp\"")
+
+    # Lines without timing arrive back-to-back in file order
+    timed = [e["arrival"] for e in entries if e["arrival"] is not None]
+    origin = min(timed) if timed else 0.0
+    for e in entries:
+        e["at"] = 0.0 if e["arrival"] is None else e["arrival"] - origin
+        del e["arrival"]
+
+    entries.sort(key=lambda e: (e["at"], e["line"]))
+    return entries[:limit] if limit else entries
+
+
+def _arrival_seconds(data: Dict[str, Any]) -> Optional[float]:
+    if "at" in data:
+        return float(data["at"])
+
+    ts = data.get("timestamp")
+    if ts is None:
+        return None
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    return datetime.fromisoformat(str(ts).replace("Z", "+00:00")).timestamp()
@@ -0,0 +1,9 @@
+import pytest
+
+from app.utils import shared_cache
+
+
+@pytest.fixture(autouse=True)
+def no_shared_cache_tier(monkeypatch):
+    """Tests never touch the shared cache file under data/."""
+    monkeypatch.setattr(shared_cache, "shared_tier", None)
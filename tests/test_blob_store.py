@@ -0,0 +1,92 @@
+"""
+Blob store: content-addressed writes, chunked readback, joining blobs
+under a character budget, and pruning by age.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import time
+
+import pytest
+
+from app.utils.blob_store import BlobNotFound, BlobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs"))
+
+
+# -------------------------------------------------------
+# Write / read
+# -------------------------------------------------------
+def test_round_trip_and_dedupe(store):
+    handle = store.put("héllo wörld")
+
+    assert handle.startswith("sha256:")
+    assert store.read_text(handle) == "héllo wörld"
+    assert store.put(b"h\xc3\xa9llo w\xc3\xb6rld") == handle
+    assert len(list(store.root.glob("*/*"))) == 1
+
+
+def test_read_text_limit_and_chunks(store):
+    handle = store.put("x" * 1000)
+
+    assert store.read_text(handle, limit=10) == "x" * 10
+    assert list(store.iter_text(handle, chunk_chars=400)) == ["x" * 400, "x" * 400, "x" * 200]
+
+
+def test_missing_blob_and_bad_handle(store):
+    with pytest.raises(BlobNotFound):
+        store.read_text("sha256:" + "0" * 64)
+    with pytest.raises(ValueError):
+        store.read_text("not-a-handle")
+
+
+# -------------------------------------------------------
+# read_joined
+# -------------------------------------------------------
+def test_every_blob_gets_a_share_of_the_limit(store):
+    handles = [store.put(letter * 100) for letter in "abc"]
+
+    joined = store.read_joined(handles, separator="|", limit=32)
+
+    assert len(joined) <= 32
+    assert joined.split("|") == ["a" * 10, "b" * 10, "c" * 10]
+
+
+def test_short_blobs_leave_their_share_to_later_ones(store):
+    handles = [store.put("a"), store.put("b" * 100)]
+
+    assert store.read_joined(handles, separator="|", limit=21) == "a|" + "b" * 19
+
+
+def test_missing_blobs_are_skipped(store):
+    handles = [store.put("first"), "sha256:" + "0" * 64, store.put("last")]
+
+    assert store.read_joined(handles, separator="|", limit=100) == "first|last"
+
+
+# -------------------------------------------------------
+# prune
+# -------------------------------------------------------
+def test_prune_removes_only_old_blobs(store):
+    old, fresh = store.put("old"), store.put("fresh")
+    past = time.time() - 3600
+    os.utime(store._path(old), (past, past))
+
+    assert store.prune(max_age_s=600) == 1
+    assert not store.exists(old)
+    assert store.exists(fresh)
+
+
+def test_rewriting_a_blob_keeps_it_from_pruning(store):
+    handle = store.put("reused")
+    past = time.time() - 3600
+    os.utime(store._path(handle), (past, past))
+
+    store.put("reused")
+
+    assert store.prune(max_age_s=600) == 0
+    assert store.exists(handle)
@@ -0,0 +1,63 @@
+"""
+Graph nodes: pages found by every sub-query reach the summarizer.
+
+Run with: python -m pytest tests
+"""
+
+import asyncio
+
+from app.config.settings import settings
+from app.services.graph import nodes
+from app.utils.blob_store import BlobStore
+
+
+class FakeSearch:
+    async def search(self, query, max_results):
+        slug = query.replace(" ", "-")
+        return [
+            {"title": f"{query} {i}", "url": f"https://{slug}.example/{i}", "snippet": query}
+            for i in range(max_results)
+        ]
+
+
+class FakeExtractor:
+    async def extract(self, url):
+        # Longer than the whole summarizer input on its own
+        marker = url.split("//")[1].split(".")[0]
+        return f"[{marker}] " * 5000
+
+    def hedge_delay(self):
+        return 10.0
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.text = None
+
+    async def summarize(self, text, on_draft=None):
+        self.text = text
+        return "summary", []
+
+
+def test_every_sub_query_contributes_to_the_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(nodes, "blob_store", BlobStore(str(tmp_path)))
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", False)
+    summarizer = FakeSummarizer()
+    tools = {"search": FakeSearch(), "extract": FakeExtractor(), "summarize": summarizer}
+
+    async def scenario():
+        state = {
+            "query": "ai",
+            "sub_queries": ["ai", "ai jobs", "ai education"],
+            "max_results": 2,
+            "deadline_at": None,
+        }
+        state = await nodes.search_node(state, tools, "t")
+        state = await nodes.extract_content_node(state, tools, "t")
+        return await nodes.summarize_node(state, tools, "t")
+
+    state = asyncio.run(scenario())
+    assert len(state["extracted_handles"]) == 6
+    for marker in ("[ai]", "[ai-jobs]", "[ai-education]"):
+        assert marker in summarizer.text
+    assert len(summarizer.text) <= 20000
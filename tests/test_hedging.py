@@ -0,0 +1,56 @@
+"""
+Hedged calls: the backup starts only after the primary's head start.
+
+Run with: python -m pytest tests
+"""
+
+import asyncio
+
+from app.utils.hedging import hedged
+
+
+def _scenario(queued_s: float, call_s: float, with_started: bool):
+    async def scenario():
+        started = asyncio.Event()
+        backups = []
+
+        async def primary():
+            await asyncio.sleep(queued_s)   # waiting for a slot
+            started.set()
+            await asyncio.sleep(call_s)
+            return "primary"
+
+        async def backup():
+            backups.append(1)
+            await asyncio.sleep(1)
+            return "backup"
+
+        value = await hedged(primary, backup, delay=0.05, started=started if with_started else None)
+        return value, len(backups)
+
+    return asyncio.run(scenario())
+
+
+def test_time_spent_queued_does_not_start_the_backup():
+    assert _scenario(queued_s=0.1, call_s=0.01, with_started=True) == ("primary", 0)
+
+
+def test_without_a_start_event_the_delay_includes_queueing():
+    assert _scenario(queued_s=0.1, call_s=0.01, with_started=False) == ("primary", 1)
+
+
+def test_slow_call_after_the_start_is_still_hedged():
+    async def scenario():
+        started = asyncio.Event()
+
+        async def primary():
+            started.set()
+            await asyncio.sleep(1)
+            return "primary"
+
+        async def backup():
+            return "backup"
+
+        return await hedged(primary, backup, delay=0.02, started=started)
+
+    assert asyncio.run(scenario()) == "backup"
@@ -0,0 +1,83 @@
+"""
+Research history: near-duplicate lookup (`find_similar`) honours the
+similarity threshold and the freshness window, and picks the closest
+match.
+
+Run with: python -m pytest tests
+"""
+
+import time
+
+import pytest
+
+from app.models.history_store import HistoryStore, normalize_tokens, shingles
+from app.models.response_models import ResearchResult
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"))
+
+
+def _save(store: HistoryStore, task_id: str, topic: str, age_s: float = 0.0):
+    store.save(task_id, ResearchResult(topic=topic, summary=f"Summary of {topic}"))
+    if age_s:
+        conn = store._connect()
+        with conn:
+            conn.execute(
+                "UPDATE research_history SET created_at = ? WHERE task_id = ?",
+                (time.time() - age_s, task_id),
+            )
+
+
+# -------------------------------------------------------
+# Normalization
+# -------------------------------------------------------
+def test_normalization_drops_stopwords_and_plurals():
+    assert normalize_tokens("The effects of AI on jobs") == ["effect", "ai", "job"]
+    assert shingles("effects of AI on jobs") == {"effect", "ai", "job", "effect ai", "ai job"}
+
+
+# -------------------------------------------------------
+# find_similar
+# -------------------------------------------------------
+def test_rephrased_query_matches(store):
+    _save(store, "t1", "Effects of AI on jobs")
+
+    match = store.find_similar("the effect of ai on jobs", max_age_s=3600, min_similarity=0.6)
+
+    assert match is not None
+    assert match["task_id"] == "t1"
+    assert match["similarity"] == 1.0
+    assert match["result"].topic == "Effects of AI on jobs"
+
+
+def test_below_threshold_is_no_match(store):
+    _save(store, "t1", "Effects of AI on jobs")
+
+    assert store.find_similar("AI in healthcare diagnostics", max_age_s=3600, min_similarity=0.6) is None
+    # The same pair passes a lower threshold (they share "ai")
+    assert store.find_similar("AI jobs in healthcare", max_age_s=3600, min_similarity=0.1)["task_id"] == "t1"
+
+
+def test_stale_results_are_ignored(store):
+    _save(store, "old", "Effects of AI on jobs", age_s=7200)
+
+    assert store.find_similar("effects of AI on jobs", max_age_s=3600, min_similarity=0.6) is None
+    assert store.find_similar("effects of AI on jobs", max_age_s=86400, min_similarity=0.6)["task_id"] == "old"
+
+
+def test_closest_fresh_result_wins(store):
+    _save(store, "near", "Effects of AI on jobs in Europe")
+    _save(store, "exact", "Effects of AI on jobs")
+    _save(store, "stale-exact", "Effects of AI on jobs", age_s=7200)
+
+    match = store.find_similar("effects of AI on jobs", max_age_s=3600, min_similarity=0.3)
+
+    assert match["task_id"] == "exact"
+
+
+def test_query_of_only_stopwords_is_no_match(store):
+    _save(store, "t1", "Effects of AI on jobs")
+
+    assert store.find_similar("what is the", max_age_s=3600, min_similarity=0.0) is None
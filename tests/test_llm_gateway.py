@@ -0,0 +1,283 @@
+"""
+Scheduling of the LLM gateway: priorities and aging, slots reserved for
+interactive work, cancellation, micro-batching.
+
+Run with: python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.llm_gateway import PRIORITIES, LLMGateway, MicroBatcher, ProviderQueue, bind_caller
+
+INTERACTIVE = PRIORITIES["interactive"]
+BULK = PRIORITIES["bulk"]
+BATCH = PRIORITIES["batch"]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _settle():
+    """Lets every ready task run up to its next await."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _waiter(queue: ProviderQueue, task_id: str, priority: int, order: list):
+    await queue.acquire(task_id, priority)
+    order.append(task_id)
+
+
+# -------------------------------------------------------
+# Priorities and aging
+# -------------------------------------------------------
+def test_higher_priority_is_served_first():
+    async def scenario():
+        queue = ProviderQueue("p", concurrency=1, reserved_interactive=0, aging_s=0)
+        await queue.acquire("holder", BULK)
+        order = []
+        waiters = [
+            asyncio.create_task(_waiter(queue, "batch", BATCH, order)),
+            asyncio.create_task(_waiter(queue, "bulk", BULK, order)),
+            asyncio.create_task(_waiter(queue, "interactive", INTERACTIVE, order)),
+        ]
+        await _settle()
+
+        for _ in waiters:
+            queue.release()
+            await _settle()
+        await asyncio.gather(*waiters)
+        return order
+
+    assert run(scenario()) == ["interactive", "bulk", "batch"]
+
+
+def test_aging_promotes_a_long_waiting_ticket():
+    async def scenario():
+        queue = ProviderQueue("p", concurrency=1, reserved_interactive=0, aging_s=0.02)
+        await queue.acquire("holder", BULK)
+        order = []
+        old = asyncio.create_task(_waiter(queue, "old-batch", BATCH, order))
+        await _settle()
+        # Waiting 5 x aging_s moves it from batch (2) to below interactive (0)
+        await asyncio.sleep(0.1)
+        new = asyncio.create_task(_waiter(queue, "new-interactive", INTERACTIVE, order))
+        await _settle()
+
+        queue.release()
+        await _settle()
+        queue.release()
+        await asyncio.gather(old, new)
+        return order
+
+    assert run(scenario()) == ["old-batch", "new-interactive"]
+
+
+def test_round_robin_between_tasks_of_one_priority():
+    async def scenario():
+        queue = ProviderQueue("p", concurrency=1, reserved_interactive=0, aging_s=0)
+        await queue.acquire("holder", BULK)
+        order = []
+        waiters = [
+            asyncio.create_task(_waiter(queue, task_id, BULK, order))
+            for task_id in ("a", "a", "a", "b")
+        ]
+        await _settle()
+
+        for _ in waiters:
+            queue.release()
+            await _settle()
+        await asyncio.gather(*waiters)
+        return order
+
+    assert run(scenario()) == ["a", "b", "a", "a"]
+
+
+# -------------------------------------------------------
+# Reserved interactive slots
+# -------------------------------------------------------
+def test_reserved_slots_are_kept_for_interactive_work():
+    async def scenario():
+        queue = ProviderQueue("p", concurrency=2, reserved_interactive=1, aging_s=0)
+        await queue.acquire("bulk-1", BULK)
+
+        second_bulk = asyncio.create_task(queue.acquire("bulk-2", BULK))
+        await _settle()
+        assert not second_bulk.done()
+        assert queue.snapshot()["queued"]["bulk"] == 1
+
+        # The reserved slot still admits interactive work right away
+        await asyncio.wait_for(queue.acquire("interactive", INTERACTIVE), timeout=0.5)
+        assert queue.in_flight == 2
+
+        # One slot in flight still leaves none for bulk beyond the reserve
+        queue.release()
+        await _settle()
+        assert not second_bulk.done()
+
+        queue.release()
+        await asyncio.wait_for(second_bulk, timeout=0.5)
+        assert queue.in_flight == 1
+
+    run(scenario())
+
+
+def test_reservation_never_takes_every_slot():
+    queue = ProviderQueue("p", concurrency=1, reserved_interactive=3, aging_s=0)
+    assert queue.reserved == 0
+
+
+# -------------------------------------------------------
+# Cancellation
+# -------------------------------------------------------
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        queue = ProviderQueue("p", concurrency=1, reserved_interactive=0, aging_s=0)
+        await queue.acquire("holder", BULK)
+        waiter = asyncio.create_task(queue.acquire("gone", BULK))
+        await _settle()
+        assert queue.snapshot()["queued"]["bulk"] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert queue.snapshot()["queued"]["bulk"] == 0
+
+        queue.release()
+        assert queue.in_flight == 0
+
+    run(scenario())
+
+
+def test_slot_granted_to_a_cancelled_waiter_is_handed_on():
+    async def scenario():
+        queue = ProviderQueue("p", concurrency=1, reserved_interactive=0, aging_s=0)
+        await queue.acquire("holder", BULK)
+        first = asyncio.create_task(queue.acquire("first", BULK))
+        second = asyncio.create_task(queue.acquire("second", BULK))
+        await _settle()
+
+        # Granted, then cancelled before it could resume
+        queue.release()
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        await asyncio.wait_for(second, timeout=0.5)
+        assert queue.in_flight == 1
+
+    run(scenario())
+
+
+def test_gateway_slot_is_released_when_the_call_is_cancelled():
+    async def scenario():
+        gateway = LLMGateway()
+        started = asyncio.Event()
+
+        async def call():
+            async with gateway.slot("p"):
+                started.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(call())
+        await started.wait()
+        assert gateway.provider("p").in_flight == 1
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert gateway.provider("p").in_flight == 0
+
+    run(scenario())
+
+
+# -------------------------------------------------------
+# Micro-batching
+# -------------------------------------------------------
+def test_micro_batcher_runs_one_call_per_window():
+    async def scenario():
+        batches = []
+
+        async def run_batch(items):
+            batches.append(list(items))
+            return [item.upper() for item in items]
+
+        batcher = MicroBatcher(LLMGateway(), "p", run_batch, max_size=8, window_s=0.01)
+        with bind_caller("t", "bulk"):
+            results = await asyncio.gather(*(batcher.submit(s) for s in ("a", "b", "c")))
+        await _settle()
+        assert not batcher._running
+        return results, batches
+
+    results, batches = run(scenario())
+    assert results == ["A", "B", "C"]
+    assert batches == [["a", "b", "c"]]
+
+
+def test_micro_batcher_charges_each_caller_its_wait_and_call_time():
+    from app.utils.usage import UsageMeter, bind_usage
+
+    async def scenario():
+        async def run_batch(items):
+            await asyncio.sleep(0.05)
+            return items
+
+        batcher = MicroBatcher(LLMGateway(), "p", run_batch, max_size=8, window_s=0.03)
+
+        async def call(item, meter):
+            with bind_usage(meter):
+                return await batcher.submit(item)
+
+        meters = [UsageMeter(), UsageMeter()]
+        await asyncio.gather(*(call(item, m) for item, m in zip("ab", meters)))
+        return [m.snapshot() for m in meters]
+
+    for usage in run(scenario()):
+        assert usage["llm_calls"] == 1
+        assert usage["llm_providers"] == {"p": 1}
+        # The batch window is queue wait, not model time
+        assert 25 <= usage["llm_queue_wait_ms"] < 50
+        assert 45 <= usage["llm_ms"] < 100
+
+
+def test_micro_batcher_failure_reaches_every_caller():
+    async def scenario():
+        async def run_batch(items):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(LLMGateway(), "p", run_batch, max_size=2, window_s=10)
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_gemini_batch_fallback_stays_within_the_batch_slot():
+    from app.tools.summarizer_tool import SummarizerError, SummarizerTool, SummaryOutput
+
+    async def scenario():
+        tool = SummarizerTool()
+        in_flight, peak = 0, 0
+
+        async def batch_call(texts):
+            raise SummarizerError("invalid batch answer")
+
+        async def single_call(text, on_draft=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return SummaryOutput(summary=text, key_points=[])
+
+        tool._gemini_batch_call = batch_call
+        tool._gemini_call = single_call
+        results = await tool._run_gemini_batch(["a", "b", "c"])
+        return [r.summary for r in results], peak
+
+    summaries, peak = run(scenario())
+    assert summaries == ["a", "b", "c"]
+    assert peak == 1
@@ -0,0 +1,229 @@
+"""
+Outbound policy: circuit breaker, AIMD limiter, retry budget and the
+per-host registry.
+
+Run with: python -m pytest tests
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.utils.outbound import AIMDLimiter, CircuitBreaker, CircuitOpenError, OutboundPolicy, RetryBudget
+
+
+class HostError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def _limiter(limit: int = 1) -> AIMDLimiter:
+    return AIMDLimiter(initial=limit, minimum=1, maximum=limit, tolerance=2.0)
+
+
+# -------------------------------------------------------
+# Circuit breaker
+# -------------------------------------------------------
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, open_seconds=60)
+    for _ in range(2):
+        breaker.before_call("h")
+        breaker.on_failure("h")
+    assert breaker.state == "closed"
+
+    # A success resets the count
+    breaker.on_success()
+    for _ in range(3):
+        breaker.before_call("h")
+        breaker.on_failure("h")
+    assert breaker.state == "open" and breaker.is_open()
+
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before_call("h")
+    assert 0 < info.value.retry_in <= 60
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, open_seconds=0.01)
+    breaker.on_failure("h")
+    time.sleep(0.02)
+    assert not breaker.is_open()
+
+    breaker.before_call("h")
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("h")
+
+    # An abandoned probe gives no verdict: the next call may probe
+    breaker.on_cancel()
+    breaker.before_call("h")
+    breaker.on_success()
+    assert breaker.state == "closed"
+    breaker.before_call("h")
+
+
+def test_failed_probe_opens_the_breaker_again():
+    breaker = CircuitBreaker(failure_threshold=5, open_seconds=0.01)
+    for _ in range(5):
+        breaker.on_failure("h")
+    time.sleep(0.02)
+
+    breaker.before_call("h")
+    breaker.on_failure("h")
+    assert breaker.state == "open" and breaker.is_open()
+
+
+# -------------------------------------------------------
+# AIMD limiter
+# -------------------------------------------------------
+def test_limit_grows_additively_and_shrinks_multiplicatively():
+    limiter = AIMDLimiter(initial=4, minimum=1, maximum=5, tolerance=2.0)
+
+    async def call(latency, failed=False):
+        await limiter.acquire()
+        limiter.release(latency, failed)
+
+    async def scenario():
+        for _ in range(4):
+            await call(0.1)
+        grown = limiter.limit
+        await call(0.1, failed=True)
+        halved = limiter.limit
+        await call(1.0)  # 10x the baseline: slow
+        return grown, halved, limiter.limit
+
+    grown, halved, slowed = asyncio.run(scenario())
+    assert 4.9 < grown <= 5
+    assert halved == pytest.approx(grown / 2)
+    assert slowed == pytest.approx(halved * 0.8)
+
+
+def test_limit_stays_within_bounds():
+    limiter = AIMDLimiter(initial=2, minimum=1, maximum=2, tolerance=2.0)
+    for _ in range(5):
+        limiter.in_flight += 1
+        limiter.release(0.1, failed=True)
+    assert limiter.limit == 1
+    for _ in range(50):
+        limiter.in_flight += 1
+        limiter.release(0.1, failed=False)
+    assert limiter.limit == 2
+
+
+def test_waiters_are_admitted_as_slots_free_up():
+    async def scenario():
+        limiter = _limiter(limit=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        limiter.release(0.1, failed=False)
+        await asyncio.wait_for(waiter, timeout=0.5)
+        return limiter.in_flight
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_wake_up_of_a_cancelled_waiter_is_passed_on():
+    async def scenario():
+        limiter = _limiter()
+        await limiter.acquire()
+        woken = asyncio.create_task(limiter.acquire())
+        other = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        # Woken, then cancelled before it could take the slot
+        limiter.abandon()
+        woken.cancel()
+        await asyncio.gather(woken, return_exceptions=True)
+
+        await asyncio.wait_for(other, timeout=0.5)
+        return limiter.in_flight
+
+    assert asyncio.run(scenario()) == 1
+
+
+# -------------------------------------------------------
+# Retry budget
+# -------------------------------------------------------
+def test_retry_budget_is_a_share_of_the_requests_made():
+    budget = RetryBudget(ratio=0.5, initial=1, cap=2)
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    budget.deposit()
+    assert not budget.try_withdraw()
+    budget.deposit()
+    assert budget.try_withdraw()
+
+    for _ in range(10):
+        budget.deposit()
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+
+def test_should_retry_draws_on_the_failing_hosts_budget():
+    policy = OutboundPolicy()
+    policy.for_host("a.example").budget = RetryBudget(ratio=0, initial=1, cap=1)
+
+    error = HostError(503)
+    error.outbound_host = "a.example"
+    assert policy.should_retry(error)
+    assert not policy.should_retry(error)
+
+    # Not retryable at all, budget or not
+    assert not policy.should_retry(HostError(404))
+    assert not policy.should_retry(CircuitOpenError("a.example", 1.0))
+
+
+# -------------------------------------------------------
+# Guard
+# -------------------------------------------------------
+def test_guard_records_failures_and_tags_the_host():
+    async def scenario():
+        policy = OutboundPolicy()
+        host = policy.for_host("a.example")
+        host.breaker.failure_threshold = 2
+
+        for _ in range(2):
+            with pytest.raises(HostError) as info:
+                async with policy.guard("https://a.example/page"):
+                    raise HostError(503)
+            assert info.value.outbound_host == "a.example"
+
+        assert policy.is_open("https://a.example/other")
+        with pytest.raises(CircuitOpenError):
+            async with policy.guard("https://a.example/page"):
+                pass
+        # The refused call gave its limiter slot back
+        return host.limiter.in_flight
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_request_errors_do_not_trip_the_breaker():
+    async def scenario():
+        policy = OutboundPolicy()
+        policy.for_host("a.example").breaker.failure_threshold = 1
+        with pytest.raises(HostError):
+            async with policy.guard("a.example"):
+                raise HostError(404)
+        return policy.is_open("a.example")
+
+    assert asyncio.run(scenario()) is False
+
+
+# -------------------------------------------------------
+# Host registry
+# -------------------------------------------------------
+def test_registry_keeps_only_the_most_recently_used_hosts():
+    policy = OutboundPolicy(max_hosts=2)
+    first = policy.for_host("a.example")
+    policy.for_host("b.example")
+    assert policy.for_host("a.example") is first
+
+    policy.for_host("c.example")
+    assert set(policy.snapshot()) == {"a.example", "c.example"}
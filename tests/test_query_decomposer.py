@@ -0,0 +1,39 @@
+"""
+Rule-based query splitting (app/utils/query_decomposer.split_query).
+
+Run with: python -m pytest tests
+"""
+
+from app.utils.query_decomposer import split_query
+
+
+def test_shared_head_applies_to_every_item():
+    assert split_query("impact of AI on jobs and education", 4) == [
+        "impact of AI on jobs and education",
+        "impact of AI on jobs",
+        "impact of AI on education",
+    ]
+
+
+def test_trailing_context_applies_to_every_item():
+    assert split_query("effects of caffeine and alcohol on sleep", 4)[1:] == [
+        "effects of caffeine on sleep",
+        "effects of alcohol on sleep",
+    ]
+
+
+def test_opener_verb_is_left_out_of_every_item():
+    assert split_query("compare python and rust for web servers", 4)[1:] == [
+        "python for web servers",
+        "rust for web servers",
+    ]
+
+
+def test_single_questions_are_not_split():
+    for query in ("relationship between sleep and memory", "salt and pepper recipes", "what is rust"):
+        assert split_query(query, 4) == [query]
+
+
+def test_sub_queries_are_capped():
+    query = "impact of AI on jobs, education, health and law"
+    assert len(split_query(query, 2)) == 3
@@ -0,0 +1,77 @@
+"""
+Result fusion: URL canonicalization (so providers' results dedupe) and
+reciprocal rank fusion of several ranked lists.
+
+Run with: python -m pytest tests
+"""
+
+from app.utils.ranking import canonicalize_url, reciprocal_rank_fusion
+
+
+# -------------------------------------------------------
+# canonicalize_url
+# -------------------------------------------------------
+def test_variants_of_one_page_share_a_canonical_url():
+    variants = [
+        "https://example.com/article",
+        "http://example.com/article",
+        "https://www.example.com/article/",
+        "https://EXAMPLE.com:443/article#section-2",
+        "http://example.com:80/article",
+    ]
+    assert {canonicalize_url(url) for url in variants} == {"https://example.com/article"}
+
+
+def test_non_default_port_and_root_path_are_kept():
+    assert canonicalize_url("https://example.com:8443") == "https://example.com:8443/"
+
+
+def test_tracking_parameters_are_dropped():
+    url = "https://example.com/a?utm_source=x&mc_cid=1&gclid=2&fbclid=3&ref=feed&ref_src=tw&id=7"
+    assert canonicalize_url(url) == "https://example.com/a?id=7"
+
+
+def test_parameters_that_only_start_like_tracking_ones_are_kept():
+    url = "https://example.com/a?refresh=1&reference=b&referrer=c"
+    assert canonicalize_url(url) == "https://example.com/a?reference=b&referrer=c&refresh=1"
+
+
+def test_parameter_order_does_not_matter():
+    assert canonicalize_url("https://example.com/a?b=2&a=1") == canonicalize_url("https://example.com/a?a=1&b=2")
+
+
+# -------------------------------------------------------
+# reciprocal_rank_fusion
+# -------------------------------------------------------
+def _result(url, title="", snippet=""):
+    return {"title": title, "url": url, "snippet": snippet}
+
+
+def test_results_found_by_several_providers_rank_first():
+    first = [_result("https://a.com/1"), _result("https://b.com/2"), _result("https://c.com/3")]
+    second = [_result("https://d.com/4"), _result("https://www.c.com/3/")]
+
+    fused = reciprocal_rank_fusion([first, second])
+
+    assert [r["url"] for r in fused] == [
+        "https://c.com/3",   # 1/63 + 1/62
+        "https://a.com/1",   # 1/61
+        "https://d.com/4",   # 1/61, later list
+        "https://b.com/2",   # 1/62
+    ]
+
+
+def test_duplicates_are_merged_and_missing_fields_filled_in():
+    first = [_result("http://example.com/a?utm_medium=x", title="A")]
+    second = [_result("https://www.example.com/a", title="Other title", snippet="About A")]
+
+    fused = reciprocal_rank_fusion([first, second])
+
+    assert len(fused) == 1
+    assert fused[0]["title"] == "A"
+    assert fused[0]["snippet"] == "About A"
+
+
+def test_results_without_url_are_skipped():
+    fused = reciprocal_rank_fusion([[{"title": "no url"}, _result("https://a.com")]])
+    assert [r["url"] for r in fused] == ["https://a.com"]
@@ -0,0 +1,165 @@
+"""
+Two-level cache: single-flight within a process, leases across workers
+(a second SQLiteTier connection stands in for another worker), and
+falling back to L1 when the shared tier fails.
+
+Run with: python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from app.config.settings import settings
+from app.utils import shared_cache
+from app.utils.shared_cache import SQLiteTier, TwoLevelCache, _encode
+
+
+@pytest.fixture
+def tier(tmp_path, monkeypatch):
+    tier = SQLiteTier(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(shared_cache, "shared_tier", tier)
+    monkeypatch.setattr(shared_cache, "_tier_down_until", 0.0)
+    monkeypatch.setattr(settings, "SHARED_CACHE_POLL_S", 0.01)
+    return tier
+
+
+def _cache() -> TwoLevelCache:
+    return TwoLevelCache("test", max_entries=16, ttl_seconds=60)
+
+
+# -------------------------------------------------------
+# Single-flight
+# -------------------------------------------------------
+def test_concurrent_misses_compute_once(tier):
+    async def scenario():
+        cache = _cache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "value"
+
+        outcomes = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        return outcomes, len(calls)
+
+    outcomes, calls = asyncio.run(scenario())
+    assert calls == 1
+    assert [value for value, _ in outcomes] == ["value"] * 5
+    assert sorted(hit for _, hit in outcomes) == [False, True, True, True, True]
+
+
+def test_waiter_computes_when_the_first_caller_fails(tier):
+    async def scenario():
+        cache = _cache()
+        attempts = []
+
+        async def compute():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            if len(attempts) == 1:
+                raise RuntimeError("first attempt fails")
+            return "value"
+
+        return await asyncio.gather(
+            cache.get_or_compute("k", compute),
+            cache.get_or_compute("k", compute),
+            return_exceptions=True,
+        ), len(attempts)
+
+    (first, second), attempts = asyncio.run(scenario())
+    assert isinstance(first, RuntimeError)
+    assert second == ("value", False)
+    assert attempts == 2
+
+
+def test_value_is_shared_through_the_tier(tier):
+    async def scenario():
+        async def compute():
+            return {"a": [1, 2]}
+
+        await _cache().get_or_compute("k", compute)
+        # Another worker: empty L1, same tier
+        return await _cache().get("k")
+
+    assert asyncio.run(scenario()) == {"a": [1, 2]}
+
+
+# -------------------------------------------------------
+# Leases (another worker computing the same key)
+# -------------------------------------------------------
+def test_waits_for_the_worker_holding_the_lease(tier, tmp_path):
+    other = SQLiteTier(str(tmp_path / "cache.db"))
+    assert other.acquire_lease("test", "k", 10)
+
+    async def scenario():
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return "mine"
+
+        async def other_worker_finishes():
+            await asyncio.sleep(0.05)
+            other.set("test", "k", _encode("theirs"), 60)
+            other.release_lease("test", "k")
+
+        finisher = asyncio.create_task(other_worker_finishes())
+        outcome = await _cache().get_or_compute("k", compute)
+        await finisher
+        return outcome, calls
+
+    outcome, calls = asyncio.run(scenario())
+    assert outcome == ("theirs", True)
+    assert calls == []
+
+
+def test_computes_when_the_lease_is_released_without_a_value(tier, tmp_path):
+    other = SQLiteTier(str(tmp_path / "cache.db"))
+    assert other.acquire_lease("test", "k", 10)
+
+    async def scenario():
+        async def compute():
+            return "mine"
+
+        async def other_worker_fails():
+            await asyncio.sleep(0.05)
+            other.release_lease("test", "k")
+
+        failer = asyncio.create_task(other_worker_fails())
+        outcome = await _cache().get_or_compute("k", compute)
+        await failer
+        return outcome
+
+    assert asyncio.run(scenario()) == ("mine", False)
+    # Our own lease was released again
+    assert other.acquire_lease("test", "k", 10)
+
+
+# -------------------------------------------------------
+# Failing shared tier
+# -------------------------------------------------------
+class BrokenTier:
+    def __getattr__(self, name):
+        def fail(*args):
+            raise OSError("tier down")
+        return fail
+
+
+def test_failing_tier_falls_back_to_l1(monkeypatch):
+    monkeypatch.setattr(shared_cache, "shared_tier", BrokenTier())
+    monkeypatch.setattr(shared_cache, "_tier_down_until", 0.0)
+
+    async def scenario():
+        cache = _cache()
+
+        async def compute():
+            return "value"
+
+        first = await cache.get_or_compute("k", compute)
+        second = await cache.get_or_compute("k", compute)
+        return first, second
+
+    assert asyncio.run(scenario()) == (("value", False), ("value", True))
+    assert shared_cache._tier_down_until > 0
@@ -0,0 +1,76 @@
+"""
+Summarizer error classification: calls refused by an open circuit
+breaker are not retried.
+
+Run with: python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from app.config.settings import settings
+from app.tools import summarizer_tool
+from app.tools.summarizer_tool import GEMINI_HOST, SummarizerError, SummarizerTool
+from app.utils import outbound as outbound_module
+from app.utils.outbound import CircuitOpenError, OutboundPolicy
+
+
+class FakeModel:
+    calls = 0
+
+    def __init__(self, name):
+        pass
+
+    async def generate_content_async(self, prompt, stream=False):
+        FakeModel.calls += 1
+        raise AssertionError("an open breaker must not let the call through")
+
+
+class FakeGemini:
+    GenerativeModel = FakeModel
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    """A fresh outbound policy with Gemini's breaker open."""
+    policy = OutboundPolicy()
+    monkeypatch.setattr(outbound_module, "outbound", policy)
+    monkeypatch.setattr(summarizer_tool, "outbound", policy)
+    breaker = policy.for_host(GEMINI_HOST).breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.on_failure(GEMINI_HOST)
+    FakeModel.calls = 0
+    return policy
+
+
+def _tool() -> SummarizerTool:
+    tool = SummarizerTool()
+    tool.gemini_client = FakeGemini()
+    return tool
+
+
+def test_open_breaker_error_is_not_wrapped(policy):
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(_tool()._gemini_call("some text"))
+    assert FakeModel.calls == 0
+
+
+def test_hedged_summary_refused_by_the_breaker_is_not_retried(policy, monkeypatch):
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", True)
+    tool = _tool()
+    ollama_calls = 0
+
+    async def failing_ollama(text, on_draft=None):
+        nonlocal ollama_calls
+        ollama_calls += 1
+        raise SummarizerError("Ollama request failed: HTTP 503", status=503)
+
+    tool._summarize_ollama = failing_ollama
+
+    with pytest.raises(SummarizerError) as info:
+        asyncio.run(tool.summarize("a text nobody summarized before"))
+
+    assert info.value.retryable is False
+    assert FakeModel.calls == 0
+    assert ollama_calls == 1
@@ -0,0 +1,122 @@
+"""
+Task store: status / creation-time indexes and cursor pagination,
+spilling, compaction and retention of finished tasks.
+
+Run with: python -m pytest tests
+"""
+
+from bisect import insort
+
+import pytest
+
+from app.models import task_store as task_store_module
+from app.models.response_models import ResearchResult
+from app.models.task_store import TaskStore
+from app.utils.blob_store import BlobStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_store_module, "blob_store", BlobStore(str(tmp_path)))
+    return TaskStore(max_resident_results=1)
+
+
+def _backdate(store: TaskStore, task_id: str, created_at: float):
+    """Moves a task's creation time (and its index entries) back."""
+    with store._lock:
+        data = store._tasks[task_id]
+        store._unindex_status(data)
+        store._by_created.remove((data["created_at"], task_id))
+        data["created_at"] = created_at
+        insort(store._by_created, (created_at, task_id))
+        store._index_status(data)
+
+
+def _finish(store: TaskStore, task_id: str):
+    store.create_task(task_id, query=f"query {task_id}")
+    store.update_source(task_id, f"https://{task_id}.example", "extracted")
+    store.usage_meter(task_id).add(llm_calls=2)
+    store.set_result(task_id, ResearchResult(topic=task_id, summary=f"summary {task_id}"))
+
+
+# -------------------------------------------------------
+# Indexes and pagination
+# -------------------------------------------------------
+def test_pages_follow_creation_order_with_a_cursor(store):
+    for i in range(5):
+        store.create_task(f"t{i}", query=f"q{i}")
+        _backdate(store, f"t{i}", 100.0 + i)
+
+    page, cursor = store.list_tasks(limit=2)
+    assert [t.task_id for t in page] == ["t0", "t1"] and cursor == "t1"
+    page, cursor = store.list_tasks(after=cursor, limit=2)
+    assert [t.task_id for t in page] == ["t2", "t3"] and cursor == "t3"
+    page, cursor = store.list_tasks(after=cursor, limit=2)
+    assert [t.task_id for t in page] == ["t4"] and cursor is None
+
+    page, _ = store.list_tasks(since=102.0)
+    assert [t.task_id for t in page] == ["t2", "t3", "t4"]
+
+    with pytest.raises(KeyError):
+        store.list_tasks(after="unknown")
+
+
+def test_status_index_follows_every_transition(store):
+    for task_id in ("a", "b", "c"):
+        store.create_task(task_id, query=task_id)
+    store.update_progress("a", 50)
+    store.update_progress("b", 50)
+    store.set_error("b", "boom")
+
+    def ids(status):
+        return [t.task_id for t in store.list_tasks(status=status)[0]]
+
+    assert ids("pending") == ["c"]
+    assert ids("running") == ["a"]
+    assert ids("failed") == ["b"]
+    assert store.count_active() == 2
+
+    # Resumed: back to pending, same place in the overall listing
+    store.create_task("b", query="b")
+    assert ids("failed") == [] and ids("pending") == ["b", "c"]
+    assert [t.task_id for t in store.list_tasks()[0]] == ["a", "b", "c"]
+
+
+# -------------------------------------------------------
+# Spilling and compaction
+# -------------------------------------------------------
+def test_spilled_task_is_compacted_and_read_back(store):
+    _finish(store, "old")
+    _finish(store, "new")
+
+    with store._lock:
+        old = store._tasks["old"]
+        assert old["result"] is None and old["result_handle"]
+        assert old["sources"] == {}
+    assert store.usage_meter("old") is None
+
+    status = store.get_status("old")
+    assert status.result.summary == "summary old"
+    assert status.usage.llm_calls == 2
+    assert store.get_status("new").result.summary == "summary new"
+
+
+# -------------------------------------------------------
+# Retention
+# -------------------------------------------------------
+def test_finished_tasks_past_retention_are_evicted(store):
+    store.create_task("running", query="still going")
+    store.update_progress("running", 50)
+    _finish(store, "ancient")
+    _finish(store, "recent")
+    # Running tasks are never evicted, however old
+    _backdate(store, "running", 2.0)
+    _backdate(store, "ancient", 1.0)
+
+    assert store.evict_finished(max_age_s=3600) == 1
+    assert not store.exists("ancient")
+    assert store.exists("recent") and store.exists("running")
+
+    page, _ = store.list_tasks()
+    assert "ancient" not in [t.task_id for t in page]
+    assert store.list_tasks(status="completed")[0][0].task_id == "recent"
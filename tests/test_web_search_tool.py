@@ -0,0 +1,56 @@
+"""
+Search result caching: a search that found fewer results than asked
+for is still a cache hit for the same or a smaller count.
+
+Run with: python -m pytest tests
+"""
+
+import asyncio
+
+from app.tools import web_search_tool
+from app.tools.web_search_tool import WebSearchTool
+from app.utils.shared_cache import TwoLevelCache
+
+
+def _scenario(monkeypatch, steps):
+    monkeypatch.setattr(web_search_tool, "_search_cache", TwoLevelCache("search-test", 16, 60))
+    calls = []
+
+    async def fake_search(self, query, count):
+        calls.append(count)
+        # The providers only know two results for this query
+        return [{"title": f"r{i}", "url": f"https://r{i}.example", "snippet": ""} for i in range(min(count, 2))]
+
+    monkeypatch.setattr(WebSearchTool, "_search", fake_search)
+
+    async def scenario():
+        tool = WebSearchTool()
+        try:
+            return [await step(tool) for step in steps]
+        finally:
+            await tool.close()
+
+    return asyncio.run(scenario()), calls
+
+
+def test_short_result_list_is_a_hit_for_the_same_or_smaller_count(monkeypatch):
+    results, calls = _scenario(monkeypatch, [
+        lambda tool: tool.search("rare topic", 5),
+        lambda tool: tool.search("Rare  topic", 5),
+        lambda tool: tool.search("rare topic", 3),
+        lambda tool: WebSearchTool.cached_results("rare topic", 5),
+    ])
+    assert calls == [5]
+    assert [len(r) for r in results] == [2, 2, 2, 2]
+
+
+def test_larger_count_searches_again(monkeypatch):
+    results, calls = _scenario(monkeypatch, [
+        lambda tool: tool.search("rare topic", 1),
+        lambda tool: WebSearchTool.cached_results("rare topic", 2),
+        lambda tool: tool.search("rare topic", 2),
+        lambda tool: WebSearchTool.cached_results("rare topic", 2),
+    ])
+    assert calls == [1, 2]
+    assert results[1] is None
+    assert len(results[3]) == 2